@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import bisect
+import hashlib
 import json
 import math
+import multiprocessing
+import os
+import queue
 import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import flet as ft
+import numpy as np
 import pandas as pd
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -16,6 +29,16 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import mm
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+try:
+    import pyarrow  # noqa: F401  (habilita Feather en la caché de hojas)
+except ImportError:
+    pyarrow = None
+
+# Las vistas de hojas (DatasetRepository.sheet_view) dependen de copy-on-write,
+# que es el comportamiento fijo desde pandas 3; en pandas 2.x se activa aquí.
+if int(pd.__version__.split(".")[0]) == 2:
+    pd.set_option("mode.copy_on_write", True)
+
 
 # =========================================================
 # APP CONVALIDACIÓN / PROYECCIÓN MALLA UPN
@@ -29,6 +52,18 @@ PDF_VERSION = "7.63"
 DATASET_FILE = "dataset.xlsx"
 OUTPUT_DIR = "APP_CONVALIDACION_SALIDAS"
 TOLERANCIA_CRD = 2
+MAX_CREDITOS_DP = 5000
+# Motor subset-sum: "bitset", "numpy" o "dict" (original). Variable de entorno CONVA_MOTOR.
+MOTOR_SELECCION = os.environ.get("CONVA_MOTOR", "bitset").strip().lower()
+# Caché binaria de hojas en dataset.xlsx.cache/ (CONVA_CACHE_DATASET=0 la desactiva).
+USE_SHEET_CACHE = os.environ.get("CONVA_CACHE_DATASET", "1") != "0"
+HOT_RELOAD = os.environ.get("CONVA_RECARGA_DATASET", "1") != "0"
+RELOAD_INTERVAL = float(os.environ.get("CONVA_RECARGA_INTERVALO", "2"))
+# Recarga en caliente: parsear las hojas que no están en caché en un proceso por hoja
+# (CONVA_CARGA_PARALELA=1). El arranque carga hoja por hoja para ir habilitando la UI.
+PARALLEL_RELOAD = os.environ.get("CONVA_CARGA_PARALELA", "0") == "1"
+# Espera tras la última tecla antes de consultar (búsqueda, CRD, carrera); CONVA_DEBOUNCE_MS.
+INPUT_DEBOUNCE = float(os.environ.get("CONVA_DEBOUNCE_MS", "150")) / 1000
 RESPONSIVE_WIDTH = 1180
 
 SHEET_PAQUETE = "PAQUETE"
@@ -37,6 +72,8 @@ SHEET_SEDES = "MAESTRO_SEDES"
 SHEET_MALLA = "MALLA"
 SHEET_CENTROS = "Maestro_Centro_Estudios"
 SHEET_RESPONSABLES = "MAESTRO_RESPONSABLE_ACADEMICO"
+# Hojas que el formulario necesita al arrancar (se cargan juntas con load_sheets).
+STARTUP_SHEETS = (SHEET_PAQUETE, SHEET_SEDES, SHEET_MALLA, SHEET_CENTROS, SHEET_RESPONSABLES)
 
 
 # =========================================================
@@ -119,6 +156,146 @@ def normalize_malla_value(value: Any) -> str:
     return txt
 
 
+def normalize_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [normalize_key(c) for c in df.columns]
+    return df.fillna("")
+
+
+def _parse_sheet_worker(excel_path: str, sheet_name: str) -> Tuple[str, pd.DataFrame, float]:
+    # Nivel de módulo para poder ejecutarse en ProcessPoolExecutor.
+    t0 = time.perf_counter()
+    df = normalize_sheet(pd.read_excel(excel_path, sheet_name=sheet_name))
+    return sheet_name, df, time.perf_counter() - t0
+
+
+# =========================================================
+# CACHÉ BINARIA DE HOJAS
+# =========================================================
+
+class SheetDiskCache:
+    """
+    Hojas ya normalizadas en <excel>.cache/, validadas por (tamaño, mtime, sha1) del Excel.
+    Si tamaño y mtime coinciden no se lee el Excel; si solo cambió el mtime se compara el sha1.
+    Feather si hay pyarrow y la hoja es compatible; si no, pickle de pandas.
+    """
+
+    VERSION = 1
+    MANIFEST = "manifest.json"
+
+    def __init__(self, excel_path: str | Path, enabled: bool = USE_SHEET_CACHE):
+        self.excel_path = Path(excel_path)
+        self.folder = Path(f"{self.excel_path}.cache")
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self.folder / self.MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        self.folder.mkdir(exist_ok=True)
+        tmp = self.folder / f"{self.MANIFEST}.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.folder / self.MANIFEST)
+
+    def _current(self) -> Optional[Dict[str, Any]]:
+        signature = file_signature(self.excel_path)
+        if signature is None:
+            return None
+        size, mtime_ns = signature
+
+        manifest = self._manifest or self._read_manifest()
+        if manifest and manifest.get("version") == self.VERSION and manifest.get("size") == size:
+            if manifest.get("mtime_ns") == mtime_ns:
+                self._manifest = manifest
+                return manifest
+            sha1 = file_sha1(self.excel_path)
+            if manifest.get("sha1") == sha1:
+                manifest["mtime_ns"] = mtime_ns
+                self._write_manifest(manifest)
+                self._manifest = manifest
+                return manifest
+        else:
+            sha1 = file_sha1(self.excel_path)
+
+        for name in (manifest or {}).get("sheets", {}).values():
+            (self.folder / name).unlink(missing_ok=True)
+        self._manifest = {"version": self.VERSION, "size": size, "mtime_ns": mtime_ns, "sha1": sha1, "sheets": {}, "meta": {}}
+        return self._manifest
+
+    def _store(self, key: str, df: pd.DataFrame) -> str:
+        self.folder.mkdir(exist_ok=True)
+        base = "".join(ch if ch.isalnum() else "_" for ch in key)
+        if pyarrow is not None and isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+            tmp = self.folder / f"{base}.feather.tmp"
+            try:
+                df.to_feather(tmp)
+                tmp.replace(self.folder / f"{base}.feather")
+                return f"{base}.feather"
+            except Exception:  # columnas con tipos mezclados
+                tmp.unlink(missing_ok=True)
+        tmp = self.folder / f"{base}.pkl.tmp"
+        df.to_pickle(tmp)
+        tmp.replace(self.folder / f"{base}.pkl")
+        return f"{base}.pkl"
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """Hoja desde disco o None si no está (o la caché está desactivada)."""
+        if not self.enabled:
+            return None
+        manifest = self._current()
+        name = manifest["sheets"].get(key) if manifest else None
+        if name:
+            try:
+                path = self.folder / name
+                df = pd.read_feather(path) if name.endswith(".feather") else pd.read_pickle(path)
+                self.hits += 1
+                return df
+            except Exception:
+                pass  # archivo dañado: se reconstruye
+        self.misses += 1
+        return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        if not self.enabled:
+            return
+        manifest = self._current()
+        if manifest is None:
+            return
+        try:
+            manifest["sheets"][key] = self._store(key, df)
+            self._write_manifest(manifest)
+        except Exception:
+            pass  # sin permisos de escritura: se sigue sin caché
+
+    def get(self, key: str, build) -> pd.DataFrame:
+        df = self.load(key)
+        if df is None:
+            df = build()
+            self.put(key, df)
+        return df
+
+    def get_meta(self, key: str, build):
+        """Valor JSON pequeño (p. ej. nombres de hojas) guardado en el manifest."""
+        if not self.enabled:
+            return build()
+        manifest = self._current()
+        if manifest is not None and key in manifest.get("meta", {}):
+            return manifest["meta"][key]
+        value = build()
+        if manifest is not None:
+            manifest.setdefault("meta", {})[key] = value
+            try:
+                self._write_manifest(manifest)
+            except OSError:
+                pass
+        return value
+
+
 # =========================================================
 # DATASET REPOSITORY
 # =========================================================
@@ -130,144 +307,602 @@ class DatasetRepository:
             raise FileNotFoundError(
                 f"No se encontró el archivo {self.excel_path.name}. Debe estar en la misma carpeta del script."
             )
-        self.book = pd.ExcelFile(self.excel_path)
+        # Firma del Excel con la que se creó este repositorio (la recarga en caliente la compara).
+        self.signature = file_signature(self.excel_path)
+        self._version: Optional[str] = None
+        self.disk_cache = SheetDiskCache(self.excel_path)
+        self._book: Optional[pd.ExcelFile] = None
+        self._sheet_names: Optional[List[str]] = None
+        # La UI carga hojas en un hilo de fondo mientras el usuario ya puede interactuar.
+        self._lock = threading.RLock()
         self._cache: Dict[str, pd.DataFrame] = {}
+        self.alloc_stats = {"views": 0, "copies": 0, "copied_bytes": 0}
+        self.load_timings: Dict[str, float] = {}
+        self._malla_catalog: Optional["MallaCatalog"] = None
+        self._institution_index: Optional["InstitutionIndex"] = None
+        self._responsables: Optional[List[Dict[str, str]]] = None
+        self._responsables_by_name: Dict[str, Dict[str, str]] = {}
+
+    @property
+    def book(self) -> pd.ExcelFile:
+        # Solo se abre el Excel si alguna hoja no está en la caché binaria.
+        with self._lock:
+            if self._book is None:
+                self._book = pd.ExcelFile(self.excel_path)
+            return self._book
+
+    @property
+    def sheet_names(self) -> List[str]:
+        with self._lock:
+            if self._sheet_names is None:
+                self._sheet_names = self.disk_cache.get_meta("sheet_names", lambda: list(self.book.sheet_names))
+            return self._sheet_names
+
+    @property
+    def version(self) -> str:
+        """Versión legible del dataset: 'sha1[:8] (fecha de modificación)'."""
+        with self._lock:
+            if self._version is None:
+                mtime = datetime.fromtimestamp(self.signature[1] / 1e9) if self.signature else datetime.now()
+                self._version = f"{file_sha1(self.excel_path)[:8]} ({mtime:%Y-%m-%d %H:%M})"
+            return self._version
+
+    def _parse_sheet(self, sheet_name: str) -> pd.DataFrame:
+        # Reutiliza el libro ya abierto (no vuelve a descomprimir el xlsx).
+        return normalize_sheet(pd.read_excel(self.book, sheet_name=sheet_name))
+
+    def load_sheets(self, sheet_names=STARTUP_SHEETS, parallel: bool = False) -> Dict[str, float]:
+        """
+        Carga en memoria varias hojas en una sola pasada: primero la caché binaria y,
+        para las que falten, un único ExcelFile en modo solo lectura (streaming de openpyxl).
+        parallel=True parsea cada hoja faltante en su propio proceso: lo usa la recarga en
+        caliente con CONVA_CARGA_PARALELA=1 (y benchmarks/bench_arranque.py).
+        Devuelve y acumula en load_timings los segundos por hoja.
+        """
+        with self._lock:
+            timings: Dict[str, float] = {}
+            missing: List[str] = []
+            for name in sheet_names:
+                if name in self._cache or name not in self.sheet_names:
+                    continue
+                t0 = time.perf_counter()
+                df = self.disk_cache.load(name)
+                if df is None:
+                    missing.append(name)
+                    continue
+                self._cache[name] = df
+                timings[name] = time.perf_counter() - t0
+
+            if missing and parallel and len(missing) > 1:
+                with ProcessPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as pool:
+                    for name, df, secs in pool.map(_parse_sheet_worker, [str(self.excel_path)] * len(missing), missing):
+                        self._cache[name] = df
+                        self.disk_cache.put(name, df)
+                        timings[name] = secs
+            elif missing:
+                if self._book is None:
+                    t0 = time.perf_counter()
+                    self.book  # abre el libro una sola vez para todas las hojas
+                    timings["(abrir libro)"] = time.perf_counter() - t0
+                for name in missing:
+                    t0 = time.perf_counter()
+                    df = self._parse_sheet(name)
+                    self._cache[name] = df
+                    self.disk_cache.put(name, df)
+                    timings[name] = time.perf_counter() - t0
+
+            self.load_timings.update(timings)
+            return timings
+
+    def _load_sheet(self, sheet_name: str) -> pd.DataFrame:
+        with self._lock:
+            if sheet_name not in self._cache:
+                if sheet_name not in self.sheet_names:
+                    raise ValueError(f"No existe la hoja: {sheet_name}")
+                self._cache[sheet_name] = self.disk_cache.get(sheet_name, lambda: self._parse_sheet(sheet_name))
+            return self._cache[sheet_name]
+
+    def sheet_view(self, sheet_name: str) -> pd.DataFrame:
+        """
+        Vista de solo lectura de la hoja, sin copiar datos (uso por defecto).
+        Con copy-on-write una escritura sobre la vista copia solo lo escrito y
+        nunca altera la hoja en memoria; si se va a modificar, usar read_sheet().
+        """
+        df = self._load_sheet(sheet_name)
+        self.alloc_stats["views"] += 1
+        return df.copy(deep=False)
 
     def read_sheet(self, sheet_name: str) -> pd.DataFrame:
-        if sheet_name in self._cache:
-            return self._cache[sheet_name].copy()
-
-        if sheet_name not in self.book.sheet_names:
-            raise ValueError(f"No existe la hoja: {sheet_name}")
-
-        df = pd.read_excel(self.excel_path, sheet_name=sheet_name)
-        df.columns = [normalize_key(c) for c in df.columns]
-        df = df.fillna("")
-        self._cache[sheet_name] = df.copy()
+        """Copia profunda e independiente de la hoja (para quien necesita mutarla)."""
+        df = self._load_sheet(sheet_name)
+        self.alloc_stats["copies"] += 1
+        self.alloc_stats["copied_bytes"] += int(df.memory_usage(index=True, deep=False).sum())
         return df.copy()
 
+    def allocation_stats(self) -> Dict[str, int]:
+        return dict(self.alloc_stats)
+
     def get_paquetes(self) -> List[str]:
-        df = self.read_sheet(SHEET_PAQUETE)
+        df = self.sheet_view(SHEET_PAQUETE)
         if "PAQUETE" not in df.columns:
             return []
         return sorted([str(x).strip() for x in df["PAQUETE"].tolist() if str(x).strip()])
 
     def get_sedes(self) -> List[str]:
-        df = self.read_sheet(SHEET_SEDES)
+        df = self.sheet_view(SHEET_SEDES)
         col = "DESCRIPCION" if "DESCRIPCION" in df.columns else (df.columns[0] if len(df.columns) else None)
         if not col:
             return []
         return sorted([str(x).strip() for x in df[col].tolist() if str(x).strip()])
 
     def get_carreras(self) -> List[str]:
-        df = self.read_sheet(SHEET_MALLA)
-        if "CARRERA" not in df.columns:
-            return []
-        return sorted(df["CARRERA"].astype(str).str.strip().replace("", pd.NA).dropna().unique().tolist())
+        return self.malla_catalog().carreras()
 
     def get_responsables(self) -> List[Dict[str, str]]:
-        df = self.read_sheet(SHEET_RESPONSABLES)
-        out = []
-        for _, r in df.iterrows():
-            nombre = str(r.get("NOMBRE", "")).strip()
-            if not nombre:
-                continue
-            out.append(
-                {
-                    "nombre": nombre,
-                    "cargo": str(r.get("CARGO", "")).strip(),
-                    "correo": str(r.get("CORREO", "")).strip(),
-                    "grupo": str(r.get("GRUPO", "")).strip(),
-                }
-            )
-        return out
+        return [dict(item) for item in self.responsables_index()]
 
     def get_responsable_by_nombre(self, nombre: str) -> Optional[Dict[str, str]]:
-        objetivo = normalize_text_search(nombre)
-        for item in self.get_responsables():
-            if normalize_text_search(item["nombre"]) == objetivo:
-                return item
-        return None
+        self.responsables_index()
+        item = self._responsables_by_name.get(normalize_text_search(nombre))
+        return dict(item) if item else None
+
+    def responsables_index(self) -> List[Dict[str, str]]:
+        """Responsables en el orden de la hoja, armados una vez, más el hash nombre normalizado -> responsable."""
+        with self._lock:
+            if self._responsables is None:
+                df = self.sheet_view(SHEET_RESPONSABLES)
+                items = []
+                for _, r in df.iterrows():
+                    nombre = str(r.get("NOMBRE", "")).strip()
+                    if not nombre:
+                        continue
+                    items.append(
+                        {
+                            "nombre": nombre,
+                            "cargo": str(r.get("CARGO", "")).strip(),
+                            "correo": str(r.get("CORREO", "")).strip(),
+                            "grupo": str(r.get("GRUPO", "")).strip(),
+                        }
+                    )
+                by_name: Dict[str, Dict[str, str]] = {}
+                for item in items:
+                    by_name.setdefault(normalize_text_search(item["nombre"]), item)  # gana la primera fila
+                self._responsables_by_name = by_name
+                self._responsables = items
+            return self._responsables
 
     def search_instituciones(self, query: str) -> List[Dict[str, str]]:
-        df = self.read_sheet(SHEET_CENTROS)
-        q = normalize_text_search(query)
-        out: List[Dict[str, str]] = []
-        for _, r in df.iterrows():
-            nombre = str(r.get("NOMBRE") or r.get("INSTITUCION_S") or r.get("INSTITUCION_C") or "").strip()
-            if not nombre:
-                continue
-            tipo = str(r.get("INSTITUCION_TIPO", "")).strip().upper()
-            codigo = str(r.get("COD_INSTITUCION", "")).strip()
-            if q and q not in normalize_text_search(nombre):
-                continue
-            out.append({"nombre": nombre, "tipo": tipo, "codigo": codigo})
-        out.sort(key=lambda x: x["nombre"].lower())
-        return out[:50]
+        return self.institution_index().search(query, limit=50)
+
+    def institution_index(self) -> "InstitutionIndex":
+        with self._lock:
+            if self._institution_index is None:
+                self._institution_index = InstitutionIndex(self.sheet_view(SHEET_CENTROS))
+            return self._institution_index
 
     def get_centro_by_nombre(self, nombre: str) -> Optional[Dict[str, str]]:
-        objetivo = normalize_text_search(nombre)
-        if not objetivo:
-            return None
-        for item in self.search_instituciones(""):
-            if normalize_text_search(item["nombre"]) == objetivo:
-                return item
-        return None
+        return self.institution_index().get(nombre)
 
     def resolver_malla_existente(self, malla_canonica: str) -> str:
-        df = self.read_sheet(SHEET_MALLA)
-        if "MALLA" not in df.columns:
-            return malla_canonica
-        disponibles = [str(x).strip() for x in df["MALLA"].tolist() if str(x).strip()]
-        objetivo = normalize_malla_value(malla_canonica)
-        for v in disponibles:
-            if normalize_malla_value(v) == objetivo:
-                return v
-        return malla_canonica
+        return self.malla_catalog().malla_real.get(normalize_malla_value(malla_canonica), malla_canonica)
+
+    def get_mallas_by_carrera(self, carrera: str) -> Tuple[str, ...]:
+        return self.malla_catalog().mallas_por_carrera.get(str(carrera).strip(), ())
+
+    def malla_catalog(self) -> "MallaCatalog":
+        with self._lock:
+            if self._malla_catalog is None:
+                self._malla_catalog = MallaCatalog(self._load_sheet(SHEET_MALLA))
+                # El catálogo reemplaza a la hoja: se suelta el DataFrame (columnas object).
+                self._cache.pop(SHEET_MALLA, None)
+            return self._malla_catalog
 
     def get_unidades_by_carrera_and_malla(self, carrera: str, malla: str) -> List[str]:
-        df = self.read_sheet(SHEET_MALLA)
-        if not {"CARRERA", "MALLA", "UNID_NEGOCIO"}.issubset(df.columns):
-            return []
-        mask = (
-            df["CARRERA"].astype(str).str.strip().eq(str(carrera).strip())
-            & df["MALLA"].map(normalize_malla_value).eq(normalize_malla_value(malla))
-        )
-        unidades = df.loc[mask, "UNID_NEGOCIO"].astype(str).str.strip()
-        return sorted(unidades.replace("", pd.NA).dropna().unique().tolist())
+        return list(self.malla_catalog().unidades.get((str(carrera).strip(), normalize_malla_value(malla)), ()))
+
+    def get_malla_cursos(self, carrera: str, unidad: str, malla: str) -> List[MallaCourse]:
+        """Cursos en el orden de la vista previa, como vistas sobre el catálogo (sin copiar)."""
+        catalog = self.malla_catalog()
+        return catalog.cursos(MallaCatalog.make_key(carrera, unidad, malla))
 
     def get_malla_preview(self, carrera: str, unidad: str, malla: str) -> List[Dict[str, Any]]:
-        df = self.read_sheet(SHEET_MALLA)
-        required = {"CARRERA", "UNID_NEGOCIO", "MALLA"}
-        if not required.issubset(df.columns):
-            return []
-        mask = (
-            df["CARRERA"].astype(str).str.strip().eq(str(carrera).strip())
-            & df["UNID_NEGOCIO"].astype(str).str.strip().eq(str(unidad).strip())
-            & df["MALLA"].map(normalize_malla_value).eq(normalize_malla_value(malla))
-        )
-        mdf = df.loc[mask].copy()
-        if mdf.empty:
-            return []
+        return [dict(curso) for curso in self.get_malla_cursos(carrera, unidad, malla)]
+
 
-        mdf["_CICLO_NUM"] = mdf.get("CICLO", "").map(extract_cycle_number)
-        mdf["_UBI"] = mdf.get("UBICACION_EN_EL_CICLO", "").map(number_safe)
-        mdf = mdf.sort_values(["_CICLO_NUM", "_UBI"], ascending=[True, True])
+# =========================================================
+# REQUISITOS: GRAMÁTICA Y / O
+# =========================================================
+# "+" y "&" = Y; ";", ",", "/" y "|" = O; paréntesis para agrupar; Y liga más que O.
+# " Y " no es operador: aparece dentro de nombres ("ESTRUCTURA Y FUNCIÓN HUMANA").
+# Un paréntesis pegado a un nombre son sus códigos ("A + B (COD1 + COD2)"): se ignora.
+REQ_AND = "+&"
+REQ_OR = ";,/|"
+REQ_TOKENS = re.compile(r"([()+&;,/|])")
+
+
+def protected_course_names(cursos: Iterable[Any]) -> Tuple[str, ...]:
+    """Nombres de curso con un operador adentro ("LEY PENAL, TEORÍA ..."): se leen enteros."""
+    ops = set(REQ_AND + REQ_OR + "()")
+    names = {str(c).strip().upper() for c in cursos}
+    return tuple(sorted((n for n in names if ops & set(n)), key=len, reverse=True))
+
+
+def parse_requirement(req: Any, protected: Tuple[str, ...] = ()) -> List[frozenset]:
+    """
+    REQUISITOS en forma normal disyuntiva: lista de conjuntos de nombres; se cumple si
+    algún conjunto está completo. Lista vacía = sin requisito (celda vacía o sin nombres).
+    """
+    text = str(req).strip().upper()
+    if not text or text == "NAN":
+        return []
+    marks = {}
+    for i, name in enumerate(protected):
+        if name in text:
+            mark = f"\x00{i}\x00"
+            text = text.replace(name, mark)
+            marks[mark] = name
+    tokens = [t.strip() for t in REQ_TOKENS.split(text) if t.strip()]
+    pos = 0
+
+    def disjunction():
+        nonlocal pos
+        terms = None
+        while True:
+            t = conjunction()
+            if t is not None:
+                terms = (terms or []) + t
+            if pos < len(tokens) and tokens[pos] in REQ_OR:
+                pos += 1
+                continue
+            return terms
+
+    def conjunction():
+        nonlocal pos
+        terms = None
+        while True:
+            f = factor()
+            if f is not None:
+                terms = f if terms is None else [a | b for a in terms for b in f]
+            if pos < len(tokens) and tokens[pos] in REQ_AND:
+                pos += 1
+                continue
+            return terms
 
+    def factor():
+        nonlocal pos
+        if pos >= len(tokens):
+            return None
+        token = tokens[pos]
+        if token == "(":
+            pos += 1
+            inner = disjunction()
+            if pos < len(tokens) and tokens[pos] == ")":
+                pos += 1
+            return inner
+        if token in REQ_AND or token in REQ_OR or token == ")":
+            return None
+        pos += 1
+        for mark, name in marks.items():
+            token = token.replace(mark, name)
+        while pos < len(tokens) and tokens[pos] == "(":
+            skip_annotation()
+        return [frozenset((token.strip(),))]
+
+    def skip_annotation():
+        nonlocal pos
+        depth = 0
+        while pos < len(tokens):
+            depth += {"(": 1, ")": -1}.get(tokens[pos], 0)
+            pos += 1
+            if depth == 0:
+                return
+
+    terms: List[frozenset] = []
+    while pos < len(tokens):
+        terms += disjunction() or []
+        if pos < len(tokens):
+            pos += 1  # ")" sin abrir
+    return list(dict.fromkeys(terms))
+
+
+# =========================================================
+# CATÁLOGO COMPACTO DE LA HOJA MALLA
+# =========================================================
+
+def _categorical(values: Iterable[Any]) -> Tuple[array, List[Any]]:
+    """Códigos enteros + tabla de valores distintos: cada valor repetido se guarda una sola vez."""
+    codes: Dict[Tuple[type, Any], int] = {}
+    table: List[Any] = []
+    out = []
+    for v in values:
+        k = (v.__class__, v)  # 1 y 1.0 (o "1") se mantienen distintos
+        code = codes.get(k)
+        if code is None:
+            code = codes[k] = len(table)
+            table.append(v)
+        out.append(code)
+    return array("H" if len(table) <= 0xFFFF else "I", out), table
+
+
+class MallaCourse:
+    """
+    Vista de solo lectura de un curso del catálogo (dos referencias, sin copiar datos).
+    Se lee igual que la fila de la vista previa: r["CR"], r.get("CICLO"), dict(r).
+    """
+
+    __slots__ = ("catalog", "pos")
+    FIELDS = ("CICLO", "CURSO", "MATERIA", "COD_CURSO", "CR", "REQUISITOS")
+
+    def __init__(self, catalog: "MallaCatalog", pos: int):
+        self.catalog = catalog
+        self.pos = pos
+
+    @property
+    def ciclo_num(self) -> int:
+        return self.catalog.ciclo_num[self.pos]
+
+    @property
+    def cr(self) -> float:
+        return self.catalog.cr[self.pos]
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "CR":
+            return self.catalog.cr[self.pos]
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return self.catalog.value(key, self.pos)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self.FIELDS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.FIELDS
+
+    def __repr__(self) -> str:
+        return f"MallaCourse({dict(self)!r})"
+
+
+class MallaCatalog:
+    """
+    Hoja MALLA en arreglos paralelos (una posición por curso), construida una sola vez:
+    - CR en float64 (vuelve tal cual lo leyó number_safe) y número de ciclo en int8.
+    - CARRERA, UNID_NEGOCIO, MALLA, MATERIA, CICLO, CURSO, COD_CURSO y REQUISITOS como
+      códigos sobre tablas de valores distintos (categóricos: cada string una sola vez).
+    - grupos:   (carrera, unidad, malla canónica) -> posiciones en el orden de la vista
+                previa (ciclo, ubicación).
+    - unidades: (carrera, malla canónica) -> unidades ordenadas.
+    - malla_real: malla canónica -> primer valor tal como está escrito en la hoja.
+    - mallas_por_carrera: carrera -> mallas canónicas que ofrece.
+    - curso_bit / requisito_pred: por código de CURSO, el bit de su nombre (0 si está
+      vacío); por código de REQUISITOS, el predicado (máscara "alguno de", máscaras
+      "todos de"), None si no pide nada. Cada celda se parsea una vez, no por solicitud.
+    Reemplaza al DataFrame de la hoja (columnas object) en todas las consultas.
+    """
+
+    TEXT_COLUMNS = ("CARRERA", "UNID_NEGOCIO", "MALLA", "MATERIA", "CICLO", "CURSO", "COD_CURSO", "REQUISITOS")
+
+    def __init__(self, df: pd.DataFrame):
+        self.codes: Dict[str, array] = {}
+        self.values: Dict[str, List[Any]] = {}
+        self.ciclo_num = array("b")
+        self.cr = array("d")
+        self.grupos: Dict[Tuple[str, str, str], array] = {}
+        self.unidades: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self.mallas: List[str] = []
+        self.malla_real: Dict[str, str] = {}
+        self.mallas_por_carrera: Dict[str, Tuple[str, ...]] = {}
+        self.curso_bit: List[int] = []
+        self.requisito_pred: List[Optional[Tuple[int, Tuple[int, ...]]]] = []
+        if not {"CARRERA", "UNID_NEGOCIO", "MALLA"}.issubset(df.columns):
+            return
+
+        n = len(df)
+        empty = [""] * n
+
+        def col(name: str) -> List[Any]:
+            return df[name].tolist() if name in df.columns else empty
+
+        carreras = [str(x).strip() for x in df["CARRERA"].tolist()]
+        unidades = [str(x).strip() for x in df["UNID_NEGOCIO"].tolist()]
+        mallas_raw = df["MALLA"].tolist()
+        mallas = [normalize_malla_value(x) for x in mallas_raw]
+        ciclos = col("CICLO")
+        ciclo_num = [extract_cycle_number(x) for x in ciclos]
+        ubicacion = [number_safe(x) for x in col("UBICACION_EN_EL_CICLO")]
+        cod_curso = [
+            a or b or c or d or ""
+            for a, b, c, d in zip(col("COD_CURSO"), col("COD_CURSO_"), col("COD_CURSO___"), col("CODIGO_OFICIAL"))
+        ]
+
+        self.ciclo_num = array("b" if max(ciclo_num, default=0) <= 127 else "h", ciclo_num)
+        self.cr = array("d", (number_safe(x) for x in col("CR")))
+        for name, values in (
+            ("CARRERA", carreras), ("UNID_NEGOCIO", unidades), ("MALLA", mallas),
+            ("MATERIA", col("MATERIA")), ("CICLO", ciclos), ("CURSO", col("CURSO")),
+            ("COD_CURSO", cod_curso), ("REQUISITOS", col("REQUISITOS")),
+        ):
+            self.codes[name], self.values[name] = _categorical(values)
+
+        por_unidad: Dict[Tuple[str, str], set] = {}
+        grupos: Dict[Tuple[str, str, str], List[int]] = {}
+        for pos in range(n):
+            carrera, unidad, malla = carreras[pos], unidades[pos], mallas[pos]
+            if unidad:
+                por_unidad.setdefault((carrera, malla), set()).add(unidad)
+            grupos.setdefault((carrera, unidad, malla), []).append(pos)
+
+        self.unidades = {k: tuple(sorted(v)) for k, v in por_unidad.items()}
+        # sort estable por (ciclo, ubicación), igual que sort_values con dos columnas
+        self.grupos = {
+            k: array("I", sorted(v, key=lambda p: (ciclo_num[p], ubicacion[p])))
+            for k, v in grupos.items()
+        }
+        self.mallas = [m for m in dict.fromkeys(str(x).strip() for x in mallas_raw) if m]
+        for m in self.mallas:
+            self.malla_real.setdefault(normalize_malla_value(m), m)
+        por_carrera: Dict[str, set] = {}
+        for carrera, _, malla in grupos:
+            if malla:
+                por_carrera.setdefault(carrera, set()).add(malla)
+        self.mallas_por_carrera = {k: tuple(sorted(v)) for k, v in por_carrera.items()}
+        self._compile_requisitos()
+
+    def _compile_requisitos(self) -> None:
+        """Nombre de curso -> bit; REQUISITOS -> predicado (misma gramática que calcular_matriculables)."""
+        bits: Dict[str, int] = {}
+
+        def bit(nombre: str) -> int:
+            return 1 << bits.setdefault(nombre, len(bits))
+
+        self.curso_bit = [
+            bit(nombre) if nombre else 0
+            for nombre in (str(v).strip().upper() for v in self.values["CURSO"])
+        ]
+        protected = protected_course_names(self.values["CURSO"])
+        self.requisito_pred = []
+        for v in self.values["REQUISITOS"]:
+            terms = parse_requirement(v, protected)
+            if not terms:
+                self.requisito_pred.append(None)
+                continue
+            any_mask, all_masks = 0, []
+            for term in terms:
+                mask = 0
+                for nombre in term:
+                    mask |= bit(nombre)
+                if len(term) == 1:
+                    any_mask |= mask
+                else:
+                    all_masks.append(mask)
+            self.requisito_pred.append((any_mask, tuple(all_masks)))
+
+    def puede_matricular(self, positions: List[int], elegidos: set) -> List[bool]:
+        """
+        Por índice de positions: no elegido y (sin requisitos, o algún curso suelto entre
+        los elegidos, o algún conjunto "A + B" completo). Operaciones de enteros por curso.
+        """
+        cursos, requisitos = self.codes["CURSO"], self.codes["REQUISITOS"]
+        ok = 0
+        for i in elegidos:
+            ok |= self.curso_bit[cursos[positions[i]]]
         out = []
-        for _, r in mdf.iterrows():
+        for i, pos in enumerate(positions):
+            pred = self.requisito_pred[requisitos[pos]]
             out.append(
-                {
-                    "CICLO": r.get("CICLO", ""),
-                    "CURSO": r.get("CURSO", ""),
-                    "MATERIA": r.get("MATERIA", ""),
-                    "COD_CURSO": r.get("COD_CURSO") or r.get("COD_CURSO_") or r.get("COD_CURSO___") or r.get("CODIGO_OFICIAL") or "",
-                    "CR": number_safe(r.get("CR", 0)),
-                    "REQUISITOS": r.get("REQUISITOS", ""),
-                }
+                i not in elegidos
+                and (pred is None or (pred[0] & ok) != 0 or any(m & ok == m for m in pred[1]))
             )
         return out
 
+    def value(self, column: str, pos: int) -> Any:
+        return self.values[column][self.codes[column][pos]]
+
+    def carreras(self) -> List[str]:
+        return sorted(v for v in self.values.get("CARRERA", ()) if v)
+
+    def cursos(self, key: Tuple[str, str, str]) -> List[MallaCourse]:
+        return [MallaCourse(self, pos) for pos in self.grupos.get(key, ())]
+
+    def memory_bytes(self) -> int:
+        """Bytes de los arreglos y tablas (un string compartido entre columnas se cuenta una vez)."""
+        total = self.ciclo_num.buffer_info()[1] * self.ciclo_num.itemsize + self.cr.buffer_info()[1] * self.cr.itemsize
+        seen = set()
+        for name, codes in self.codes.items():
+            total += codes.buffer_info()[1] * codes.itemsize + sys.getsizeof(self.values[name])
+            for v in self.values[name]:
+                if id(v) not in seen:
+                    seen.add(id(v))
+                    total += sys.getsizeof(v)
+        for key, positions in self.grupos.items():
+            total += sys.getsizeof(key) + positions.buffer_info()[1] * positions.itemsize
+        return total
+
+    @staticmethod
+    def make_key(carrera: str, unidad: str, malla: str) -> Tuple[str, str, str]:
+        return str(carrera).strip(), str(unidad).strip(), normalize_malla_value(malla)
+
+
+# =========================================================
+# ÍNDICE DE BÚSQUEDA DE INSTITUCIONES
+# =========================================================
+
+class InstitutionIndex:
+    """
+    Hoja Maestro_Centro_Estudios indexada una sola vez para la búsqueda al tipear:
+    - names: nombres normalizados (sin tildes, en mayúsculas) ordenados; la posición es
+      el orden alfabético. Un prefijo es un rango [lo, hi) por bisect, el mismo subárbol
+      que daría un trie sin pagar un nodo por carácter.
+    - postings: n-grama (1 a 3 caracteres) -> posiciones en orden alfabético. Una
+      subcadena recorre la lista de su n-grama más raro y solo verifica esos nombres.
+    - by_name: nombre normalizado -> posición, para la resolución exacta en O(1).
+    Ranking: primero los nombres que empiezan con la consulta y luego los que la
+    contienen, alfabético dentro de cada grupo; se corta al llegar al límite.
+    """
+
+    GRAM = 3
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+
+        def col(name: str) -> List[Any]:
+            return df[name].tolist() if name in df.columns else [""] * n
+
+        items = []
+        for a, b, c, tipo, codigo in zip(
+            col("NOMBRE"), col("INSTITUCION_S"), col("INSTITUCION_C"), col("INSTITUCION_TIPO"), col("COD_INSTITUCION")
+        ):
+            nombre = str(a or b or c or "").strip()
+            if nombre:
+                items.append((normalize_text_search(nombre), nombre.lower(), {
+                    "nombre": nombre, "tipo": str(tipo).strip().upper(), "codigo": str(codigo).strip(),
+                }))
+        items.sort(key=lambda x: (x[0], x[1]))
+        self.names: List[str] = [x[0] for x in items]
+        self.entries: List[Dict[str, str]] = [x[2] for x in items]
+
+        postings: Dict[str, List[int]] = {}
+        for pos, name in enumerate(self.names):
+            grams = {name[i:i + size] for size in range(1, self.GRAM + 1) for i in range(len(name) - size + 1)}
+            for gram in grams:
+                postings.setdefault(gram, []).append(pos)
+        self.postings: Dict[str, array] = {g: array("I", ids) for g, ids in postings.items()}
+        # Resolución exacta por nombre normalizado (la primera en orden alfabético si se repite).
+        self.by_name: Dict[str, int] = {}
+        for pos, name in enumerate(self.names):
+            self.by_name.setdefault(name, pos)
+
+    def get(self, nombre: str) -> Optional[Dict[str, str]]:
+        pos = self.by_name.get(normalize_text_search(nombre))
+        return dict(self.entries[pos]) if pos is not None else None
+
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, str]]:
+        q = normalize_text_search(query)
+        if not q:
+            return [dict(e) for e in self.entries[:limit]]
+
+        lo = bisect.bisect_left(self.names, q)
+        hi = bisect.bisect_left(self.names, q + "\uffff", lo)
+        found = list(range(lo, min(hi, lo + limit)))
+
+        if len(found) < limit:
+            if len(q) <= self.GRAM:
+                candidates, exact = self.postings.get(q, ()), True  # la lista del n-grama es la respuesta
+            else:
+                grams = (q[i:i + self.GRAM] for i in range(len(q) - self.GRAM + 1))
+                candidates, exact = min((self.postings.get(g, ()) for g in grams), key=len), False
+            names = self.names
+            for pos in candidates:
+                if lo <= pos < hi:
+                    continue
+                if exact or q in names[pos]:
+                    found.append(pos)
+                    if len(found) == limit:
+                        break
+        return [dict(self.entries[pos]) for pos in found]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
 
 # =========================================================
 # REGLA DE MALLA EDITABLE
@@ -318,7 +953,86 @@ class MallaRuleConfig:
 # ALGORITMO ACADÉMICO
 # =========================================================
 
-def subset_best_between(items: List[Dict[str, Any]], min_needed: float, max_allowed: float) -> Dict[str, Any]:
+def _items_acotados(items: List[Dict[str, Any]], max_allowed: int):
+    validos = [it for it in items if 0 < int(it["cr"]) <= max_allowed]
+    if not validos:
+        return [], 0
+    # Ninguna suma supera el total real; por encima de MAX_CREDITOS_DP se rechaza.
+    limite = min(max_allowed, sum(int(it["cr"]) for it in validos))
+    if limite > MAX_CREDITOS_DP:
+        raise ValueError(f"Créditos fuera de rango para el cálculo ({limite} > {MAX_CREDITOS_DP}).")
+    return validos, limite
+
+
+def subset_best_between_bitset(items: List[Dict[str, Any]], min_needed: float, max_allowed: float) -> Dict[str, Any]:
+    """Subset-sum con bitset (int) y punteros al padre; misma combinación que el DP por dict."""
+    max_allowed = int(max_allowed)
+    if not items or max_allowed <= 0:
+        return {"indexes": [], "sum": 0}
+    validos, limite = _items_acotados(items, max_allowed)
+    if not validos:
+        return {"indexes": [], "sum": 0}
+
+    mascara = (1 << (limite + 1)) - 1
+    alcanzables = 1
+    padre = array("i", [-1]) * (limite + 1)
+    for k, item in enumerate(validos):
+        nuevos = (alcanzables << int(item["cr"])) & mascara & ~alcanzables
+        alcanzables |= nuevos
+        while nuevos:
+            bajo = nuevos & -nuevos
+            padre[bajo.bit_length() - 1] = k
+            nuevos ^= bajo
+
+    floor_needed = max(0, int(min_needed))
+    desde_piso = (alcanzables >> floor_needed) << floor_needed
+    best = (desde_piso & -desde_piso).bit_length() - 1 if desde_piso else alcanzables.bit_length() - 1
+
+    indexes: List[int] = []
+    s = best
+    while s > 0:
+        item = validos[padre[s]]
+        indexes.append(item["index"])
+        s -= int(item["cr"])
+    indexes.reverse()
+    return {"indexes": indexes, "sum": best}
+
+
+def subset_best_between_numpy(items: List[Dict[str, Any]], min_needed: float, max_allowed: float) -> Dict[str, Any]:
+    """Tabla booleana (n+1) x (limite+1) con OR desplazado por fila y backtracking."""
+    max_allowed = int(max_allowed)
+    if not items or max_allowed <= 0:
+        return {"indexes": [], "sum": 0}
+    validos, limite = _items_acotados(items, max_allowed)
+    if not validos:
+        return {"indexes": [], "sum": 0}
+
+    tabla = np.zeros((len(validos) + 1, limite + 1), dtype=bool)
+    tabla[0, 0] = True
+    for i, item in enumerate(validos, start=1):
+        cr = int(item["cr"])
+        tabla[i] = tabla[i - 1]
+        tabla[i, cr:] |= tabla[i - 1, : limite + 1 - cr]
+
+    floor_needed = max(0, int(min_needed))
+    final = tabla[-1]
+    desde_piso = np.flatnonzero(final[floor_needed:]) if floor_needed <= limite else np.empty(0, dtype=int)
+    best = int(floor_needed + desde_piso[0]) if desde_piso.size else int(np.flatnonzero(final)[-1])
+
+    indexes: List[int] = []
+    s = best
+    for i in range(len(validos), 0, -1):
+        if s == 0:
+            break
+        if not tabla[i - 1, s]:
+            indexes.append(validos[i - 1]["index"])
+            s -= int(validos[i - 1]["cr"])
+    indexes.reverse()
+    return {"indexes": indexes, "sum": best}
+
+
+def subset_best_between_dict(items: List[Dict[str, Any]], min_needed: float, max_allowed: float) -> Dict[str, Any]:
+    """DP original (suma -> lista de índices), conservado para comparar motores."""
     if not items or max_allowed <= 0:
         return {"indexes": [], "sum": 0}
 
@@ -340,7 +1054,23 @@ def subset_best_between(items: List[Dict[str, Any]], min_needed: float, max_allo
     return {"indexes": dp.get(best, []), "sum": best}
 
 
-def seleccionar_convalidacion(rows: List[Dict[str, Any]], crd: float, tolerancia: int) -> Dict[str, Any]:
+SELECTION_ENGINES = {
+    "bitset": subset_best_between_bitset,
+    "numpy": subset_best_between_numpy,
+    "dict": subset_best_between_dict,
+}
+
+
+def subset_best_between(items: List[Dict[str, Any]], min_needed: float, max_allowed: float,
+                        motor: Optional[str] = None) -> Dict[str, Any]:
+    clave = str(motor or MOTOR_SELECCION).strip().lower()
+    if clave not in SELECTION_ENGINES:
+        raise ValueError(f"Motor de selección desconocido: {clave}.")
+    return SELECTION_ENGINES[clave](items, min_needed, max_allowed)
+
+
+def seleccionar_convalidacion(rows: List[Dict[str, Any]], crd: float, tolerancia: int,
+                              motor: Optional[str] = None) -> Dict[str, Any]:
     if not rows:
         return {"seleccion": [], "suma": 0}
 
@@ -372,7 +1102,7 @@ def seleccionar_convalidacion(rows: List[Dict[str, Any]], crd: float, tolerancia
         df_ciclo.sort(key=lambda x: x["CR_NUM"], reverse=True)
 
         items = [{"index": r["__index"], "cr": r["CR_NUM"]} for r in df_ciclo]
-        best = subset_best_between(items, min_restante, max_restante)
+        best = subset_best_between(items, min_restante, max_restante, motor)
         if best["sum"] > 0:
             seleccion_total.extend(best["indexes"])
             suma_total += best["sum"]
@@ -383,18 +1113,16 @@ def seleccionar_convalidacion(rows: List[Dict[str, Any]], crd: float, tolerancia
 
 def calcular_matriculables(resultado_rows: List[Dict[str, Any]], convalidados_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     cursos_ok = {str(r.get("CURSO", "")).strip().upper() for r in convalidados_rows if str(r.get("CURSO", "")).strip()}
+    protected = protected_course_names(r.get("CURSO", "") for r in resultado_rows)
     out = []
     for r in resultado_rows:
         estado = str(r.get("ESTADO_CONVALIDACION", ""))
-        req = str(r.get("REQUISITOS", "")).strip()
         puede = False
         if estado == "CONVALIDADO":
             puede = False
-        elif not req or req.lower() == "nan":
-            puede = True
         else:
-            partes = [x.strip().upper() for x in re.split(r"[;,/]", req) if x.strip()]
-            puede = len(partes) == 0 or any(p in cursos_ok for p in partes)
+            terms = parse_requirement(r.get("REQUISITOS", ""), protected)
+            puede = not terms or any(t <= cursos_ok for t in terms)
         if puede:
             row = dict(r)
             row["PUEDE_MATRICULAR"] = True
@@ -402,6 +1130,243 @@ def calcular_matriculables(resultado_rows: List[Dict[str, Any]], convalidados_ro
     return out
 
 
+# =========================================================
+# CACHÉ DE SELECCIÓN
+# =========================================================
+
+def file_signature(path: str | Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class SelectionCache:
+    """LRU acotado por (carrera, unidad, malla, CRD, tolerancia); se vacía si cambia dataset.xlsx."""
+
+    def __init__(self, dataset_path: str | Path, maxsize: int = 512):
+        self.dataset_path = Path(dataset_path)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._signature = file_signature(self.dataset_path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(carrera: str, unidad: str, malla: str, crd: float, tolerancia: int) -> Tuple[Any, ...]:
+        return (
+            str(carrera or "").strip(),
+            str(unidad or "").strip(),
+            normalize_malla_value(malla),
+            int(number_safe(crd)),
+            int(tolerancia),
+        )
+
+    def get_or_compute(self, key: Tuple[Any, ...], compute) -> Dict[str, Any]:
+        with self._lock:
+            signature = file_signature(self.dataset_path)
+            if signature != self._signature:
+                self._data.clear()
+                self._signature = signature
+                self.invalidations += 1
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                cached = self._data[key]
+                return {"seleccion": list(cached["seleccion"]), "suma": cached["suma"]}
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self._data[key] = {"seleccion": tuple(result["seleccion"]), "suma": result["suma"]}
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return {"seleccion": list(result["seleccion"]), "suma": result["suma"]}
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._data),
+            "invalidations": self.invalidations,
+            "hitRatio": (self.hits / total) if total else 0.0,
+        }
+
+
+def file_sha1(path: str | Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CrdAnswerTable:
+    """
+    Selección precalculada para cada CRD posible (0 .. total del slice) por
+    (carrera, unidad, malla). Cada CRD guarda el id de una selección distinta.
+    Se persiste en dataset.xlsx.tabla_crd.json y se reconstruye solo si cambia el hash del Excel.
+    """
+
+    VERSION = 1
+
+    def __init__(self, dataset_path: str | Path, tolerancia: int = TOLERANCIA_CRD):
+        self.dataset_path = Path(dataset_path)
+        self.table_path = Path(f"{self.dataset_path}.tabla_crd.json")
+        self.tolerancia = int(tolerancia)
+        self.hits = 0
+        self.misses = 0
+        self._slices: Dict[Tuple[str, str, str], Tuple[int, List[int], array, List[Tuple[int, ...]]]] = {}
+
+    @staticmethod
+    def make_key(carrera: str, unidad: str, malla: str) -> Tuple[str, str, str]:
+        return str(carrera or "").strip(), str(unidad or "").strip(), normalize_malla_value(malla)
+
+    def load(self, signature: str) -> bool:
+        try:
+            data = json.loads(self.table_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != self.VERSION or data.get("firma") != signature or data.get("tolerancia") != self.tolerancia:
+            return False
+        self._slices = {
+            tuple(s["clave"]): (s["n"], s["crs"], array("H", s["indice"]), [tuple(x) for x in s["selecciones"]])
+            for s in data.get("slices", [])
+        }
+        return True
+
+    def build(self, repo: "DatasetRepository"):
+        table = {}
+        for key in repo.malla_catalog().grupos:
+            rows = repo.get_malla_cursos(*key)
+            crs = [int(number_safe(r.get("CR", 0))) for r in rows]
+            total = sum(cr for cr, r in zip(crs, rows) if cr > 0 and extract_cycle_number(r.get("CICLO", "")) > 0)
+            ids: Dict[Tuple[int, ...], int] = {}
+            selecciones: List[Tuple[int, ...]] = []
+            indice = array("H")
+            for crd in range(total + 1):
+                sel = tuple(seleccionar_convalidacion(rows, crd, self.tolerancia)["seleccion"])
+                if sel not in ids:
+                    ids[sel] = len(selecciones)
+                    selecciones.append(sel)
+                indice.append(ids[sel])
+            table[key] = (len(rows), crs, indice, selecciones)
+        self._slices = table
+
+    def save(self, signature: str):
+        data = {
+            "version": self.VERSION,
+            "firma": signature,
+            "tolerancia": self.tolerancia,
+            "slices": [
+                {"clave": list(k), "n": n, "crs": crs, "indice": indice.tolist(), "selecciones": [list(x) for x in sel]}
+                for k, (n, crs, indice, sel) in self._slices.items()
+            ],
+        }
+        tmp = self.table_path.with_name(self.table_path.name + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.table_path)
+
+    def prepare(self, repo: "DatasetRepository") -> bool:
+        """Carga del disco o reconstruye; True si se reconstruyó."""
+        signature = file_sha1(self.dataset_path)
+        if self.load(signature):
+            return False
+        self.build(repo)
+        try:
+            self.save(signature)
+        except OSError:
+            pass
+        return True
+
+    def lookup(self, key: Tuple[str, str, str], crd: float, n_rows: int, tolerancia: int = TOLERANCIA_CRD) -> Optional[Dict[str, Any]]:
+        entry = self._slices.get(key)
+        if entry is None or entry[0] != n_rows or int(tolerancia) != self.tolerancia:
+            self.misses += 1
+            return None
+        _, crs, indice, selecciones = entry
+        self.hits += 1
+        crd_int = int(number_safe(crd))
+        if crd_int <= 0:
+            return {"seleccion": [], "suma": 0}
+        # Desde el total del slice en adelante la respuesta es siempre la misma.
+        sel = selecciones[indice[min(crd_int, len(indice) - 1)]]
+        return {"seleccion": list(sel), "suma": sum(crs[i] for i in sel)}
+
+
+# =========================================================
+# RECARGA EN CALIENTE DEL DATASET
+# =========================================================
+
+class DatasetWatcher:
+    """
+    Sondea la firma de dataset.xlsx en un hilo daemon. Cuando cambia y se mantiene igual
+    en el sondeo siguiente (Excel terminó de guardar), arma en ese hilo un DatasetRepository
+    nuevo con las hojas de arranque y sus índices (MALLA, instituciones), y lo entrega a
+    on_swap(repo).
+    El repositorio anterior sigue atendiendo mientras tanto; si la construcción falla
+    (archivo a medio copiar, hoja faltante) se avisa con on_error(ex) y no se cambia nada.
+    """
+
+    def __init__(self, repo: DatasetRepository, on_swap, on_error=None, interval: float = RELOAD_INTERVAL):
+        self.excel_path = repo.excel_path
+        self.on_swap = on_swap
+        self.on_error = on_error
+        self.interval = interval
+        self.reloads = 0
+        self._signature = repo.signature
+        self._pending: Optional[Tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def build(self) -> DatasetRepository:
+        repo = DatasetRepository(self.excel_path)
+        repo.load_sheets(STARTUP_SHEETS, parallel=PARALLEL_RELOAD)
+        repo.malla_catalog()
+        repo.institution_index()
+        repo.responsables_index()
+        repo.version
+        return repo
+
+    def check(self) -> bool:
+        """Una pasada de sondeo. True si se entregó un repositorio nuevo."""
+        signature = file_signature(self.excel_path)
+        if signature == self._signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature
+            return False
+
+        self._signature = signature
+        self._pending = None
+        try:
+            repo = self.build()
+        except Exception as ex:
+            if self.on_error:
+                self.on_error(ex)
+            return False
+        self.reloads += 1
+        self.on_swap(repo)
+        return True
+
+
 # =========================================================
 # EXPORTADOR PDF Y ARCHIVOS
 # =========================================================
@@ -558,6 +1523,7 @@ class ExportService:
             "cargoResponsableAcademico": datos["respCargo"],
             "correoResponsableAcademico": datos["respCorreo"],
             "grupoResponsableAcademico": datos["respGrupo"],
+            "versionDataset": datos["versionDataset"],
             "convalidados": convalidados,
             "matriculables": matriculables,
         }
@@ -576,7 +1542,7 @@ def ensure_log_book(log_path: Path):
         "TIPO_CASO", "TIPO_PAQUETE", "CRD", "INSTITUCION_PROCEDENCIA",
         "TIPO_INSTITUCION_PROCEDENCIA", "CARRERA_PROCEDENCIA", "RESPONSABLE_ACADEMICO",
         "CARGO_RESPONSABLE_ACADEMICO", "CREDITOS_CONVALIDADOS", "DOCENTE_CONVALIDA",
-        "PDF_CONVALIDACION", "PDF_PROYECCION", "JSON_RESUMEN"
+        "PDF_CONVALIDACION", "PDF_PROYECCION", "JSON_RESUMEN", "VERSION_DATASET"
     ]
     if not log_path.exists():
         pd.DataFrame(columns=columns).to_excel(log_path, index=False)
@@ -589,31 +1555,66 @@ def append_log(log_path: Path, row: Dict[str, Any]):
     df.to_excel(log_path, index=False)
 
 
+def record_load_times(timings: Dict[str, float], app: str = "V_Pro"):
+    """Agrega (fecha, app, etapa, segundos) a OUTPUT_DIR/tiempos_carga.csv; nunca interrumpe la app."""
+    path = Path(OUTPUT_DIR) / "tiempos_carga.csv"
+    fecha = datetime.now().isoformat(timespec="seconds")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        nuevo = not path.exists()
+        with path.open("a", encoding="utf-8", newline="") as f:
+            if nuevo:
+                f.write("fecha,app,etapa,segundos\n")
+            for etapa, segundos in timings.items():
+                f.write(f"{fecha},{app},{etapa},{segundos:.4f}\n")
+    except OSError:
+        pass
+
+
 # =========================================================
 # PROCESAMIENTO PRINCIPAL
 # =========================================================
 
 class ConvalidacionService:
     def __init__(self, repo: DatasetRepository, exporter: ExportService, rules: MallaRuleConfig):
-        self.repo = repo
         self.exporter = exporter
         self.rules = rules
         self.log_path = Path(OUTPUT_DIR) / "LOG_APP.xlsx"
+        # (repo, caché LRU, tabla CRD) del dataset vigente: una recarga en caliente lo
+        # reemplaza con una sola asignación y cada solicitud lo toma una vez al empezar.
+        self._active = (repo, SelectionCache(repo.excel_path), CrdAnswerTable(repo.excel_path))
+
+    @property
+    def repo(self) -> DatasetRepository:
+        return self._active[0]
 
-    def get_malla_automatica(self, sede: str, crd: float) -> Dict[str, str]:
+    @property
+    def selection_cache(self) -> SelectionCache:
+        return self._active[1]
+
+    @property
+    def crd_table(self) -> CrdAnswerTable:
+        return self._active[2]
+
+    def use_repo(self, repo: DatasetRepository, crd_table: Optional[CrdAnswerTable] = None):
+        """Publica un dataset nuevo; las solicitudes en curso terminan con el anterior."""
+        self._active = (repo, SelectionCache(repo.excel_path), crd_table or CrdAnswerTable(repo.excel_path))
+
+    def get_malla_automatica(self, sede: str, crd: float, repo: Optional[DatasetRepository] = None) -> Dict[str, str]:
         if not str(sede).strip():
             return {"mallaCanonica": "", "mallaReal": "", "regla": "Primero selecciona la sede."}
         regla = self.rules.build_rule_text(sede)
         if number_safe(crd) <= 0:
             return {"mallaCanonica": "", "mallaReal": "", "regla": regla}
         canonica = self.rules.get_malla_canonica(sede, crd)
-        real = self.repo.resolver_malla_existente(canonica)
+        real = (repo or self.repo).resolver_malla_existente(canonica)
         return {"mallaCanonica": canonica, "mallaReal": real, "regla": regla}
 
-    def validar_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        malla_info = self.get_malla_automatica(payload.get("sede", ""), payload.get("crd", 0))
-        centro = self.repo.get_centro_by_nombre(payload.get("institucionProcedencia", ""))
-        responsable = self.repo.get_responsable_by_nombre(payload.get("respNombre", ""))
+    def validar_payload(self, payload: Dict[str, Any], repo: Optional[DatasetRepository] = None) -> Dict[str, Any]:
+        repo = repo or self.repo
+        malla_info = self.get_malla_automatica(payload.get("sede", ""), payload.get("crd", 0), repo)
+        centro = repo.get_centro_by_nombre(payload.get("institucionProcedencia", ""))
+        responsable = repo.get_responsable_by_nombre(payload.get("respNombre", ""))
 
         data = {
             "nombres": str(payload.get("nombres", "")).strip(),
@@ -637,6 +1638,7 @@ class ConvalidacionService:
             "respCargo": str((responsable or {}).get("cargo") or payload.get("respCargo", "")).strip(),
             "respCorreo": str((responsable or {}).get("correo") or "").strip(),
             "respGrupo": str((responsable or {}).get("grupo") or "").strip(),
+            "versionDataset": repo.version,
         }
 
         if not data["nombres"]:
@@ -655,6 +1657,11 @@ class ConvalidacionService:
             raise ValueError("Selecciona la carrera.")
         if not data["unidad"]:
             raise ValueError("Selecciona la unidad.")
+        # Solo si el catálogo conoce la carrera: sin columnas CARRERA/UNID_NEGOCIO/MALLA en la
+        # hoja (o sin filas de la carrera) no hay con qué comparar y se deja pasar como antes
+        mallas_carrera = repo.get_mallas_by_carrera(data["carrera"])
+        if mallas_carrera and normalize_malla_value(data["malla"]) not in mallas_carrera:
+            raise ValueError(f"La carrera {data['carrera']} no tiene la malla {data['malla']} en el dataset.")
         if not data["institucionProcedencia"]:
             raise ValueError("Selecciona la institución de procedencia.")
         if not data["tipoInstitucionProcedencia"]:
@@ -676,21 +1683,33 @@ class ConvalidacionService:
         return data
 
     def generar_documentos(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        datos = self.validar_payload(payload)
+        repo, selection_cache, crd_table = self._active
+        datos = self.validar_payload(payload, repo)
         folder = self.exporter.create_run_folder(datos["codigo"], datos["alumno"])
 
-        malla_rows = self.repo.get_malla_preview(datos["carrera"], datos["unidad"], datos["malla"])
+        malla_rows = repo.get_malla_cursos(datos["carrera"], datos["unidad"], datos["malla"])
         if not malla_rows:
             raise ValueError("No se encontró malla para los filtros seleccionados.")
 
-        seleccion = seleccionar_convalidacion(malla_rows, datos["crd"], TOLERANCIA_CRD)
-        convalidados = [r for i, r in enumerate(malla_rows) if i in seleccion["seleccion"]]
-        resultado = []
-        for i, r in enumerate(malla_rows):
-            row = dict(r)
-            row["ESTADO_CONVALIDACION"] = "CONVALIDADO" if i in seleccion["seleccion"] else "NO CONVALIDADO"
-            resultado.append(row)
-        matriculables = calcular_matriculables(resultado, convalidados)
+        seleccion = crd_table.lookup(
+            CrdAnswerTable.make_key(datos["carrera"], datos["unidad"], datos["malla"]), datos["crd"], len(malla_rows)
+        )
+        if seleccion is None:
+            cache_key = SelectionCache.make_key(datos["carrera"], datos["unidad"], datos["malla"], datos["crd"], TOLERANCIA_CRD)
+            seleccion = selection_cache.get_or_compute(
+                cache_key, lambda: seleccionar_convalidacion(malla_rows, datos["crd"], TOLERANCIA_CRD)
+            )
+        elegidos = set(seleccion["seleccion"])
+        convalidados = [dict(r) for i, r in enumerate(malla_rows) if i in elegidos]
+        # REQUISITOS ya compilados en el catálogo: sin re.split por solicitud
+        puede = repo.malla_catalog().puede_matricular([r.pos for r in malla_rows], elegidos)
+        matriculables = []
+        for r, ok in zip(malla_rows, puede):
+            if ok:
+                row = dict(r)
+                row["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+                row["PUEDE_MATRICULAR"] = True
+                matriculables.append(row)
         total_convalidados = sum(number_safe(r.get("CR", 0)) for r in convalidados)
 
         pdf_conva = folder / f"Resultado_Convalidacion_{sanitize_filename(datos['codigo'])}.pdf"
@@ -727,6 +1746,7 @@ class ConvalidacionService:
             "PDF_CONVALIDACION": str(pdf_conva),
             "PDF_PROYECCION": str(pdf_proy),
             "JSON_RESUMEN": str(json_path),
+            "VERSION_DATASET": datos["versionDataset"],
         })
 
         return {
@@ -738,11 +1758,12 @@ class ConvalidacionService:
                 "maximoPermitido": int(datos["crd"] + TOLERANCIA_CRD),
                 "totalCursosConvalidados": len(convalidados),
                 "totalCursosMatriculables": len(matriculables),
+                "versionDataset": datos["versionDataset"],
             },
             "tablas": {
                 "convalidados": convalidados,
                 "matriculables": matriculables,
-                "malla": malla_rows,
+                "malla": [dict(r) for r in malla_rows],
             },
             "archivos": {
                 "carpeta": str(folder.resolve()),
@@ -754,6 +1775,74 @@ class ConvalidacionService:
         }
 
 
+# =========================================================
+# ENTRADA ASÍNCRONA DE LA UI
+# =========================================================
+
+class DebouncedInput:
+    """
+    Canal asíncrono para un campo que consulta al tipear. Cada evento toma una foto de
+    los valores (snapshot, en el loop), cancela la consulta pendiente y la reprograma tras
+    `delay` sin teclas nuevas. compute(*foto) corre en un hilo (asyncio.to_thread) y solo
+    el resultado de la última tecla llega a render(), seguido de un único page.update().
+    latencies guarda los segundos tecla -> render de cada resultado publicado.
+    """
+
+    def __init__(self, page, snapshot, compute, render, on_error=None, delay: float = INPUT_DEBOUNCE):
+        self.page = page
+        self.snapshot = snapshot
+        self.compute = compute
+        self.render = render
+        self.on_error = on_error
+        self.delay = delay
+        self.latencies: deque = deque(maxlen=500)
+        self.stats = {"events": 0, "cancelled": 0, "stale": 0, "renders": 0}
+        self._seq = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def on_event(self, e=None):
+        """Handler on_change/on_select de Flet (corre en el loop de la UI)."""
+        t0 = time.perf_counter()
+        self._seq += 1
+        self.stats["events"] += 1
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            self.stats["cancelled"] += 1
+        self._task = asyncio.ensure_future(self._run(self._seq, self.snapshot(), t0))
+
+    async def _run(self, seq: int, args: Tuple[Any, ...], t0: float):
+        await asyncio.sleep(self.delay)
+        try:
+            result = await asyncio.to_thread(self.compute, *args)
+        except Exception as ex:
+            if self.on_error and seq == self._seq:
+                self.on_error(ex)
+                self.page.update()
+            return
+        if seq != self._seq:
+            self.stats["stale"] += 1  # llegó una tecla más nueva mientras se calculaba
+            return
+        self.render(result)
+        self.page.update()
+        self.latencies.append(time.perf_counter() - t0)
+        self.stats["renders"] += 1
+
+    async def drain(self):
+        """Espera la consulta pendiente (pruebas y benchmarks)."""
+        while self._task is not None and not self._task.done():
+            await asyncio.wait([self._task])
+
+    def latency_summary(self) -> Dict[str, float]:
+        valores = sorted(self.latencies)
+        if not valores:
+            return dict(self.stats)
+
+        def ms(p: float) -> float:
+            return valores[min(len(valores) - 1, round(p * (len(valores) - 1)))] * 1000
+
+        return {"p50_ms": ms(0.5), "p95_ms": ms(0.95), "max_ms": valores[-1] * 1000, **self.stats}
+
+
 # =========================================================
 # UI FLET
 # =========================================================
@@ -767,6 +1856,7 @@ def main(page: ft.Page):
     page.bgcolor = "#F5F7FB"
     page.padding = 18
 
+    t_inicio = time.perf_counter()
     try:
         repo = DatasetRepository(DATASET_FILE)
     except Exception as e:
@@ -789,20 +1879,21 @@ def main(page: ft.Page):
     rules = MallaRuleConfig()
     service = ConvalidacionService(repo, exporter, rules)
 
-    paquetes = repo.get_paquetes()
-    sedes = repo.get_sedes()
-    carreras = repo.get_carreras()
-    responsables = repo.get_responsables()
+    # Las hojas se cargan en segundo plano (ver cargar_en_segundo_plano): cada
+    # control se habilita cuando su hoja está lista.
+    listo = {sheet: False for sheet in STARTUP_SHEETS}
 
     # Campos
     nombres = ft.TextField(label="Nombres", expand=True)
     apellidos = ft.TextField(label="Apellidos", expand=True)
     codigo = ft.TextField(label="Código del estudiante", width=220)
 
-    sede = ft.Dropdown(label="Sede", width=220, options=[ft.dropdown.Option(x) for x in sedes])
-    crd = ft.TextField(label="CRD", width=180, keyboard_type=ft.KeyboardType.NUMBER)
+    sede = ft.Dropdown(label="Sede", width=220, options=[], disabled=True)
+    # CRD resuelve la malla real contra la hoja MALLA: se habilita junto con ella.
+    crd = ft.TextField(label="CRD", width=180, keyboard_type=ft.KeyboardType.NUMBER, disabled=True)
     malla = ft.TextField(label="Malla", width=180, read_only=False)
-    carrera = ft.Dropdown(label="Carrera", width=340, options=[ft.dropdown.Option(x) for x in carreras])
+    malla_foco = {"activo": False}
+    carrera = ft.Dropdown(label="Carrera", width=340, options=[], disabled=True)
     unidad = ft.Dropdown(label="Unidad", width=260, options=[])
 
     tipo_caso = ft.Dropdown(
@@ -810,9 +1901,9 @@ def main(page: ft.Page):
         width=180,
         options=[ft.dropdown.Option("PAQUETE"), ft.dropdown.Option("REGULAR")],
     )
-    tipo_paquete = ft.Dropdown(label="Tipo de paquete", width=220, visible=False, options=[ft.dropdown.Option(x) for x in paquetes])
+    tipo_paquete = ft.Dropdown(label="Tipo de paquete", width=220, visible=False, options=[])
 
-    institucion_buscar = ft.TextField(label="Institución de procedencia", expand=True)
+    institucion_buscar = ft.TextField(label="Institución de procedencia", expand=True, disabled=True)
     institucion_resultados = ft.ListView(height=140, visible=False, spacing=2)
     tipo_institucion = ft.TextField(label="Procedencia", width=240, read_only=True)
     carrera_procedencia = ft.TextField(label="Nombre de Carrera", expand=True)
@@ -820,7 +1911,7 @@ def main(page: ft.Page):
     elaborado_nombre = ft.TextField(label="Nombre Elaborado por", width=320, value="Ing. Jesus Apolaya")
     elaborado_cargo = ft.TextField(label="Cargo", width=240, value="DESARROLLADOR")
 
-    resp_nombre = ft.Dropdown(label="Nombre Resp. Acad.", width=340, options=[ft.dropdown.Option(x["nombre"]) for x in responsables])
+    resp_nombre = ft.Dropdown(label="Nombre Resp. Acad.", width=340, options=[], disabled=True)
     resp_cargo = ft.TextField(label="Cargo", width=300, read_only=True)
 
     # Regla editable
@@ -838,6 +1929,9 @@ def main(page: ft.Page):
 
     # Mensajes y KPIs
     msg = ft.Text(color="#1D4ED8")
+    carga_text = ft.Text("Cargando dataset...", size=12, color="#6B7280")
+    carga_bar = ft.ProgressBar(value=0)
+    version_text = ft.Text("Dataset: cargando...", size=12, color="#FFFFFF")
     kpi_crd = ft.Text("0", size=22, weight=ft.FontWeight.BOLD)
     kpi_conva = ft.Text("0", size=22, weight=ft.FontWeight.BOLD)
     kpi_cursos_conva = ft.Text("0", size=22, weight=ft.FontWeight.BOLD)
@@ -908,24 +2002,50 @@ def main(page: ft.Page):
             weight=ft.FontWeight.BOLD,
         )
 
-    def refresh_malla_automatica(e=None):
+    # Cada consulta al tipear se parte en consultar_* (sin tocar controles: corre en un hilo
+    # desde DebouncedInput) y mostrar_* (aplica el resultado en el loop de la UI).
+    def consultar_unidades(carrera_v: str, malla_v: str, unidad_v: Optional[str]):
+        unidades = service.repo.get_unidades_by_carrera_and_malla(carrera_v, malla_v)
+        if unidad_v not in unidades:
+            unidad_v = None
+        return unidades, unidad_v, service.repo.get_malla_cursos(carrera_v, unidad_v or "", malla_v)
+
+    def mostrar_unidades(res):
+        unidades, unidad_v, cursos = res
+        unidad.options = [ft.dropdown.Option(x) for x in unidades]
+        unidad.value = unidad_v
+        mostrar_malla_preview(cursos)
+
+    def consultar_malla_automatica(sede_v, crd_v, malla_v: Optional[str], carrera_v: str, unidad_v: Optional[str]):
+        info = service.get_malla_automatica(sede_v, crd_v)
+        if malla_v is None:  # el campo malla no tiene el foco: manda la regla
+            malla_v = info["mallaReal"]
+        unidades = consultar_unidades(carrera_v, malla_v or "", unidad_v) if listo[SHEET_MALLA] else None
+        return info, malla_v, unidades
+
+    def mostrar_malla_automatica(res):
+        info, malla_v, unidades = res
+        if not malla_foco["activo"]:
+            malla.value = malla_v
+        regla_texto.content = ft.Text(info.get("regla", "Primero selecciona la sede."), color="#166534", weight=ft.FontWeight.BOLD)
+        if unidades is not None:
+            mostrar_unidades(unidades)
+
+    def foto_malla_automatica():
         update_rules_from_inputs()
-        info = service.get_malla_automatica(sede.value, crd.value)
-        if not malla.focused:
-            malla.value = info["mallaReal"]
-        refresh_regla()
-        refresh_unidades()
-        page.update()
+        return sede.value, crd.value, malla.value if malla_foco["activo"] else None, carrera.value or "", unidad.value
 
     def refresh_unidades(e=None):
-        unidades = repo.get_unidades_by_carrera_and_malla(carrera.value or "", malla.value or "")
-        unidad.options = [ft.dropdown.Option(x) for x in unidades]
-        if unidad.value not in unidades:
-            unidad.value = None
-        load_malla_preview()
+        if not listo[SHEET_MALLA]:
+            return
+        mostrar_unidades(consultar_unidades(carrera.value or "", malla.value or "", unidad.value))
+        page.update()
 
     def load_malla_preview(e=None):
-        rows = repo.get_malla_preview(carrera.value or "", unidad.value or "", malla.value or "")
+        mostrar_malla_preview(service.repo.get_malla_cursos(carrera.value or "", unidad.value or "", malla.value or ""))
+        page.update()
+
+    def mostrar_malla_preview(rows: List[MallaCourse]):
         tabla_malla.rows = [
             ft.DataRow(cells=[
                 ft.DataCell(ft.Text(str(r.get("CICLO", "")))),
@@ -937,7 +2057,6 @@ def main(page: ft.Page):
             ])
             for r in rows
         ]
-        page.update()
 
     def render_simple_table(table: ft.DataTable, rows: List[Dict[str, Any]]):
         table.rows = [
@@ -951,8 +2070,7 @@ def main(page: ft.Page):
             for r in rows
         ]
 
-    def buscar_instituciones(e=None):
-        resultados = repo.search_instituciones(institucion_buscar.value or "")
+    def mostrar_instituciones(resultados: List[Dict[str, str]]):
         institucion_resultados.controls = []
         for item in resultados:
             def make_click(it=item):
@@ -974,10 +2092,9 @@ def main(page: ft.Page):
                 )
             )
         institucion_resultados.visible = len(resultados) > 0
-        page.update()
 
     def on_responsable_change(e=None):
-        found = repo.get_responsable_by_nombre(resp_nombre.value or "")
+        found = service.repo.get_responsable_by_nombre(resp_nombre.value or "")
         resp_cargo.value = found["cargo"] if found else ""
         page.update()
 
@@ -1056,17 +2173,59 @@ def main(page: ft.Page):
             msg.color = "#B91C1C"
             page.update()
 
+    def avisar_error_entrada(ex: Exception):
+        msg.value = f"Error: {ex}"
+        msg.color = "#B91C1C"
+
+    # Campos que consultan al tipear: debounce + cancelación, solo publica la última tecla.
+    entrada_instituciones = DebouncedInput(
+        page,
+        lambda: (institucion_buscar.value or "",),
+        lambda q: service.repo.search_instituciones(q),
+        mostrar_instituciones,
+        on_error=avisar_error_entrada,
+    )
+    entrada_malla = DebouncedInput(
+        page, foto_malla_automatica, consultar_malla_automatica, mostrar_malla_automatica, on_error=avisar_error_entrada
+    )
+    entrada_unidades = DebouncedInput(
+        page,
+        lambda: (carrera.value or "", malla.value or "", unidad.value),
+        consultar_unidades,
+        mostrar_unidades,
+        on_error=avisar_error_entrada,
+        delay=0,  # un dropdown no se "tipea": solo se cancela la consulta anterior
+    )
+
+    def registrar_latencias(e=None):
+        # Latencia tecla -> render de la sesión, junto a los tiempos de carga.
+        timings: Dict[str, float] = {}
+        for nombre, entrada in (("instituciones", entrada_instituciones), ("malla", entrada_malla), ("unidades", entrada_unidades)):
+            resumen = entrada.latency_summary()
+            if "p50_ms" in resumen:
+                timings[f"tecla->render {nombre} p50"] = resumen["p50_ms"] / 1000
+                timings[f"tecla->render {nombre} p95"] = resumen["p95_ms"] / 1000
+        if timings:
+            record_load_times(timings)
+
+    page.on_disconnect = registrar_latencias
+
     # Eventos
-    sede.on_change = refresh_malla_automatica
-    crd.on_change = refresh_malla_automatica
-    carrera.on_change = refresh_unidades
+    # Mientras el usuario edita la malla a mano, la regla automática no la pisa.
+    malla.on_focus = lambda e: malla_foco.update(activo=True)
+    malla.on_blur = lambda e: malla_foco.update(activo=False)
+    sede.on_change = entrada_malla.on_event
+    crd.on_change = entrada_malla.on_event
+    carrera.on_change = entrada_unidades.on_event
     unidad.on_change = load_malla_preview
     resp_nombre.on_change = on_responsable_change
     tipo_caso.on_change = on_tipo_caso_change
-    institucion_buscar.on_change = buscar_instituciones
+    institucion_buscar.on_change = entrada_instituciones.on_event
 
     for rule_field in [cad_2025g_min, cad_2023_min, general_2025g_min, general_2023_min]:
-        rule_field.on_change = refresh_malla_automatica
+        rule_field.on_change = entrada_malla.on_event
+
+    procesar_btn = ft.ElevatedButton("Procesar y generar", on_click=procesar, bgcolor="#2F6EA5", color="#FFFFFF", disabled=True)
 
     hero = ft.Container(
         gradient=ft.LinearGradient(colors=["#1F4E79", "#2F6EA5"]),
@@ -1079,6 +2238,7 @@ def main(page: ft.Page):
                 size=14,
                 color="#FFFFFF",
             ),
+            version_text,
         ], spacing=8),
     )
 
@@ -1098,6 +2258,8 @@ def main(page: ft.Page):
                     regla_texto,
                 ])),
                 card("Formulario", ft.Column([
+                    carga_bar,
+                    carga_text,
                     ft.Row([nombres, apellidos, codigo], wrap=True),
                     ft.Row([sede, crd, malla, carrera], wrap=True),
                     ft.Row([unidad, tipo_caso, tipo_paquete], wrap=True),
@@ -1112,7 +2274,7 @@ def main(page: ft.Page):
                     ft.Text("Responsable académico", weight=ft.FontWeight.BOLD),
                     ft.Row([resp_nombre, resp_cargo], wrap=True),
                     ft.Row([
-                        ft.ElevatedButton("Procesar y generar", on_click=procesar, bgcolor="#2F6EA5", color="#FFFFFF"),
+                        procesar_btn,
                         ft.OutlinedButton("Limpiar", on_click=limpiar),
                     ]),
                     msg,
@@ -1149,7 +2311,132 @@ def main(page: ft.Page):
     )
     refresh_regla()
     page.update()
+    t_formulario = time.perf_counter() - t_inicio
+
+    # =========================
+    # CARGA EN SEGUNDO PLANO
+    # =========================
+    q_ui: "queue.Queue[Any]" = queue.Queue()
+
+    def habilitar_hoja(sheet: str):
+        if sheet == SHEET_SEDES:
+            sede.options = [ft.dropdown.Option(x) for x in service.repo.get_sedes()]
+            sede.disabled = False
+        elif sheet == SHEET_PAQUETE:
+            tipo_paquete.options = [ft.dropdown.Option(x) for x in service.repo.get_paquetes()]
+        elif sheet == SHEET_RESPONSABLES:
+            resp_nombre.options = [ft.dropdown.Option(x["nombre"]) for x in service.repo.get_responsables()]
+            resp_nombre.disabled = False
+        elif sheet == SHEET_CENTROS:
+            institucion_buscar.disabled = False
+        elif sheet == SHEET_MALLA:
+            carrera.options = [ft.dropdown.Option(x) for x in service.repo.get_carreras()]
+            carrera.disabled = False
+            crd.disabled = False
+            procesar_btn.disabled = False
+        listo[sheet] = True
+        hechas = sum(listo.values())
+        carga_bar.value = hechas / len(listo)
+        carga_text.value = f"Cargando dataset... {hechas}/{len(listo)} hojas"
+
+    def cargar_en_segundo_plano():
+        # Primero las hojas chicas para que sus listas aparezcan cuanto antes; MALLA al final.
+        orden = [SHEET_SEDES, SHEET_PAQUETE, SHEET_RESPONSABLES, SHEET_CENTROS, SHEET_MALLA]
+        for sheet in orden:
+            try:
+                repo.load_sheets([sheet])
+                if sheet == SHEET_MALLA:
+                    t0 = time.perf_counter()
+                    repo.malla_catalog()
+                    repo.load_timings["(catálogo MALLA)"] = time.perf_counter() - t0
+                elif sheet == SHEET_CENTROS:
+                    t0 = time.perf_counter()
+                    repo.institution_index()
+                    repo.load_timings["(índice instituciones)"] = time.perf_counter() - t0
+                elif sheet == SHEET_RESPONSABLES:
+                    repo.responsables_index()
+            except Exception as ex:
+                q_ui.put(lambda sheet=sheet, ex=ex: (
+                    setattr(msg, "value", f"Error al cargar la hoja {sheet}: {ex}"),
+                    setattr(msg, "color", "#B91C1C"),
+                ))
+                continue
+            q_ui.put(lambda sheet=sheet: habilitar_hoja(sheet))
+
+        t_dataset = time.perf_counter() - t_inicio
+        q_ui.put(lambda version=repo.version: (
+            setattr(carga_text, "value", f"Dataset listo en {t_dataset:.2f} s"),
+            setattr(carga_bar, "visible", False),
+            setattr(version_text, "value", f"Dataset: {version}"),
+        ))
+        record_load_times({"formulario": t_formulario, "dataset": t_dataset, **repo.load_timings})
+
+        # La primera construcción de la tabla CRD recorre toda la MALLA; va después de la carga.
+        try:
+            service.crd_table.prepare(repo)
+        except Exception:
+            pass  # sin tabla se calcula con la caché LRU
+
+        if HOT_RELOAD:
+            DatasetWatcher(repo, on_swap=publicar_dataset, on_error=avisar_fallo_recarga).start()
+
+    # =========================
+    # RECARGA EN CALIENTE (dataset.xlsx modificado con la app abierta)
+    # =========================
+    def publicar_dataset(nuevo: DatasetRepository):
+        # Hilo del vigilante: la tabla CRD se prepara antes de publicar para no perder el O(1).
+        crd_table = CrdAnswerTable(nuevo.excel_path)
+        try:
+            crd_table.prepare(nuevo)
+        except Exception:
+            pass
+        service.use_repo(nuevo, crd_table)
+        q_ui.put(lambda: refrescar_listas(nuevo))
+
+    def refrescar_listas(nuevo: DatasetRepository):
+        for sheet in STARTUP_SHEETS:
+            habilitar_hoja(sheet)
+        for dropdown in [sede, carrera, resp_nombre, tipo_paquete]:
+            if dropdown.value not in {o.key or o.text for o in dropdown.options}:
+                dropdown.value = None
+        if not resp_nombre.value:
+            resp_cargo.value = ""
+        refresh_unidades()
+        version_text.value = f"Dataset: {nuevo.version}"
+        carga_text.value = f"Dataset actualizado: {nuevo.version}"
+        msg.value = "Se detectó un cambio en dataset.xlsx; listas e índices actualizados."
+        msg.color = "#047857"
+
+    def avisar_fallo_recarga(ex: Exception):
+        q_ui.put(lambda: (
+            setattr(msg, "value", f"No se pudo recargar dataset.xlsx (se mantiene la versión anterior): {ex}"),
+            setattr(msg, "color", "#B91C1C"),
+        ))
+
+    async def ui_pump():
+        # Aplica en el hilo de la UI los cambios de los hilos de carga y de recarga.
+        while True:
+            dirty = False
+            while True:
+                try:
+                    fn = q_ui.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    fn()
+                except Exception as e:
+                    # Un callback que falla no puede matar la bomba: se avisa y se sigue
+                    carga_text.value = f"Error al actualizar la pantalla: {e}"
+                    carga_text.color = "#B91C1C"
+                dirty = True
+            if dirty:
+                page.update()
+            await asyncio.sleep(0.05)
+
+    page.run_task(ui_pump)
+    threading.Thread(target=cargar_en_segundo_plano, daemon=True).start()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # ejecutable congelado: los procesos de carga no abren la app
     ft.app(target=main)
@@ -0,0 +1,108 @@
+# =========================================================
+# BENCHMARK DE ARRANQUE: tiempo hasta tener los datos listos para la UI
+# Cada medición es un proceso nuevo (import + carga del dataset + listas
+# iniciales), con la caché binaria desactivada (Excel) y activada.
+#
+#   python benchmarks/bench_arranque.py [--repeticiones 3] [--entradas main,vpro]
+# =========================================================
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+T0 = time.perf_counter()
+
+from comun import RAIZ, VPRO_DIR  # noqa: E402
+
+ENTRADAS = ("main", "mainPaquetes", "mainRPA", "vpro")
+PARALELO = os.environ.get("BENCH_CARGA_PARALELA") == "1"
+
+
+def _arranque_hijo(entrada: str) -> dict:
+    """Reproduce lo que hace main() antes de pintar el formulario."""
+    t_import = time.perf_counter()
+    if entrada == "vpro":
+        from comun import cargar_vpro
+        modulo = cargar_vpro()
+        t_datos = time.perf_counter()
+        repo = modulo.DatasetRepository(os.path.join(VPRO_DIR, modulo.DATASET_FILE))
+        hojas = repo.load_sheets(modulo.STARTUP_SHEETS, parallel=PARALELO)
+        repo.get_paquetes()
+        repo.get_sedes()
+        repo.get_carreras()
+        repo.get_responsables()
+        cache = repo.disk_cache
+        aciertos, fallos = cache.hits, cache.misses
+    else:
+        hojas = {}
+        modulo = __import__(entrada)
+        from datos_convalidacion import preparar_tabla_crd
+        t_datos = time.perf_counter()
+        df = modulo.cargar_dataset()
+        if entrada == "mainRPA":
+            df["CARRERA"] = df["CARRERA"].astype(str).str.strip()
+            df["UNID. NEGOCIO"] = df["UNID. NEGOCIO"].astype(str).str.strip()
+        preparar_tabla_crd(modulo.TABLA_CRD, df)
+        sorted(df["CARRERA"].dropna().unique().tolist())
+        aciertos, fallos = modulo.CACHE_HOJAS.aciertos, modulo.CACHE_HOJAS.fallos
+    fin = time.perf_counter()
+    return {
+        "import_s": t_datos - t_import,
+        "datos_s": fin - t_datos,
+        "total_s": fin - T0,
+        "aciertos_cache": aciertos,
+        "fallos_cache": fallos,
+        "hojas_s": hojas,
+    }
+
+
+def _medir(entrada: str, con_cache: bool) -> dict:
+    env = dict(os.environ, CONVA_CACHE_DATASET="1" if con_cache else "0")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--hijo", entrada],
+        cwd=RAIZ, env=env, capture_output=True, text=True, check=True,
+    )
+    res = json.loads(proc.stdout.strip().splitlines()[-1])
+    res["proceso_s"] = time.perf_counter() - t0
+    return res
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque con y sin caché binaria del dataset")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--entradas", default=",".join(ENTRADAS))
+    parser.add_argument("--paralelo", action="store_true", help="V_Pro: parsear cada hoja en su propio proceso")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.paralelo:
+        os.environ["BENCH_CARGA_PARALELA"] = "1"
+
+    if args.hijo:
+        print(json.dumps(_arranque_hijo(args.hijo)))
+        return 0
+
+    print(f"{'entrada':<14}{'modo':<10}{'datos s':>9}{'proceso s':>11}{'hits':>6}{'miss':>6}")
+    for entrada in (e for e in args.entradas.split(",") if e in ENTRADAS):
+        _medir(entrada, con_cache=True)  # calienta la caché en disco
+        for con_cache in (False, True):
+            corridas = [_medir(entrada, con_cache) for _ in range(args.repeticiones)]
+            ultima = corridas[-1]
+            print(
+                f"{entrada:<14}{'caché' if con_cache else 'excel':<10}"
+                f"{statistics.median(c['datos_s'] for c in corridas):>9.3f}"
+                f"{statistics.median(c['proceso_s'] for c in corridas):>11.3f}"
+                f"{ultima['aciertos_cache']:>6}{ultima['fallos_cache']:>6}"
+            )
+            if ultima["hojas_s"]:
+                print("    " + "  ".join(f"{h}={t:.3f}s" for h, t in ultima["hojas_s"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,196 @@
+# =========================================================
+# BENCHMARK: catálogo compacto de MALLA vs DataFrame de la hoja (V_Pro)
+#
+# Memoria: cada representación se arma en un subproceso limpio y se mide
+#   - RSS (VmRSS de /proc, solo Linux) antes y después de construirla
+#   - bytes vivos según tracemalloc (con la hoja ya liberada en el modo catálogo)
+# Latencia: las consultas del repositorio (carreras, unidades, vista previa,
+# malla real) con el filtrado sobre el DataFrame anterior vs el catálogo.
+#
+#   python benchmarks/bench_catalogo.py [--consultas 300]
+# =========================================================
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from comun import VPRO_DIR, cargar_vpro, percentil
+
+VPRO = cargar_vpro()
+RUTA = os.path.join(VPRO_DIR, VPRO.DATASET_FILE)
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def leer_hoja():
+    return VPRO.DatasetRepository(RUTA).read_sheet(VPRO.SHEET_MALLA)
+
+
+# =========================================================
+# CONSULTAS SOBRE EL DATAFRAME (implementación anterior del repositorio)
+# =========================================================
+def df_carreras(df):
+    return sorted(df["CARRERA"].astype(str).str.strip().replace("", pd.NA).dropna().unique().tolist())
+
+
+def df_unidades(df, carrera, malla):
+    mask = (
+        df["CARRERA"].astype(str).str.strip().eq(str(carrera).strip())
+        & df["MALLA"].map(VPRO.normalize_malla_value).eq(VPRO.normalize_malla_value(malla))
+    )
+    unidades = df.loc[mask, "UNID_NEGOCIO"].astype(str).str.strip()
+    return sorted(unidades.replace("", pd.NA).dropna().unique().tolist())
+
+
+def df_preview(df, carrera, unidad, malla):
+    mask = (
+        df["CARRERA"].astype(str).str.strip().eq(str(carrera).strip())
+        & df["UNID_NEGOCIO"].astype(str).str.strip().eq(str(unidad).strip())
+        & df["MALLA"].map(VPRO.normalize_malla_value).eq(VPRO.normalize_malla_value(malla))
+    )
+    mdf = df.loc[mask].copy()
+    if mdf.empty:
+        return []
+    mdf["_CICLO_NUM"] = mdf.get("CICLO", "").map(VPRO.extract_cycle_number)
+    mdf["_UBI"] = mdf.get("UBICACION_EN_EL_CICLO", "").map(VPRO.number_safe)
+    mdf = mdf.sort_values(["_CICLO_NUM", "_UBI"], ascending=[True, True])
+    return [
+        {
+            "CICLO": r.get("CICLO", ""),
+            "CURSO": r.get("CURSO", ""),
+            "MATERIA": r.get("MATERIA", ""),
+            "COD_CURSO": r.get("COD_CURSO") or r.get("COD_CURSO_") or r.get("COD_CURSO___") or r.get("CODIGO_OFICIAL") or "",
+            "CR": VPRO.number_safe(r.get("CR", 0)),
+            "REQUISITOS": r.get("REQUISITOS", ""),
+        }
+        for _, r in mdf.iterrows()
+    ]
+
+
+def df_malla_real(df, canonica):
+    objetivo = VPRO.normalize_malla_value(canonica)
+    for v in (str(x).strip() for x in df["MALLA"].tolist() if str(x).strip()):
+        if VPRO.normalize_malla_value(v) == objetivo:
+            return v
+    return canonica
+
+
+# =========================================================
+# MEMORIA (subproceso por modo)
+# =========================================================
+def medir_memoria(modo):
+    # Calentamiento: importaciones perezosas de pandas/pickle fuera de la medición.
+    VPRO.MallaCatalog(leer_hoja().head(50))
+    gc.collect()
+    rss0 = rss_mb()
+    tracemalloc.start()
+    df = leer_hoja()
+    info = {"filas": len(df), "df_deep_mb": df.memory_usage(index=True, deep=True).sum() / 1e6}
+    if modo == "catalogo":
+        catalogo = VPRO.MallaCatalog(df)
+        info["catalogo_mb"] = catalogo.memory_bytes() / 1e6
+        del df
+    gc.collect()
+    info["tracemalloc_mb"] = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    rss1 = rss_mb()
+    info["rss_mb"] = (rss1 - rss0) if rss0 is not None and rss1 is not None else None
+    return info
+
+
+def memoria_en_subproceso(modo):
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--memoria-modo", modo],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+# =========================================================
+# LATENCIA
+# =========================================================
+def medir_latencia(n):
+    df = leer_hoja()
+    repo = VPRO.DatasetRepository(RUTA)
+    repo.load_sheets([VPRO.SHEET_MALLA])
+    catalogo = repo.malla_catalog()
+
+    claves = list(catalogo.grupos)
+    consultas = [claves[i % len(claves)] for i in range(n)]
+
+    # equivalencia antes de medir
+    distintos = sum(
+        1 for c, u, m in claves
+        if repr(df_preview(df, c, u, m)) != repr(repo.get_malla_preview(c, u, m))
+        or df_unidades(df, c, m) != repo.get_unidades_by_carrera_and_malla(c, m)
+    )
+    distintos += int(df_carreras(df) != repo.get_carreras())
+
+    casos = {
+        "carreras": (lambda k: df_carreras(df), lambda k: repo.get_carreras()),
+        "unidades": (lambda k: df_unidades(df, k[0], k[2]), lambda k: repo.get_unidades_by_carrera_and_malla(k[0], k[2])),
+        "preview": (lambda k: df_preview(df, *k), lambda k: repo.get_malla_preview(*k)),
+        "cursos": (lambda k: df_preview(df, *k), lambda k: repo.get_malla_cursos(*k)),
+        "malla_real": (lambda k: df_malla_real(df, k[2]), lambda k: repo.resolver_malla_existente(k[2])),
+    }
+    resultado = {}
+    for nombre, (antes, despues) in casos.items():
+        tiempos = {}
+        for etiqueta, fn in (("dataframe", antes), ("catalogo", despues)):
+            valores = []
+            for k in consultas:
+                t0 = time.perf_counter()
+                fn(k)
+                valores.append((time.perf_counter() - t0) * 1000)
+            tiempos[etiqueta] = valores
+        resultado[nombre] = tiempos
+    return resultado, distintos, len(claves)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Catálogo compacto de MALLA vs DataFrame")
+    parser.add_argument("--consultas", type=int, default=300)
+    parser.add_argument("--memoria-modo", choices=["dataframe", "catalogo"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memoria_modo:
+        print(json.dumps(medir_memoria(args.memoria_modo)))
+        return 0
+
+    print("Memoria residente (hoja MALLA):")
+    for modo in ("dataframe", "catalogo"):
+        info = memoria_en_subproceso(modo)
+        rss = f"{info['rss_mb']:7.1f} MB" if info["rss_mb"] is not None else "    n/d"
+        extra = f"  estructura={info['catalogo_mb']:.1f} MB" if "catalogo_mb" in info else f"  deep={info['df_deep_mb']:.1f} MB"
+        print(f"  {modo:<10} filas={info['filas']}  RSS +{rss}  tracemalloc={info['tracemalloc_mb']:7.1f} MB{extra}")
+
+    resultado, distintos, grupos = medir_latencia(args.consultas)
+    print(f"\nLatencia por consulta ({args.consultas} consultas sobre {grupos} grupos, resultados distintos={distintos}):")
+    for nombre, tiempos in resultado.items():
+        a, b = tiempos["dataframe"], tiempos["catalogo"]
+        p50a, p50b = percentil(a, 50), percentil(b, 50)
+        print(
+            f"  {nombre:<11} dataframe p50={p50a:8.3f} p95={percentil(a, 95):8.3f} ms | "
+            f"catálogo p50={p50b:8.4f} p95={percentil(b, 95):8.4f} ms | x{p50a / p50b if p50b else 0:,.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
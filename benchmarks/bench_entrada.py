@@ -0,0 +1,144 @@
+# =========================================================
+# BENCHMARK: entrada al tipear en V_Pro — handler síncrono vs DebouncedInput
+# Simula a alguien tipeando en "Institución de procedencia" (una tecla cada
+# --intervalo ms, pausa entre palabras) y mide, por tecla publicada, la latencia
+# tecla -> render, cuántos renders/page.update() se hicieron y cuántos mostraron
+# un resultado que ya estaba viejo.
+#   síncrono:  cada tecla consulta, arma la lista y hace page.update() en el loop.
+#   debounce:  DebouncedInput (consulta en hilo, cancela la anterior, publica la última).
+# --consulta recorrido usa la búsqueda anterior (iterrows) para ver el retraso acumulado.
+#
+#   python benchmarks/bench_entrada.py [--intervalo 60] [--update-ms 0] [--consulta indice|recorrido]
+# =========================================================
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from bench_instituciones import TECLEOS, buscar_recorrido
+from comun import VPRO_DIR, cargar_vpro, percentil
+
+VPRO = cargar_vpro()
+ft = VPRO.ft
+
+
+class PaginaSimulada:
+    """page.update() con un costo fijo opcional (serializar y enviar el árbol de controles)."""
+
+    def __init__(self, costo_update: float):
+        self.costo_update = costo_update
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+        if self.costo_update:
+            time.sleep(self.costo_update)
+
+
+def armar_lista(resultados):
+    """Lo mismo que mostrar_instituciones: un Container por resultado."""
+    return [
+        ft.Container(
+            padding=8,
+            content=ft.Column([
+                ft.Text(item["nombre"], weight=ft.FontWeight.BOLD),
+                ft.Text(f"{item['tipo']} {('| ' + item['codigo']) if item['codigo'] else ''}", size=12),
+            ], spacing=2),
+        )
+        for item in resultados
+    ]
+
+
+async def teclear(on_tecla, intervalo, pausa):
+    """
+    Dispara on_tecla(texto, programada) con el ritmo de tipeo; programada = instante de la tecla.
+    Devuelve cuánto ocupó el loop cada handler (mientras tanto la UI no atiende otras teclas).
+    """
+    bloqueos = []
+    t = time.perf_counter()
+    for palabra in TECLEOS:
+        for i in range(1, len(palabra) + 1):
+            t += intervalo
+            await asyncio.sleep(max(0.0, t - time.perf_counter()))
+            t0 = time.perf_counter()
+            await on_tecla(palabra[:i], t)
+            bloqueos.append(time.perf_counter() - t0)
+        t += pausa
+    return bloqueos
+
+
+async def modo_sincrono(consultar, pagina, intervalo, pausa):
+    latencias, mostrado = [], []
+
+    async def on_tecla(texto, programada):
+        mostrado.append((texto, armar_lista(consultar(texto))))
+        pagina.update()
+        latencias.append(time.perf_counter() - programada)
+
+    bloqueos = await teclear(on_tecla, intervalo, pausa)
+    return latencias, len(mostrado), bloqueos
+
+
+async def modo_debounce(consultar, pagina, intervalo, pausa, delay):
+    campo = {"texto": "", "lista": []}
+
+    def mostrar(resultados):
+        campo["lista"] = armar_lista(resultados)
+
+    entrada = VPRO.DebouncedInput(pagina, lambda: (campo["texto"],), consultar, mostrar, delay=delay)
+
+    async def on_tecla(texto, programada):
+        campo["texto"] = texto
+        await entrada.on_event()
+
+    bloqueos = await teclear(on_tecla, intervalo, pausa)
+    await entrada.drain()
+    return list(entrada.latencies), entrada.stats["renders"], bloqueos
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Entrada al tipear: síncrono vs debounce")
+    parser.add_argument("--intervalo", type=float, default=60, help="ms entre teclas")
+    parser.add_argument("--pausa", type=float, default=400, help="ms entre palabras")
+    parser.add_argument("--update-ms", type=float, default=0, help="costo simulado de page.update()")
+    parser.add_argument("--debounce-ms", type=float, default=VPRO.INPUT_DEBOUNCE * 1000)
+    parser.add_argument("--consulta", choices=["indice", "recorrido"], default="indice")
+    args = parser.parse_args()
+
+    repo = VPRO.DatasetRepository(os.path.join(VPRO_DIR, VPRO.DATASET_FILE))
+    if args.consulta == "indice":
+        repo.institution_index()
+        consultar = repo.search_instituciones
+    else:
+        hoja = repo.read_sheet(VPRO.SHEET_CENTROS)
+        consultar = lambda q: buscar_recorrido(hoja, q)  # noqa: E731
+
+    teclas = sum(len(p) for p in TECLEOS)
+    print(
+        f"{teclas} teclas en {len(TECLEOS)} palabras, una cada {args.intervalo:.0f} ms  "
+        f"consulta={args.consulta}  update={args.update_ms:.0f} ms  debounce={args.debounce_ms:.0f} ms"
+    )
+    intervalo, pausa, costo = args.intervalo / 1000, args.pausa / 1000, args.update_ms / 1000
+    for nombre in ("síncrono", "debounce"):
+        pagina = PaginaSimulada(costo)
+        t0 = time.perf_counter()
+        if nombre == "síncrono":
+            latencias, renders, bloqueos = asyncio.run(modo_sincrono(consultar, pagina, intervalo, pausa))
+        else:
+            latencias, renders, bloqueos = asyncio.run(
+                modo_debounce(consultar, pagina, intervalo, pausa, args.debounce_ms / 1000)
+            )
+        ms = [x * 1000 for x in latencias]
+        bloqueo = [x * 1000 for x in bloqueos]
+        print(
+            f"  {nombre:<9} tecla->render p50={percentil(ms, 50):7.1f} p95={percentil(ms, 95):7.1f} máx={max(ms):7.1f} ms | "
+            f"handler p95={percentil(bloqueo, 95):7.3f} ms | renders={renders:3d} page.update={pagina.updates:3d} "
+            f"obsoletos={renders - len(TECLEOS):3d} | total {time.perf_counter() - t0:.1f} s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,94 @@
+# =========================================================
+# BENCHMARK: slice (CARRERA, UNID. NEGOCIO) por máscara vs IndiceDataset
+# El camino anterior de procesar_click / run_batch comparaba cadenas sobre todo el
+# dataset en cada solicitud; ahora las columnas clave son categóricas y el slice
+# sale de un índice (carrera, unidad) -> posiciones armado una vez.
+#
+# Reporta latencia por slice y solicitudes/s del flujo de una solicitud
+# (slice + selección CRD + matriculables) con cada variante, más la equivalencia
+# de filas y orden para todos los slices.
+#
+#   python benchmarks/bench_indice.py [--solicitudes 2000]
+# =========================================================
+
+import argparse
+import sys
+import time
+
+from comun import percentil
+
+import main
+from datos_convalidacion import IndiceDataset
+
+
+def slice_mascara(df, carrera, unidad):
+    return df[(df["CARRERA"] == carrera) & (df["UNID. NEGOCIO"] == unidad)].copy()
+
+
+def solicitud(df_conva, carrera, unidad, crd):
+    """Lo que hace procesar_click después de obtener el slice (sin PDF/Excel)."""
+    seleccion, _ = main.seleccionar_convalidacion_cache(df_conva, carrera, unidad, crd, tolerancia=2)
+    df_convalidados = df_conva.loc[seleccion].copy()
+    df_resultado = df_conva.copy()
+    df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+    df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
+    return main.calcular_matriculables(df_resultado, df_convalidados)
+
+
+def medir(fn, consultas):
+    tiempos = []
+    t_total = time.perf_counter()
+    for args in consultas:
+        t0 = time.perf_counter()
+        fn(*args)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return tiempos, len(consultas) / (time.perf_counter() - t_total)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Slice por máscara de cadenas vs índice categórico")
+    parser.add_argument("--solicitudes", type=int, default=2000)
+    args = parser.parse_args()
+
+    df_texto = main.cargar_dataset().copy()
+    for col in ("CARRERA", "UNID. NEGOCIO"):
+        df_texto[col] = df_texto[col].astype(str)  # columnas como antes: cadenas libres
+
+    t0 = time.perf_counter()
+    indice = IndiceDataset(main.cargar_dataset())
+    t_indice = (time.perf_counter() - t0) * 1000
+
+    claves = list(indice._posiciones)
+    distintos = sum(
+        1 for c, u in claves
+        if not slice_mascara(df_texto, c, u).astype(str).equals(indice.filas(c, u).astype(str))
+    )
+    print(f"filas={len(df_texto)}  slices={len(claves)}  índice armado en {t_indice:.1f} ms  slices distintos={distintos}")
+
+    crds = (0, 24, 60, 120)
+    consultas = [(*claves[i % len(claves)], crds[i % len(crds)]) for i in range(args.solicitudes)]
+    for c, u, crd in consultas:
+        solicitud(indice.filas(c, u), c, u, crd)  # caché de selección caliente para ambas variantes
+
+    casos = {
+        "slice": (
+            lambda c, u, crd: slice_mascara(df_texto, c, u),
+            lambda c, u, crd: indice.filas(c, u),
+        ),
+        "solicitud": (
+            lambda c, u, crd: solicitud(slice_mascara(df_texto, c, u), c, u, crd),
+            lambda c, u, crd: solicitud(indice.filas(c, u), c, u, crd),
+        ),
+    }
+    print(f"\n{args.solicitudes} solicitudes:")
+    for nombre, (antes, despues) in casos.items():
+        (ta, qa), (tb, qb) = medir(antes, consultas), medir(despues, consultas)
+        print(
+            f"  {nombre:<10} máscara p50={percentil(ta, 50):7.3f} ms {qa:9,.0f}/s | "
+            f"índice p50={percentil(tb, 50):7.3f} ms {qb:9,.0f}/s | x{qb / qa:.1f}"
+        )
+    return 1 if distintos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,127 @@
+# =========================================================
+# BENCHMARK: búsqueda de instituciones (V_Pro) — recorrido de la hoja vs índice
+# Simula el tipeo en "Institución de procedencia" (una consulta por tecla) sobre la
+# hoja real y sobre maestros sintéticos de decenas de miles de filas.
+# Verifica que el índice devuelva exactamente las instituciones que contienen la
+# consulta (con límite ilimitado) y mide latencia por tecla y costo de armado.
+#
+#   python benchmarks/bench_instituciones.py [--filas 20000,50000]
+# =========================================================
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+from comun import VPRO_DIR, cargar_vpro, percentil
+
+VPRO = cargar_vpro()
+
+PALABRAS = ["SAN", "SANTA", "NACIONAL", "PRIVADA", "TECNOLOGICO", "PEDAGOGICO", "DEL", "DE", "LA", "PERU",
+            "CESAR", "VALLEJO", "NORTE", "SUR", "ANDINA", "AMAZONICA", "JOSE", "MARIA", "CATOLICA", "ÑAÑA"]
+TIPOS = ["INSTITUTO", "UNIVERSIDAD", "ESCUELA"]
+TECLEOS = ["universidad nacional", "san jos", "instituto", "cesar vall", "peru", "ñaña", "sta mar", "xq", "a", "de la"]
+
+
+def hoja_real():
+    repo = VPRO.DatasetRepository(os.path.join(VPRO_DIR, VPRO.DATASET_FILE))
+    return repo.read_sheet(VPRO.SHEET_CENTROS)
+
+
+def hoja_sintetica(base: pd.DataFrame, filas: int, semilla: int = 7) -> pd.DataFrame:
+    rnd = random.Random(semilla)
+    nombres = [str(x) for x in base["NOMBRE"].tolist() if str(x).strip()]
+    out = []
+    for i in range(filas):
+        extra = " ".join(rnd.choice(PALABRAS) for _ in range(rnd.randint(0, 3)))
+        out.append({
+            "NOMBRE": f"{rnd.choice(nombres)} {extra} {i}".strip(),
+            "INSTITUCION_TIPO": rnd.choice(TIPOS),
+            "COD_INSTITUCION": f"CX{i:06d}",
+        })
+    return pd.DataFrame(out)
+
+
+def buscar_recorrido(df: pd.DataFrame, query: str, limite=50):
+    """Implementación anterior de DatasetRepository.search_instituciones."""
+    q = VPRO.normalize_text_search(query)
+    out = []
+    for _, r in df.iterrows():
+        nombre = str(r.get("NOMBRE") or r.get("INSTITUCION_S") or r.get("INSTITUCION_C") or "").strip()
+        if not nombre:
+            continue
+        tipo = str(r.get("INSTITUCION_TIPO", "")).strip().upper()
+        codigo = str(r.get("COD_INSTITUCION", "")).strip()
+        if q and q not in VPRO.normalize_text_search(nombre):
+            continue
+        out.append({"nombre": nombre, "tipo": tipo, "codigo": codigo})
+    out.sort(key=lambda x: x["nombre"].lower())
+    return out[:limite]
+
+
+def consultas_tecleo():
+    """Cada prefijo de cada texto tipeado: lo que dispara on_change tecla a tecla."""
+    return [t[:i] for t in TECLEOS for i in range(1, len(t) + 1)]
+
+
+def verificar(df, indice, consultas):
+    """Mismo conjunto que el recorrido (sin límite) y ranking: prefijos antes que subcadenas."""
+    errores = 0
+    for q in dict.fromkeys(consultas):
+        esperado = sorted((d["nombre"], d["codigo"]) for d in buscar_recorrido(df, q, limite=None))
+        obtenido = indice.search(q, limit=len(indice))
+        if sorted((d["nombre"], d["codigo"]) for d in obtenido) != esperado:
+            errores += 1
+            continue
+        nq = VPRO.normalize_text_search(q)
+        rangos = [0 if VPRO.normalize_text_search(d["nombre"]).startswith(nq) else 1 for d in obtenido]
+        errores += int(rangos != sorted(rangos))
+    return errores
+
+
+def medir(nombre, df, consultas, con_recorrido):
+    t0 = time.perf_counter()
+    indice = VPRO.InstitutionIndex(df)
+    t_indice = (time.perf_counter() - t0) * 1000
+    errores = verificar(df, indice, consultas[:12]) if con_recorrido else verificar(df, indice, ["san jos", "xq", "a"])
+
+    tiempos = []
+    for q in consultas:
+        t0 = time.perf_counter()
+        indice.search(q)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+
+    linea = (
+        f"{nombre:<14} filas={len(df):>6}  armado={t_indice:8.1f} ms  errores={errores}  "
+        f"índice p50={percentil(tiempos, 50):.4f} p95={percentil(tiempos, 95):.4f} máx={max(tiempos):.4f} ms"
+    )
+    if con_recorrido:
+        antes = []
+        for q in consultas[:15]:
+            t0 = time.perf_counter()
+            buscar_recorrido(df, q)
+            antes.append((time.perf_counter() - t0) * 1000)
+        linea += f"  | recorrido p50={percentil(antes, 50):.1f} ms"
+    print(linea)
+    return errores
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Búsqueda de instituciones: recorrido vs índice")
+    parser.add_argument("--filas", default="20000,50000", help="tamaños de los maestros sintéticos")
+    args = parser.parse_args()
+
+    consultas = consultas_tecleo()
+    print(f"{len(consultas)} consultas (tecla a tecla)")
+    base = hoja_real()
+    errores = medir("hoja real", base, consultas, con_recorrido=True)
+    for n in (int(x) for x in args.filas.split(",") if x.strip()):
+        errores += medir("sintético", hoja_sintetica(base, n), consultas, con_recorrido=n <= 20000)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
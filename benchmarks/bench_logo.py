@@ -0,0 +1,85 @@
+# =========================================================
+# BENCHMARK: logo de los encabezados PDF — archivo por documento vs CacheLogo
+# Genera los dos PDF por alumno de mainRPA (convalidación + proyección con hoja de
+# ruta) para un lote sintético, primero con drawImage(ruta) en cada documento
+# (CONVA_CACHE_LOGO=0) y luego con el logo escalado una vez por proceso.
+# Reporta PDFs/s, ms por alumno y tamaño medio de cada PDF.
+#
+#   python benchmarks/bench_logo.py [--alumnos 200] [--logo V_Pro/logo.jpg]
+# =========================================================
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from comun import RAIZ, VPRO_DIR, percentil
+
+import mainRPA
+from datos_convalidacion import IndiceDataset
+from pdf_convalidacion import CACHE_LOGO, configurar_reportlab
+
+
+def preparar_lote(alumnos):
+    indice = IndiceDataset(mainRPA.cargar_dataset())
+    resolver, _ = mainRPA.crear_resolvedor_lote(indice)
+    claves = list(indice._posiciones)
+    lote = []
+    for i in range(alumnos):
+        carrera, unidad = claves[i % len(claves)]
+        lote.append((f"N{i:05d}", carrera, unidad, *resolver(carrera, unidad, float((i * 12) % 96))[1:]))
+    return lote
+
+
+def generar(lote, carpeta, logo):
+    tiempos, tamanos = [], []
+    t_total = time.perf_counter()
+    for codigo, carrera, unidad, df_convalidados, df_matriculables, df_ruta in lote:
+        pdf_conva = os.path.join(carpeta, f"Resultado_Convalidacion_{codigo}.pdf")
+        pdf_proy = os.path.join(carpeta, f"Proyeccion_Malla_{codigo}.pdf")
+        carrera_upn = f"{carrera} - {unidad}"
+        t0 = time.perf_counter()
+        mainRPA.generar_pdf_convalidados(pdf_conva, "PEREZ, ANA", codigo, carrera_upn, "TRUJILLO", "2025G",
+                                         "ELAB", "ASISTENTE", "RESP", "COORDINADOR", df_convalidados, logo)
+        mainRPA.generar_pdf_proyeccion(pdf_proy, "PEREZ, ANA", codigo, carrera_upn, "TRUJILLO", "2025G",
+                                       "ELAB", "ASISTENTE", "RESP", "COORDINADOR", df_matriculables, logo, df_ruta)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        tamanos += [os.path.getsize(pdf_conva), os.path.getsize(pdf_proy)]
+    return tiempos, tamanos, time.perf_counter() - t_total
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Logo PDF: archivo por documento vs caché por proceso")
+    parser.add_argument("--alumnos", type=int, default=200)
+    parser.add_argument("--logo", default=os.path.join(VPRO_DIR, "logo.jpg"))
+    args = parser.parse_args()
+    configurar_reportlab()  # como los puntos de entrada de la app
+
+    if not os.path.exists(args.logo):
+        print(f"No existe el logo {args.logo}")
+        return 1
+    lote = preparar_lote(args.alumnos)
+    print(f"{args.alumnos} alumnos, 2 PDF cada uno, logo {os.path.relpath(args.logo, RAIZ)} ({os.path.getsize(args.logo) / 1024:.0f} KB)")
+
+    carpeta = tempfile.mkdtemp(prefix="bench_logo_")
+    try:
+        generar(lote[:5], carpeta, args.logo)  # importaciones y fuentes calientes
+        resultados = {}
+        for nombre, activa in (("sin caché", False), ("con caché", True)):
+            CACHE_LOGO.activa = activa
+            tiempos, tamanos, total = generar(lote, carpeta, args.logo)
+            resultados[nombre] = total
+            print(
+                f"  {nombre:<9} {2 * len(lote) / total:7.1f} PDF/s  por alumno p50={percentil(tiempos, 50):6.2f} "
+                f"p95={percentil(tiempos, 95):6.2f} ms  PDF medio={sum(tamanos) / len(tamanos) / 1024:6.1f} KB"
+            )
+        print(f"  x{resultados['sin caché'] / resultados['con caché']:.2f} en el lote")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
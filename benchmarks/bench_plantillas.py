@@ -0,0 +1,116 @@
+# =========================================================
+# BENCHMARK: capa fija de los PDF — dibujada en cada página vs PLANTILLAS_PDF
+# Genera los dos PDF por alumno de mainRPA (el mismo lote que bench_logo) primero
+# dibujando título, rótulos, grilla y pie en cada página (CONVA_PLANTILLAS_PDF=0) y
+# luego con la capa fija como form XObject cuyos operadores se generan una vez por
+# proceso. El logo va con CacheLogo en ambos casos.
+# Reporta PDFs/s, ms por alumno y tamaño medio de cada PDF.
+# Verifica además, para main.py, mainPaquetes.py y mainRPA.py (con y sin logo), que
+# cada página con plantilla, con el form de la capa puesto en línea, tiene los mismos
+# operadores PDF que dibujada directamente. La réplica de bytes usa internos de
+# ReportLab: esta verificación valida una versión antes de sumarla a VERSIONES_PLANTILLAS.
+#
+#   python benchmarks/bench_plantillas.py [--alumnos 200] [--logo V_Pro/logo.jpg] [--verificar 60]
+# =========================================================
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zlib
+
+from comun import RAIZ, VPRO_DIR, percentil
+from bench_logo import generar, preparar_lote
+
+import main
+import mainPaquetes
+import mainRPA
+from pdf_convalidacion import PLANTILLAS_PDF, configurar_reportlab
+
+OBJETO = re.compile(rb"(\d+) 0 obj\s*(.*?)endobj", re.DOTALL)
+
+
+def contenido_paginas(ruta):
+    """Operadores de cada página, con los forms de capa fija (CapaFija*) puestos en línea."""
+    with open(ruta, "rb") as f:
+        objetos = {int(n): cuerpo for n, cuerpo in OBJETO.findall(f.read())}
+
+    def stream(n):
+        cabecera, datos = re.match(rb"(.*?)stream\r?\n(.*?)endstream", objetos[n], re.DOTALL).groups()
+        return zlib.decompress(datos) if b"FlateDecode" in cabecera else datos
+
+    formas = {
+        nombre: int(n)
+        for cuerpo in objetos.values()
+        for nombre, n in re.findall(rb"/(FormXob\.CapaFija\d+) (\d+) 0 R", cuerpo)
+    }
+    def en_linea(m):
+        # El form empieza con el mismo preámbulo que la página: se descarta su primera línea
+        return stream(formas[m.group(1)]).split(b"\n", 1)[1] + b"\n"
+
+    return [
+        re.sub(rb"/(FormXob\.CapaFija\d+) Do\n", en_linea, stream(int(re.search(rb"/Contents (\d+) 0 R", cuerpo).group(1))))
+        for _, cuerpo in sorted(objetos.items())
+        if re.search(rb"/Type /Page\b", cuerpo)
+    ]
+
+
+def verificar(lote, carpeta, logo):
+    """Documentos cuyas páginas cambian con la plantilla, por script (deben ser 0)."""
+    distintos = {}
+    for modulo, extra in ((main, ()), (mainPaquetes, ("P 1",)), (mainRPA, ())):
+        distintos[modulo.__name__] = 0
+        for ruta_logo in (logo, os.path.join(carpeta, "sin_logo.jpg")):
+            for codigo, carrera, unidad, df_convalidados, df_matriculables, df_ruta in lote:
+                textos = ("PEREZ, ANA", codigo, f"{carrera} - {unidad}", "TRUJILLO", *extra, "2025G", "ELAB", "ASISTENTE", "RESP", "COORDINADOR")
+                for generar_pdf, resto in (
+                    (modulo.generar_pdf_convalidados, (df_convalidados, ruta_logo)),
+                    (modulo.generar_pdf_proyeccion, (df_matriculables, ruta_logo, df_ruta)),
+                ):
+                    paginas = []
+                    for activa in (True, False):
+                        PLANTILLAS_PDF.activa = activa
+                        ruta = os.path.join(carpeta, f"verificar_{activa}.pdf")
+                        generar_pdf(ruta, *textos, *resto)
+                        paginas.append(contenido_paginas(ruta))
+                    distintos[modulo.__name__] += paginas[0] != paginas[1]
+    return distintos
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Capa fija PDF: por página vs plantilla por proceso")
+    parser.add_argument("--alumnos", type=int, default=200)
+    parser.add_argument("--logo", default=os.path.join(VPRO_DIR, "logo.jpg"))
+    parser.add_argument("--verificar", type=int, default=60, help="alumnos del lote a comparar con/sin plantilla")
+    args = parser.parse_args()
+    configurar_reportlab()  # como los puntos de entrada de la app
+
+    lote = preparar_lote(args.alumnos)
+    print(f"{args.alumnos} alumnos, 2 PDF cada uno, logo {os.path.relpath(args.logo, RAIZ)}")
+
+    carpeta = tempfile.mkdtemp(prefix="bench_plantillas_")
+    distintos = {}
+    try:
+        generar(lote[:5], carpeta, args.logo)  # importaciones, fuentes y logo calientes
+        resultados = {}
+        for nombre, activa in (("sin plantilla", False), ("con plantilla", True)):
+            PLANTILLAS_PDF.activa = activa
+            tiempos, tamanos, total = generar(lote, carpeta, args.logo)
+            resultados[nombre] = total
+            print(
+                f"  {nombre:<13} {2 * len(lote) / total:7.1f} PDF/s  por alumno p50={percentil(tiempos, 50):6.2f} "
+                f"p95={percentil(tiempos, 95):6.2f} ms  PDF medio={sum(tamanos) / len(tamanos) / 1024:6.1f} KB"
+            )
+        print(f"  x{resultados['sin plantilla'] / resultados['con plantilla']:.2f} en el lote")
+
+        distintos = verificar(lote[:args.verificar], carpeta, args.logo)
+        print("  páginas distintas con/sin plantilla: " + ", ".join(f"{k}={v}" for k, v in distintos.items()))
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return 1 if any(distintos.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,84 @@
+# =========================================================
+# BENCHMARK: PDFs de un lote de mainRPA — en serie vs pool de procesos
+# Arma un lote sintético (alumnos repartidos entre los slices del dataset, CRD
+# variados), resuelve sus planes como run_batch y genera los dos PDF por alumno con
+# renderizar_lote para cada cantidad de procesos. Verifica que todos terminan sin
+# error y con los mismos archivos. Reporta PDFs/s y la aceleración contra la serie.
+# En una máquina de un núcleo no hay aceleración que medir: solo el costo del pool.
+#
+#   python benchmarks/bench_pool_pdf.py [--alumnos 400] [--procesos 1,2,4,8]
+# =========================================================
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from comun import VPRO_DIR
+
+import mainRPA
+from datos_convalidacion import IndiceDataset
+from pdf_convalidacion import configurar_reportlab
+
+
+def preparar_trabajos(alumnos, carpeta, logo):
+    indice = IndiceDataset(mainRPA.cargar_dataset())
+    resolver, calculos = mainRPA.crear_resolvedor_lote(indice)
+    claves = list(indice._posiciones)
+    trabajos = []
+    for i in range(alumnos):
+        carrera, unidad = claves[i % len(claves)]
+        crd = float((i * 12) % 96)
+        resolver(carrera, unidad, crd)
+        codigo = f"N{i:05d}"
+        textos = ("PEREZ, ANA", codigo, f"{carrera} - {unidad}", "TRUJILLO", "2025G", "ELAB", "ASISTENTE", "RESP", "COORDINADOR")
+        trabajos.append((
+            i + 1, (carrera, unidad, crd),
+            os.path.join(carpeta, f"Resultado_Convalidacion_{codigo}.pdf"),
+            os.path.join(carpeta, f"Proyeccion_Malla_{codigo}.pdf"),
+            textos, logo,
+        ))
+    return trabajos, mainRPA.planes_para_pdf(calculos)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="PDFs del lote: serie vs ProcessPoolExecutor")
+    parser.add_argument("--alumnos", type=int, default=400)
+    parser.add_argument("--procesos", default=f"1,2,4,{os.cpu_count() or 1}")
+    parser.add_argument("--logo", default=os.path.join(VPRO_DIR, "logo.jpg"))
+    args = parser.parse_args()
+    configurar_reportlab()  # como los puntos de entrada de la app
+    cantidades = sorted({int(x) for x in args.procesos.split(",") if x.strip()})
+
+    carpeta = tempfile.mkdtemp(prefix="bench_pool_pdf_")
+    try:
+        trabajos, planes = preparar_trabajos(args.alumnos, carpeta, args.logo)
+        print(f"{args.alumnos} alumnos, 2 PDF cada uno, {len(planes)} planes, {os.cpu_count()} núcleos")
+        list(mainRPA.renderizar_lote(trabajos[:5], planes, 1))  # importaciones, fuentes y logo calientes
+
+        errores = 0
+        serie = None
+        for procesos in cantidades:
+            t0 = time.perf_counter()
+            resultados = list(mainRPA.renderizar_lote(trabajos, planes, procesos))
+            total = time.perf_counter() - t0
+            fallidos = sum(error is not None for _, error in resultados)
+            faltan = sum(not os.path.exists(t[2]) or not os.path.exists(t[3]) for t in trabajos)
+            errores += fallidos + faltan + (len(resultados) != len(trabajos))
+            serie = serie or total
+            print(
+                f"  procesos={procesos:<3} {2 * len(trabajos) / total:7.1f} PDF/s  total={total:6.2f} s  "
+                f"x{serie / total:.2f}  fallidos={fallidos} sin archivo={faltan}"
+            )
+            for t in trabajos:
+                os.remove(t[2])
+                os.remove(t[3])
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
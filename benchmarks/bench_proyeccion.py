@@ -0,0 +1,111 @@
+# =========================================================
+# BENCHMARK: proyección por periodos hasta el egreso (ProyeccionMalla / hoja_de_ruta)
+# Proyecta una cohorte sintética (alumnos repartidos entre todos los slices del
+# dataset con CRD al azar) y verifica en cada hoja de ruta:
+#   - cada curso proyectado tiene su requisito aprobado en un periodo anterior
+#     (o convalidado), con las reglas de calcular_matriculables;
+#   - ningún periodo supera el tope de CR (salvo un curso solo que ya lo supera);
+#   - el periodo 1 está dentro de los matriculables;
+#   - convalidados + proyectados + bloqueados = la malla completa.
+# Mide el armado de los DAG (una vez por slice) y alumnos/s de la cohorte.
+#
+#   python benchmarks/bench_proyeccion.py [--alumnos 5000] [--tope 22]
+# =========================================================
+
+import argparse
+import random
+import sys
+import time
+
+from comun import percentil
+
+import main
+from datos_convalidacion import IndiceDataset, hoja_de_ruta, marcar_matriculables
+from motor_convalidacion import expresion_requisito, nombres_protegidos
+
+
+def errores_hoja(df_conva, df_convalidados, df_ruta, tope):
+    errores = []
+    if len(df_convalidados) + len(df_ruta) != len(df_conva):
+        errores.append("cobertura")
+    aprobados = {str(x).upper().strip() for x in df_convalidados["CURSO"].tolist()}
+    protegidos = nombres_protegidos(df_conva["CURSO"].tolist())
+    por_periodo = {}
+    for periodo, curso, req, cr in zip(df_ruta["PERIODO"], df_ruta["CURSO"], df_ruta["REQUISITOS"], df_ruta["CR"]):
+        if periodo:
+            por_periodo.setdefault(periodo, []).append((str(curso).upper().strip(), req, main.cr_entero(cr)))
+    for periodo in sorted(por_periodo):
+        cursos = por_periodo[periodo]
+        if len(cursos) > 1 and sum(cr for _, _, cr in cursos) > tope:
+            errores.append(f"tope periodo {periodo}")
+        for _, req, _ in cursos:
+            terminos = expresion_requisito(req, protegidos)
+            if terminos is not None and not any(t <= aprobados for t in terminos):
+                errores.append(f"requisito periodo {periodo}")
+        aprobados.update(nombre for nombre, _, _ in cursos)
+    return errores
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Proyección multi-periodo de una cohorte")
+    parser.add_argument("--alumnos", type=int, default=5000)
+    parser.add_argument("--tope", type=int, default=main.CREDITOS_POR_PERIODO)
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    indice = IndiceDataset(main.cargar_dataset())
+    claves = list(indice._posiciones)
+
+    t0 = time.perf_counter()
+    for c, u in claves:
+        indice.proyeccion(c, u)
+    t_dag = (time.perf_counter() - t0) * 1000
+    ciclicos = sum(indice.proyeccion(c, u).ciclicos for c, u in claves)
+    print(f"{len(claves)} slices: DAG + clausuras armados en {t_dag:.1f} ms  cursos en ciclos de requisitos={ciclicos}")
+
+    # Selección (ya cacheada en producción) fuera de la medición: solo cuesta la proyección
+    rnd = random.Random(args.semilla)
+    casos = {}
+    cohorte = []
+    for _ in range(args.alumnos):
+        c, u = rnd.choice(claves)
+        crd = float(rnd.choice(range(0, 121, 6)))
+        if (c, u, crd) not in casos:
+            df_conva = indice.filas(c, u)
+            seleccion, _ = main.seleccionar_convalidacion_cache(df_conva, c, u, crd, tolerancia=2)
+            casos[(c, u, crd)] = (df_conva, df_conva.loc[seleccion].copy())
+        cohorte.append((c, u, crd))
+
+    errores, periodos, tiempos = 0, [], []
+    t_total = time.perf_counter()
+    for c, u, crd in cohorte:
+        df_conva, df_convalidados = casos[(c, u, crd)]
+        t0 = time.perf_counter()
+        df_ruta = hoja_de_ruta(df_conva, df_convalidados, indice.proyeccion(c, u), args.tope)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        periodos.append(int(df_ruta["PERIODO"].max()) if not df_ruta.empty else 0)
+    t_total = time.perf_counter() - t_total
+
+    for df_conva, df_convalidados in casos.values():
+        df_ruta = hoja_de_ruta(df_conva, df_convalidados, None, args.tope)
+        problemas = errores_hoja(df_conva, df_convalidados, df_ruta, args.tope)
+        df_resultado = df_conva.copy()
+        df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+        df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
+        _, df_matri = marcar_matriculables(df_resultado, df_convalidados)
+        if not set(df_ruta.index[df_ruta["PERIODO"] == 1]) <= set(df_matri.index):
+            problemas.append("periodo 1 fuera de matriculables")
+        errores += bool(problemas)
+
+    print(
+        f"cohorte={args.alumnos} alumnos ({len(casos)} casos distintos)  tope={args.tope} CR  "
+        f"hojas con errores={errores}\n"
+        f"  por alumno p50={percentil(tiempos, 50):.3f} p95={percentil(tiempos, 95):.3f} ms  "
+        f"total={t_total:.2f} s ({args.alumnos / t_total:,.0f} alumnos/s)  "
+        f"periodos hasta el egreso p50={percentil(periodos, 50)} máx={max(periodos)}"
+    )
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,211 @@
+# =========================================================
+# BENCHMARK: PUEDE_MATRICULAR — re.split + iterrows por solicitud vs REQUISITOS compilados
+# Raíz (main.py): el IndiceRequisitos del dataset (curso -> bit, requisitos -> predicado
+# Y/O) contra la versión anterior con pandas. V_Pro: MallaCatalog.puede_matricular contra
+# la versión anterior sobre listas.
+# Verifica, en todos los slices/grupos y para varios CRD, que lo compilado coincide con
+# evaluar la gramática fila a fila (referencia), y cuenta las filas que cambian respecto
+# de la versión anterior ("A + B" ahora exige ambos; nombres con coma se leen enteros;
+# "A (COD)" se compara como A): esas filas deben tener "+", "(" o un nombre protegido.
+# Mide la latencia por solicitud y el costo de un lote (todas las solicitudes seguidas).
+#
+#   python benchmarks/bench_requisitos.py [--crds 0,12,24,60,120]
+# =========================================================
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+from comun import VPRO_DIR, cargar_vpro, percentil
+
+import main
+from datos_convalidacion import IndiceDataset
+from motor_convalidacion import expresion_requisito
+
+VPRO = cargar_vpro()
+
+
+def matriculables_anterior(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame):
+    """Implementación anterior de calcular_matriculables (main.py / mainPaquetes.py / mainRPA.py)."""
+    if "REQUISITOS" not in df_resultado.columns:
+        df_resultado["PUEDE_MATRICULAR"] = False
+        return df_resultado, df_resultado[df_resultado["PUEDE_MATRICULAR"]]
+
+    cursos_ok = set(df_convalidados["CURSO"].astype(str).str.upper().str.strip().tolist())
+
+    def cumple_req(req):
+        if req is None:
+            return True
+        req = str(req).strip()
+        if req == "" or req.lower() == "nan":
+            return True
+        partes = [p.strip().upper() for p in re.split(r"[;,/]", req) if p.strip()]
+        return any(r in cursos_ok for r in partes)
+
+    puede = []
+    for _, row in df_resultado.iterrows():
+        if row.get("ESTADO_CONVALIDACION") == "CONVALIDADO":
+            puede.append(False)
+        else:
+            puede.append(cumple_req(row.get("REQUISITOS")))
+
+    df_resultado["PUEDE_MATRICULAR"] = puede
+    return df_resultado, df_resultado[df_resultado["PUEDE_MATRICULAR"]].copy()
+
+
+def matriculables_referencia(df_resultado, df_convalidados, protegidos):
+    """La gramática evaluada fila a fila con conjuntos de nombres."""
+    aprobados = set(df_convalidados["CURSO"].astype(str).str.upper().str.strip().tolist())
+    return [
+        estado != "CONVALIDADO"
+        and (lambda t: t is None or any(x <= aprobados for x in t))(expresion_requisito(req, protegidos))
+        for estado, req in zip(df_resultado["ESTADO_CONVALIDACION"], df_resultado["REQUISITOS"])
+    ]
+
+
+def cambio_esperado(req, protegidos) -> bool:
+    texto = str(req).upper()
+    return "+" in texto or "(" in texto or any(n in texto for n in protegidos)
+
+
+def medir(fn, casos):
+    tiempos = []
+    t_total = time.perf_counter()
+    for caso in casos:
+        t0 = time.perf_counter()
+        fn(*caso)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return tiempos, time.perf_counter() - t_total
+
+
+def casos_raiz(crds):
+    indice = IndiceDataset(main.cargar_dataset())
+    casos = []
+    for carrera, unidad in indice._posiciones:
+        df_conva = indice.filas(carrera, unidad)
+        for crd in crds:
+            seleccion, _ = main.seleccionar_convalidacion_cache(df_conva, carrera, unidad, crd, tolerancia=2)
+            df_convalidados = df_conva.loc[seleccion].copy()
+            df_resultado = df_conva.copy()
+            df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+            df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
+            casos.append((df_resultado, df_convalidados))
+    return indice, casos
+
+
+def casos_vpro(crds):
+    repo = VPRO.DatasetRepository(os.path.join(VPRO_DIR, VPRO.DATASET_FILE))
+    catalog = repo.malla_catalog()
+    casos = []
+    for key in catalog.grupos:
+        rows = catalog.cursos(key)
+        for crd in crds:
+            elegidos = set(VPRO.seleccionar_convalidacion(rows, crd, VPRO.TOLERANCIA_CRD)["seleccion"])
+            casos.append((rows, elegidos))
+    return catalog, casos
+
+
+def vpro_anterior(rows, elegidos):
+    """Versión anterior de calcular_matriculables en V_Pro (todo "alguno de", re.split por fila)."""
+    convalidados = [dict(r) for i, r in enumerate(rows) if i in elegidos]
+    cursos_ok = {str(r.get("CURSO", "")).strip().upper() for r in convalidados if str(r.get("CURSO", "")).strip()}
+    out = []
+    for i, r in enumerate(rows):
+        req = str(r.get("REQUISITOS", "")).strip()
+        if i in elegidos:
+            continue
+        if req and req.lower() != "nan":
+            partes = [x.strip().upper() for x in re.split(r"[;,/]", req) if x.strip()]
+            if partes and not any(p in cursos_ok for p in partes):
+                continue
+        row = dict(r)
+        row["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+        row["PUEDE_MATRICULAR"] = True
+        out.append(row)
+    return out
+
+
+def vpro_referencia(rows, elegidos):
+    convalidados = [dict(r) for i, r in enumerate(rows) if i in elegidos]
+    resultado = []
+    for i, r in enumerate(rows):
+        row = dict(r)
+        row["ESTADO_CONVALIDACION"] = "CONVALIDADO" if i in elegidos else "NO CONVALIDADO"
+        resultado.append(row)
+    return VPRO.calcular_matriculables(resultado, convalidados)
+
+
+def vpro_compilado(catalog, rows, elegidos):
+    puede = catalog.puede_matricular([r.pos for r in rows], elegidos)
+    out = []
+    for r, ok in zip(rows, puede):
+        if ok:
+            row = dict(r)
+            row["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+            row["PUEDE_MATRICULAR"] = True
+            out.append(row)
+    return out
+
+
+def reportar(nombre, n, antes, despues, distintos, cambios, inesperados):
+    (ta, sa), (tb, sb) = antes, despues
+    print(
+        f"  {nombre:<6} {n:5d} solicitudes  distintos de la referencia={distintos}  "
+        f"filas que cambian vs anterior={cambios} (sin '+', '(' ni nombre protegido: {inesperados})\n"
+        f"         anterior p50={percentil(ta, 50):7.3f} ms lote={sa * 1000:8.1f} ms | "
+        f"compilado p50={percentil(tb, 50):7.3f} ms lote={sb * 1000:8.1f} ms | x{sa / sb:.1f}"
+    )
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="PUEDE_MATRICULAR: parseo por solicitud vs requisitos compilados")
+    parser.add_argument("--crds", default="0,12,24,60,120")
+    args = parser.parse_args()
+    crds = [float(x) for x in args.crds.split(",") if x.strip()]
+
+    t0 = time.perf_counter()
+    indice, casos = casos_raiz(crds)
+    print(f"raíz: dataset indexado (con requisitos) en {(time.perf_counter() - t0) * 1000:.1f} ms")
+    protegidos = indice.requisitos.protegidos
+    distintos = cambios = inesperados = 0
+    for df_r, df_c in casos:
+        nuevo = main.calcular_matriculables(df_r.copy(), df_c, indice.requisitos)[0]["PUEDE_MATRICULAR"].tolist()
+        anterior = matriculables_anterior(df_r.copy(), df_c)[0]["PUEDE_MATRICULAR"].tolist()
+        distintos += nuevo != matriculables_referencia(df_r, df_c, protegidos)
+        for a, b, req in zip(anterior, nuevo, df_r["REQUISITOS"]):
+            if a != b:
+                cambios += 1
+                inesperados += not cambio_esperado(req, protegidos)
+    reportar(
+        "raíz", len(casos),
+        medir(lambda r, c: matriculables_anterior(r.copy(), c), casos),
+        medir(lambda r, c: main.calcular_matriculables(r.copy(), c, indice.requisitos), casos),
+        distintos, cambios, inesperados,
+    )
+    errores = distintos + inesperados
+
+    catalog, casos = casos_vpro(crds)
+    protegidos = VPRO.protected_course_names(catalog.values["CURSO"])
+    distintos = cambios = inesperados = 0
+    for rows, el in casos:
+        nuevo = vpro_compilado(catalog, rows, el)
+        distintos += nuevo != vpro_referencia(rows, el)
+        antes = {(r["CURSO"], r["REQUISITOS"]) for r in vpro_anterior(rows, el)}
+        for _, req in antes ^ {(r["CURSO"], r["REQUISITOS"]) for r in nuevo}:
+            cambios += 1
+            inesperados += not cambio_esperado(req, protegidos)
+    reportar(
+        "V_Pro", len(casos),
+        medir(vpro_anterior, casos),
+        medir(lambda rows, el: vpro_compilado(catalog, rows, el), casos),
+        distintos, cambios, inesperados,
+    )
+    return 1 if errores or distintos or inesperados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,70 @@
+# =========================================================
+# MICRO-BENCHMARK: seleccionar_convalidacion (main.py)
+# Compara la versión DataFrame original con el camino rápido sobre enteros,
+# usando los slices reales de dataset.xlsx.
+#
+#   python benchmarks/bench_seleccion.py [--crds 0,12,24,...] [--repeticiones 3]
+# =========================================================
+
+import argparse
+import statistics
+import sys
+import time
+
+from comun import percentil
+
+import main
+
+
+def medir(funcion, casos, repeticiones):
+    tiempos = []
+    resultados = []
+    for df_conva, crd in casos:
+        mejor = None
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            res = funcion(df_conva, crd, tolerancia=2)
+            dt = time.perf_counter() - t0
+            mejor = dt if mejor is None else min(mejor, dt)
+        tiempos.append(mejor * 1000)
+        resultados.append(res)
+    return tiempos, resultados
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de seleccionar_convalidacion")
+    parser.add_argument("--crds", default="0,6,12,24,36,48,72,96,120,160,200")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    crds = [int(x) for x in args.crds.split(",") if x.strip()]
+    df_base = main.cargar_dataset()
+
+    casos = []
+    for (_, _), df_conva in df_base.groupby(["CARRERA", "UNID. NEGOCIO"], sort=False):
+        for crd in crds:
+            casos.append((df_conva.copy(), crd))
+
+    print(f"slices={len(casos) // max(1, len(crds))}  crds={crds}  llamadas={len(casos)}  repeticiones={args.repeticiones}")
+    print(f"{'versión':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'media ms':>10}{'total s':>10}")
+
+    filas = {}
+    for nombre, funcion in (
+        ("DataFrame (antes)", main.seleccionar_convalidacion_df),
+        ("enteros (después)", main.seleccionar_convalidacion),
+    ):
+        tiempos, resultados = medir(funcion, casos, args.repeticiones)
+        filas[nombre] = resultados
+        print(
+            f"{nombre:<22}{percentil(tiempos, 50):>10.3f}{percentil(tiempos, 95):>10.3f}"
+            f"{percentil(tiempos, 99):>10.3f}{statistics.mean(tiempos):>10.3f}{sum(tiempos) / 1000:>10.2f}"
+        )
+
+    antes, despues = filas.values()
+    distintos = sum(1 for a, b in zip(antes, despues) if list(a[0]) != list(b[0]) or a[1] != b[1])
+    print(f"resultados distintos: {distintos} de {len(casos)}")
+    return 1 if distintos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,253 @@
+# =========================================================
+# SUITE DE BENCHMARK: SELECCIÓN DE CONVALIDACIÓN EN LOS 4 PUNTOS DE ENTRADA
+#   main.py, mainPaquetes.py, mainRPA.py y V_Pro/main_flet_convalidacion.py
+#
+# Fuentes de casos:
+#   - real:       slices (CARRERA, UNID. NEGOCIO) de dataset.xlsx
+#   - real_vpro:  slices (CARRERA, UNID_NEGOCIO, MALLA) de V_Pro/dataset.xlsx
+#   - sint_<n>:   mallas sintéticas de n cursos (semilla fija)
+# Para cada slice se barre el CRD de 0 al total de créditos.
+#
+# Reporta latencia por llamada (p50/p95/p99/máx), pico de memoria (tracemalloc)
+# y equivalencia de resultados contra main.py. Sin red; el JSON de salida lleva
+# el commit para comparar corridas:
+#
+#   python benchmarks/bench_suite.py --salida base.json
+#   python benchmarks/bench_suite.py --comparar base.json
+# =========================================================
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from comun import RAIZ, VPRO_DIR, cargar_vpro, commit_actual, percentil
+
+import main
+import mainPaquetes
+import mainRPA
+
+VPRO = cargar_vpro()
+
+TOLERANCIA = 2
+
+
+# =========================================================
+# PUNTOS DE ENTRADA
+# Todos reciben (filas, df) del mismo slice y devuelven (posiciones, suma).
+# =========================================================
+def _desde_etiquetas(funcion):
+    def correr(filas, df, crd):
+        seleccion, suma = funcion(df, crd, tolerancia=TOLERANCIA)
+        return df.index.get_indexer(seleccion).tolist(), int(suma)
+    return correr
+
+
+def _vpro(filas, df, crd):
+    res = VPRO.seleccionar_convalidacion(filas, crd, TOLERANCIA)
+    return list(res["seleccion"]), int(res["suma"])
+
+
+PUNTOS_ENTRADA = {
+    "main": _desde_etiquetas(main.seleccionar_convalidacion),
+    "main_df": _desde_etiquetas(main.seleccionar_convalidacion_df),
+    "mainPaquetes": _desde_etiquetas(mainPaquetes.seleccionar_convalidacion),
+    "mainRPA": _desde_etiquetas(mainRPA.seleccionar_convalidacion),
+    "vpro": _vpro,
+}
+REFERENCIA = "main"
+
+
+# =========================================================
+# FUENTES DE CASOS
+# Cada slice es (nombre, filas) con filas = [{"CICLO", "CR", "CURSO"}, ...]
+# =========================================================
+def slices_reales():
+    df = main.cargar_dataset()
+    for (carrera, unidad), grupo in df.groupby(["CARRERA", "UNID. NEGOCIO"], sort=False):
+        filas = grupo[["CICLO", "CR", "CURSO"]].to_dict("records")
+        yield f"{carrera} | {unidad}", filas
+
+
+def slices_vpro():
+    repo = VPRO.DatasetRepository(f"{VPRO_DIR}/{VPRO.DATASET_FILE}")
+    df = repo.read_sheet(VPRO.SHEET_MALLA)
+    df["_MALLA"] = df["MALLA"].map(VPRO.normalize_malla_value)
+    df["_CICLO_NUM"] = df["CICLO"].map(VPRO.extract_cycle_number)
+    df["_UBI"] = df["UBICACION_EN_EL_CICLO"].map(VPRO.number_safe)
+    for (carrera, unidad, malla), grupo in df.groupby(["CARRERA", "UNID_NEGOCIO", "_MALLA"], sort=False):
+        grupo = grupo.sort_values(["_CICLO_NUM", "_UBI"])
+        filas = [{"CICLO": r["CICLO"], "CR": VPRO.number_safe(r["CR"]), "CURSO": r["CURSO"]} for _, r in grupo.iterrows()]
+        yield f"{carrera} | {unidad} | {malla}", filas
+
+
+def slices_sinteticos(n_cursos: int, n_mallas: int, semilla: int):
+    rnd = random.Random(semilla * 100003 + n_cursos)
+    n_ciclos = max(1, min(10, n_cursos // 6))
+    for k in range(n_mallas):
+        filas = []
+        for i in range(n_cursos):
+            if rnd.random() < 0.03:
+                ciclo = "ELECTIVO"
+            else:
+                ciclo = f"CICLO {1 + i * n_ciclos // n_cursos}"
+            cr = rnd.choice([0, 1, 2, 2, 3, 3, 3, 4, 4, 5, 6])
+            filas.append({"CICLO": ciclo, "CR": cr, "CURSO": f"CURSO {k}-{i}"})
+        yield f"sint_{n_cursos} #{k}", filas
+
+
+def total_creditos(filas) -> int:
+    from motor_convalidacion import ciclo_numero, cr_entero
+    return sum(cr_entero(f["CR"]) for f in filas if ciclo_numero(f["CICLO"]) > 0 and cr_entero(f["CR"]) > 0)
+
+
+def barrido_crd(total: int, puntos: int):
+    """CRD de 0 a total (+ tolerancia); con puntos > 0 se muestrean como máximo esos valores."""
+    tope = total + TOLERANCIA
+    if puntos <= 0 or tope + 1 <= puntos:
+        return list(range(tope + 1))
+    paso = tope / (puntos - 1)
+    return sorted({round(i * paso) for i in range(puntos)})
+
+
+# =========================================================
+# MEDICIÓN
+# =========================================================
+def medir_fuente(nombre_fuente, slices, puntos, repeticiones, muestra_memoria, entradas):
+    casos = []
+    for nombre_slice, filas in slices:
+        df = pd.DataFrame(filas)
+        for crd in barrido_crd(total_creditos(filas), puntos):
+            casos.append((nombre_slice, filas, df, crd))
+
+    resultado = {"casos": len(casos), "slices": len({c[0] for c in casos}), "entradas": {}}
+    salidas = {}
+
+    for nombre in entradas:
+        correr = PUNTOS_ENTRADA[nombre]
+        tiempos = []
+        salidas[nombre] = []
+        for _, filas, df, crd in casos:
+            mejor = None
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                res = correr(filas, df, crd)
+                dt = time.perf_counter() - t0
+                mejor = dt if mejor is None or dt < mejor else mejor
+            tiempos.append(mejor * 1000)
+            salidas[nombre].append(res)
+
+        paso = max(1, len(casos) // muestra_memoria) if muestra_memoria > 0 else 0
+        pico = 0
+        if paso:
+            for _, filas, df, crd in casos[::paso]:
+                tracemalloc.start()
+                correr(filas, df, crd)
+                pico = max(pico, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+        resultado["entradas"][nombre] = {
+            "p50_ms": percentil(tiempos, 50),
+            "p95_ms": percentil(tiempos, 95),
+            "p99_ms": percentil(tiempos, 99),
+            "max_ms": max(tiempos, default=0.0),
+            "total_s": sum(tiempos) / 1000,
+            "pico_memoria_kb": pico / 1024,
+        }
+
+    ref = salidas.get(REFERENCIA)
+    for nombre, res in salidas.items():
+        if ref is None:
+            break
+        misma_suma = sum(1 for a, b in zip(ref, res) if a[1] == b[1])
+        misma_seleccion = sum(1 for a, b in zip(ref, res) if a[1] == b[1] and sorted(a[0]) == sorted(b[0]))
+        resultado["entradas"][nombre]["misma_suma"] = misma_suma
+        resultado["entradas"][nombre]["misma_seleccion"] = misma_seleccion
+        resultado["entradas"][nombre]["ejemplos_distintos"] = [
+            {"slice": casos[i][0], "crd": casos[i][3], "referencia": ref[i][1], "obtenido": res[i][1]}
+            for i in range(len(casos)) if ref[i][1] != res[i][1]
+        ][:5]
+
+    print(f"\n[{nombre_fuente}] slices={resultado['slices']} casos={resultado['casos']}")
+    print(f"{'entrada':<14}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'total s':>9}{'pico KB':>10}{'=suma':>8}{'=sel':>8}")
+    for nombre, r in resultado["entradas"].items():
+        print(
+            f"{nombre:<14}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}{r['max_ms']:>9.2f}"
+            f"{r['total_s']:>9.2f}{r['pico_memoria_kb']:>10.1f}{r.get('misma_suma', 0):>8}{r.get('misma_seleccion', 0):>8}"
+        )
+    return resultado
+
+
+def comparar(actual, base):
+    print(f"\nComparación contra {base.get('commit') or '?'} (p50 actual / p50 base):")
+    for fuente, datos in actual["fuentes"].items():
+        previo = base.get("fuentes", {}).get(fuente)
+        if not previo:
+            continue
+        for nombre, r in datos["entradas"].items():
+            p = previo["entradas"].get(nombre)
+            if not p or not p["p50_ms"]:
+                continue
+            print(f"  {fuente:<12}{nombre:<14}{r['p50_ms']:>9.3f} / {p['p50_ms']:>9.3f} ms  x{r['p50_ms'] / p['p50_ms']:.2f}")
+
+
+def main_suite():
+    parser = argparse.ArgumentParser(description="Suite de benchmark de la selección de convalidación")
+    parser.add_argument("--fuentes", default="real,real_vpro,sint", help="real, real_vpro, sint")
+    parser.add_argument("--tamanos", default="10,30,100,300,1000", help="cursos por malla sintética")
+    parser.add_argument("--mallas", type=int, default=3, help="mallas sintéticas por tamaño")
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--puntos", type=int, default=25, help="CRD por slice (0 = barrido completo)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--memoria", type=int, default=50, help="llamadas muestreadas con tracemalloc por entrada (0 = no medir)")
+    parser.add_argument("--entradas", default=",".join(PUNTOS_ENTRADA))
+    parser.add_argument("--salida", help="guardar resultados en JSON")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    entradas = [e for e in args.entradas.split(",") if e in PUNTOS_ENTRADA]
+    if REFERENCIA in PUNTOS_ENTRADA and REFERENCIA not in entradas:
+        entradas.insert(0, REFERENCIA)
+    fuentes = [f.strip() for f in args.fuentes.split(",") if f.strip()]
+
+    informe = {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "parametros": vars(args),
+        "fuentes": {},
+    }
+    print(f"commit={informe['commit'] or '-'} python={informe['python']} pandas={informe['pandas']} raiz={RAIZ}")
+
+    if "real" in fuentes:
+        informe["fuentes"]["real"] = medir_fuente("real", slices_reales(), args.puntos, args.repeticiones, args.memoria, entradas)
+    if "real_vpro" in fuentes:
+        informe["fuentes"]["real_vpro"] = medir_fuente("real_vpro", slices_vpro(), args.puntos, args.repeticiones, args.memoria, entradas)
+    if "sint" in fuentes:
+        for n in (int(x) for x in args.tamanos.split(",") if x.strip()):
+            clave = f"sint_{n}"
+            informe["fuentes"][clave] = medir_fuente(
+                clave, slices_sinteticos(n, args.mallas, args.semilla), args.puntos, args.repeticiones, args.memoria, entradas
+            )
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(informe, json.load(f))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_suite())
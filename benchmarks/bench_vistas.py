@@ -0,0 +1,71 @@
+# =========================================================
+# BENCHMARK: vistas de solo lectura vs copias de hoja en DatasetRepository (V_Pro)
+# Simula eventos de UI (búsqueda de institución, cambio de carrera/malla,
+# vista previa) y reporta los contadores de asignación del repositorio,
+# el pico de memoria (tracemalloc) y el tiempo por evento.
+#
+#   python benchmarks/bench_vistas.py [--eventos 200]
+# =========================================================
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from comun import VPRO_DIR, cargar_vpro, percentil
+
+VPRO = cargar_vpro()
+
+
+def eventos_ui(repo, n):
+    df = repo.read_sheet(VPRO.SHEET_MALLA)
+    claves = list(dict.fromkeys(zip(df["CARRERA"], df["UNID_NEGOCIO"], df["MALLA"])))
+    consultas = ["u", "un", "uni", "univ", "insti", "colegio", "san"]
+    for i in range(n):
+        carrera, unidad, malla = claves[i % len(claves)]
+        q = consultas[i % len(consultas)]
+        yield "buscar", lambda q=q: repo.search_instituciones(q)
+        yield "unidades", lambda c=carrera, m=malla: repo.get_unidades_by_carrera_and_malla(c, m)
+        yield "preview", lambda c=carrera, u=unidad, m=malla: repo.get_malla_preview(c, u, m)
+
+
+def medir(modo, n):
+    repo = VPRO.DatasetRepository(os.path.join(VPRO_DIR, VPRO.DATASET_FILE))
+    if modo == "copia":
+        repo.sheet_view = repo.read_sheet  # comportamiento anterior: copia profunda por llamada
+    eventos = list(eventos_ui(repo, n))
+    for _, accion in eventos[:3]:
+        accion()  # carga de hojas fuera de la medición
+    repo.alloc_stats.update(views=0, copies=0, copied_bytes=0)
+
+    tiempos = {}
+    tracemalloc.start()
+    for tipo, accion in eventos:
+        t0 = time.perf_counter()
+        accion()
+        tiempos.setdefault(tipo, []).append((time.perf_counter() - t0) * 1000)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tiempos, repo.allocation_stats(), pico
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Vistas de hoja vs copias en DatasetRepository")
+    parser.add_argument("--eventos", type=int, default=100)
+    args = parser.parse_args()
+
+    for modo in ("copia", "vista"):
+        tiempos, stats, pico = medir(modo, args.eventos)
+        print(
+            f"\n[{modo}] vistas={stats['views']} copias={stats['copies']} "
+            f"MB copiados={stats['copied_bytes'] / 1e6:.1f} pico tracemalloc={pico / 1e6:.1f} MB"
+        )
+        for tipo, valores in tiempos.items():
+            print(f"  {tipo:<10} p50={percentil(valores, 50):8.2f} ms  p95={percentil(valores, 95):8.2f} ms  media={statistics.mean(valores):8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
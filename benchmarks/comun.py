@@ -0,0 +1,44 @@
+# =========================================================
+# UTILIDADES COMPARTIDAS POR LOS BENCHMARKS
+# =========================================================
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VPRO_DIR = os.path.join(RAIZ, "V_Pro")
+
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    k = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[k]
+
+
+def cargar_vpro():
+    """Importa V_Pro/main_flet_convalidacion.py como módulo (sin abrir la UI)."""
+    nombre = "main_flet_convalidacion"
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(VPRO_DIR, f"{nombre}.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def commit_actual() -> str:
+    """Hash corto del commit (con '+' si hay cambios sin commitear); '' fuera de git."""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, timeout=10)
+        sucio = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return rev.stdout.strip() + ("+" if sucio.stdout.strip() else "")
@@ -0,0 +1,370 @@
+# =========================================================
+# DATOS DE CONVALIDACIÓN (compartido por main.py, mainPaquetes.py y mainRPA.py)
+# Puente entre el DataFrame del dataset y el motor de enteros.
+# =========================================================
+
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from motor_convalidacion import CREDITOS_POR_PERIODO, IndiceRequisitos, ProyeccionMalla, TablaCRD, firma_archivo, hash_archivo
+
+try:
+    import pyarrow  # noqa: F401  (habilita Feather)
+except ImportError:  # pragma: no cover - pyarrow es opcional
+    pyarrow = None
+
+USAR_CACHE_DATASET = os.environ.get("CONVA_CACHE_DATASET", "1") != "0"
+RECARGA_DATASET = os.environ.get("CONVA_RECARGA_DATASET", "1") != "0"
+INTERVALO_RECARGA = float(os.environ.get("CONVA_RECARGA_INTERVALO", "2"))
+ARCHIVO_TIEMPOS_CARGA = "tiempos_carga.csv"
+
+
+def slices_dataset(df: pd.DataFrame, col_carrera: str = "CARRERA", col_unidad: str = "UNID. NEGOCIO", col_malla: str = None):
+    """
+    Itera (clave, crs, ciclos) por cada (carrera, unidad[, malla]) respetando el
+    orden de filas del dataset, con las mismas conversiones que seleccionar_convalidacion.
+    """
+    if df.empty:
+        return
+
+    crs = pd.to_numeric(df["CR"], errors="coerce").fillna(0).astype(int).to_numpy()
+    ciclos = df["CICLO"].astype(str).str.extract(r"(\d+)")[0].fillna(0).astype(int).to_numpy()
+
+    carrera = df[col_carrera].astype(str).str.strip().str.upper()
+    unidad = df[col_unidad].astype(str).str.strip().str.upper()
+    malla = df[col_malla].astype(str).str.strip().str.upper() if col_malla else pd.Series("", index=df.index)
+
+    grupos = pd.DataFrame({"c": carrera.to_numpy(), "u": unidad.to_numpy(), "m": malla.to_numpy()})
+    for (c, u, m), posiciones in grupos.groupby(["c", "u", "m"], sort=False).indices.items():
+        yield TablaCRD.clave(c, u, m), crs[posiciones].tolist(), ciclos[posiciones].tolist()
+
+
+def preparar_tabla_crd(tabla: TablaCRD, df: pd.DataFrame) -> bool:
+    """Carga la tabla CRD persistida o la reconstruye desde df. True si se reconstruyó."""
+    return tabla.preparar(lambda: slices_dataset(df))
+
+
+# =========================================================
+# ÍNDICE (CARRERA, UNIDAD) -> FILAS
+# =========================================================
+COLUMNAS_CLAVE = ("CARRERA", "UNID. NEGOCIO")
+
+
+def categorizar_claves(df: pd.DataFrame, columnas=COLUMNAS_CLAVE) -> pd.DataFrame:
+    """Guarda las columnas clave como categóricas (códigos enteros + tabla de valores), sobre el mismo df."""
+    for col in columnas:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+class IndiceDataset:
+    """
+    Índice (carrera, unidad) -> posiciones de fila, armado una vez por versión del dataset
+    sobre las columnas clave categóricas. Un slice es un dict + un take, sin comparar
+    cadenas sobre toda la tabla en cada solicitud.
+    Mismas filas y mismo orden que df[(df[CARRERA] == c) & (df[UNID. NEGOCIO] == u)].
+    requisitos: IndiceRequisitos del dataset (por etiqueta de fila), o None sin CURSO/REQUISITOS.
+    proyeccion(c, u): DAG de requisitos del slice, armado la primera vez que se pide.
+    """
+
+    def __init__(self, df: pd.DataFrame, col_carrera: str = "CARRERA", col_unidad: str = "UNID. NEGOCIO"):
+        self.df = categorizar_claves(df, (col_carrera, col_unidad))
+        self._posiciones = {}
+        self._unidades = {}
+        self.carreras = []
+        self.requisitos = None
+        self._proyecciones = {}
+        if df.empty:
+            return
+
+        self._posiciones = df.groupby([col_carrera, col_unidad], sort=False, observed=True).indices
+        for carrera, unidad in self._posiciones:
+            self._unidades.setdefault(carrera, []).append(unidad)
+        self._unidades = {c: sorted(us) for c, us in self._unidades.items()}
+        self.carreras = sorted(df[col_carrera].dropna().unique().tolist())
+        if "CURSO" in df.columns and "REQUISITOS" in df.columns:
+            self.requisitos = IndiceRequisitos(df["CURSO"].tolist(), df["REQUISITOS"].tolist(), df.index.tolist())
+
+    def posiciones(self, carrera, unidad):
+        """Posiciones (np.ndarray) de las filas del slice, o None si no existe."""
+        return self._posiciones.get((carrera, unidad))
+
+    def filas(self, carrera, unidad) -> pd.DataFrame:
+        """Copia del slice con las etiquetas de fila originales (vacía si no existe)."""
+        posiciones = self._posiciones.get((carrera, unidad))
+        if posiciones is None:
+            return self.df.iloc[:0].copy()
+        return self.df.take(posiciones)
+
+    def unidades(self, carrera) -> list:
+        return list(self._unidades.get(carrera, []))
+
+    def proyeccion(self, carrera, unidad) -> ProyeccionMalla:
+        clave = (carrera, unidad)
+        if clave not in self._proyecciones:
+            self._proyecciones[clave] = proyeccion_slice(self.filas(carrera, unidad))
+        return self._proyecciones[clave]
+
+
+def marcar_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame, requisitos: IndiceRequisitos = None):
+    """
+    Agrega PUEDE_MATRICULAR a df_resultado y devuelve (df_resultado, df_matriculables).
+    requisitos: el IndiceRequisitos del dataset; si falta o no cubre estas filas se compila el slice.
+    """
+    if "REQUISITOS" not in df_resultado.columns:
+        df_resultado["PUEDE_MATRICULAR"] = False
+        return df_resultado, df_resultado[df_resultado["PUEDE_MATRICULAR"]]
+
+    etiquetas = df_resultado.index.tolist()
+    if requisitos is None or not requisitos.cubre(etiquetas):
+        requisitos = IndiceRequisitos(df_resultado["CURSO"].tolist(), df_resultado["REQUISITOS"].tolist(), etiquetas)
+    if "ESTADO_CONVALIDACION" in df_resultado.columns:
+        estados = df_resultado["ESTADO_CONVALIDACION"].tolist()
+    else:
+        estados = [None] * len(etiquetas)
+
+    df_resultado["PUEDE_MATRICULAR"] = requisitos.puede_matricular(etiquetas, estados, df_convalidados.index.tolist())
+    df_matriculables = df_resultado[df_resultado["PUEDE_MATRICULAR"]].copy()
+    return df_resultado, df_matriculables
+
+
+def proyeccion_slice(df_conva: pd.DataFrame) -> ProyeccionMalla:
+    """ProyeccionMalla sobre las filas de df_conva (posición i = i-ésima fila)."""
+    vacio = [None] * len(df_conva)
+
+    def col(nombre):
+        return df_conva[nombre].tolist() if nombre in df_conva.columns else vacio
+
+    return ProyeccionMalla(col("CURSO"), col("REQUISITOS"), col("CR"), col("CICLO"))
+
+
+def hoja_de_ruta(df_conva: pd.DataFrame, df_convalidados: pd.DataFrame, proyeccion: ProyeccionMalla = None,
+                 tope: int = CREDITOS_POR_PERIODO) -> pd.DataFrame:
+    """
+    Filas de df_conva pendientes de aprobar, con PERIODO (1, 2, ...) según la proyección
+    hasta el egreso; PERIODO 0 = no se habilita nunca (requisito fuera de la malla).
+    """
+    if proyeccion is None or proyeccion.n != len(df_conva):
+        proyeccion = proyeccion_slice(df_conva)
+    aprobados = 0
+    for pos in df_conva.index.get_indexer(df_convalidados.index):
+        if pos >= 0:
+            aprobados |= 1 << int(pos)
+
+    periodos, bloqueados = proyeccion.proyectar(aprobados, tope)
+    posiciones = [i for periodo in periodos for i in periodo] + bloqueados
+    numeros = [n for n, periodo in enumerate(periodos, start=1) for _ in periodo] + [0] * len(bloqueados)
+    df_ruta = df_conva.iloc[posiciones].copy()
+    df_ruta.insert(0, "PERIODO", numeros)
+    return df_ruta
+
+
+# =========================================================
+# CACHÉ BINARIA DEL DATASET
+# =========================================================
+class CacheHojas:
+    """
+    Caché en disco de hojas ya normalizadas de un Excel, en la carpeta <excel>.cache/.
+    Un manifest guarda (tamaño, mtime, sha1) del Excel: si tamaño y mtime coinciden se
+    confía en la caché; si no, se compara el sha1 (copias o "guardar" sin cambios) y
+    solo se descarta todo cuando el contenido cambió.
+    Formato: Feather (columnar) si hay pyarrow; si no, o si la hoja no es compatible,
+    pickle de pandas (bloques por tipo de columna). Ambos evitan parsear el XML.
+    """
+
+    VERSION = 1
+    MANIFEST = "manifest.json"
+
+    def __init__(self, ruta_excel: str, activa: bool = USAR_CACHE_DATASET):
+        self.ruta_excel = ruta_excel
+        self.carpeta = f"{ruta_excel}.cache"
+        self.activa = activa
+        self.aciertos = 0
+        self.fallos = 0
+        self._manifest = None
+
+    def _leer_manifest(self):
+        try:
+            with open(os.path.join(self.carpeta, self.MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _escribir_manifest(self, manifest):
+        os.makedirs(self.carpeta, exist_ok=True)
+        destino = os.path.join(self.carpeta, self.MANIFEST)
+        tmp = f"{destino}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp, destino)
+
+    def _vigente(self):
+        """Manifest válido para el Excel actual (actualizado o vacío si cambió)."""
+        firma = firma_archivo(self.ruta_excel)
+        if firma is None:
+            return None
+        tamano, mtime_ns = firma
+
+        manifest = self._manifest or self._leer_manifest()
+        if manifest and manifest.get("version") == self.VERSION and manifest.get("tamano") == tamano:
+            if manifest.get("mtime_ns") == mtime_ns:
+                self._manifest = manifest
+                return manifest
+            sha1 = hash_archivo(self.ruta_excel)
+            if manifest.get("sha1") == sha1:
+                manifest["mtime_ns"] = mtime_ns
+                self._escribir_manifest(manifest)
+                self._manifest = manifest
+                return manifest
+        else:
+            sha1 = hash_archivo(self.ruta_excel)
+
+        for archivo in (manifest or {}).get("hojas", {}).values():
+            try:
+                os.remove(os.path.join(self.carpeta, archivo))
+            except OSError:
+                pass
+        self._manifest = {"version": self.VERSION, "tamano": tamano, "mtime_ns": mtime_ns, "sha1": sha1, "hojas": {}}
+        return self._manifest
+
+    @staticmethod
+    def _leer_archivo(ruta: str) -> pd.DataFrame:
+        if ruta.endswith(".feather"):
+            return pd.read_feather(ruta)
+        return pd.read_pickle(ruta)
+
+    def _guardar_archivo(self, nombre: str, df: pd.DataFrame) -> str:
+        os.makedirs(self.carpeta, exist_ok=True)
+        base = "".join(ch if ch.isalnum() else "_" for ch in nombre)
+        if pyarrow is not None and isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+            archivo = f"{base}.feather"
+            tmp = os.path.join(self.carpeta, f"{archivo}.tmp")
+            try:
+                df.to_feather(tmp)
+                os.replace(tmp, os.path.join(self.carpeta, archivo))
+                return archivo
+            except Exception:  # tipos mezclados en una columna, etc.
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        archivo = f"{base}.pkl"
+        tmp = os.path.join(self.carpeta, f"{archivo}.tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, os.path.join(self.carpeta, archivo))
+        return archivo
+
+    def leer(self, nombre: str, construir) -> pd.DataFrame:
+        """Hoja `nombre` desde la caché; si no está, construir() la lee del Excel y se guarda."""
+        if not self.activa:
+            return construir()
+
+        manifest = self._vigente()
+        archivo = manifest.get("hojas", {}).get(nombre) if manifest else None
+        if archivo:
+            try:
+                df = self._leer_archivo(os.path.join(self.carpeta, archivo))
+                self.aciertos += 1
+                return df
+            except Exception:
+                pass  # archivo dañado o de otra versión de pandas: se reconstruye
+
+        self.fallos += 1
+        df = construir()
+        if manifest is not None:
+            try:
+                manifest["hojas"][nombre] = self._guardar_archivo(nombre, df)
+                self._escribir_manifest(manifest)
+            except Exception:
+                pass  # sin permisos de escritura: se sigue sin caché
+        return df
+
+
+# =========================================================
+# RECARGA EN CALIENTE DEL DATASET
+# =========================================================
+def version_dataset(ruta: str) -> str:
+    """Versión legible del dataset: 'sha1[:8] (fecha de modificación)'; '' si no existe."""
+    try:
+        mtime = os.path.getmtime(ruta)
+        return f"{hash_archivo(ruta)[:8]} ({datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M})"
+    except OSError:
+        return ""
+
+
+class VigilanteDataset:
+    """
+    Sondea la firma (tamaño, mtime) de dataset.xlsx en un hilo daemon. Cuando cambia y
+    se mantiene igual en el sondeo siguiente (Excel terminó de guardar), ejecuta
+    construir() en ese mismo hilo y entrega el resultado con publicar(resultado, version).
+    Si construir() o publicar() fallan (archivo a medio copiar, columnas faltantes) se
+    avisa con al_fallar(error) y sigue vigente lo anterior hasta el próximo cambio.
+    """
+
+    def __init__(self, ruta: str, construir, publicar, al_fallar=None, intervalo: float = INTERVALO_RECARGA):
+        self.ruta = ruta
+        self.construir = construir
+        self.publicar = publicar
+        self.al_fallar = al_fallar
+        self.intervalo = intervalo
+        self.recargas = 0
+        self._firma = firma_archivo(ruta)
+        self._pendiente = None
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._correr, daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._parar.set()
+
+    def _correr(self):
+        while not self._parar.wait(self.intervalo):
+            self.revisar()
+
+    def revisar(self) -> bool:
+        """Una pasada de sondeo. True si se publicó un dataset nuevo."""
+        firma = firma_archivo(self.ruta)
+        if firma == self._firma:
+            self._pendiente = None
+            return False
+        if firma != self._pendiente:
+            self._pendiente = firma
+            return False
+
+        self._firma = firma
+        self._pendiente = None
+        try:
+            self.publicar(self.construir(), version_dataset(self.ruta))
+        except Exception as e:
+            if self.al_fallar:
+                self.al_fallar(e)
+            return False
+        self.recargas += 1
+        return True
+
+
+# =========================================================
+# REGISTRO DE TIEMPOS DE CARGA
+# =========================================================
+def registrar_tiempos_carga(carpeta: str, app: str, tiempos: dict):
+    """Agrega (fecha, app, etapa, segundos) a <carpeta>/tiempos_carga.csv. Nunca interrumpe la app."""
+    ruta = os.path.join(carpeta, ARCHIVO_TIEMPOS_CARGA)
+    fecha = datetime.now().isoformat(timespec="seconds")
+    try:
+        nuevo = not os.path.exists(ruta)
+        with open(ruta, "a", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            if nuevo:
+                w.writerow(["fecha", "app", "etapa", "segundos"])
+            for etapa, segundos in tiempos.items():
+                w.writerow([fecha, app, etapa, f"{segundos:.4f}"])
+    except OSError:
+        pass
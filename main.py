@@ -4,18 +4,41 @@
 
 import flet as ft
 import pandas as pd
-import re
 import os
 import sys
+import asyncio
+import queue
+import threading
+import time
 from datetime import datetime
 
 # ---- PDF / ReportLab ----
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import mm
-from reportlab.platypus import Table, TableStyle, Paragraph
-from reportlab.lib.styles import ParagraphStyle
+
+# ---- Motor de convalidación ----
+from motor_convalidacion import CREDITOS_POR_PERIODO, CacheSeleccion, TablaCRD, ciclo_numero, cr_entero, obtener_motor, seleccionar_por_ciclos
+from datos_convalidacion import (
+    RECARGA_DATASET,
+    CacheHojas,
+    IndiceDataset,
+    VigilanteDataset,
+    categorizar_claves,
+    hoja_de_ruta,
+    marcar_matriculables,
+    preparar_tabla_crd,
+    registrar_tiempos_carga,
+    version_dataset,
+)
+from pdf_convalidacion import (
+    celdas_tabla_27,
+    configurar_reportlab,
+    dibujar_tabla_hoja_ruta,
+    pagina_pdf,
+    paginas_hoja_ruta,
+    textos_firmas,
+    textos_pdf,
+)
 
 
 # =========================================================
@@ -38,38 +61,35 @@ APP_VERSION = "7.64"
 # =========================================================
 # ⭐ ALGORITMO CORREGIDO (SIEMPRE A FAVOR, PERO SIN PASARSE)
 # =========================================================
-def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int):
+def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int, motor: str = None):
     if df.empty or max_allowed <= 0:
         return [], 0
 
-    df2 = df.copy()
-    df2["CR"] = pd.to_numeric(df2["CR"], errors="coerce").fillna(0).astype(int)
-
-    items = []
-    for idx, row in df2.iterrows():
-        cr = int(row.get("CR", 0))
-        if cr > 0:
-            items.append((idx, cr))
+    etiquetas = df.index.tolist()
+    crs = pd.to_numeric(df["CR"], errors="coerce").fillna(0).astype(int).tolist()
 
-    dp = {0: []}  # suma -> indices
+    posiciones, suma = obtener_motor(motor)(crs, min_needed, max_allowed)
+    return [etiquetas[p] for p in posiciones], suma
 
-    for idx, cr in items:
-        for s in sorted(list(dp.keys()), reverse=True):
-            ns = s + cr
-            if ns <= max_allowed and ns not in dp:
-                dp[ns] = dp[s] + [idx]
 
-    sums = sorted(dp.keys())
+def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2, motor: str = None):
+    """
+    Camino rápido: agrupa por ciclo una sola vez y corre el DP sobre enteros.
+    Devuelve las mismas etiquetas de índice que seleccionar_convalidacion_df.
+    """
+    if df_conva.empty:
+        return [], 0
 
-    for s in sums:
-        if s >= max(0, min_needed) and s <= max_allowed:
-            return dp[s], s
+    etiquetas = df_conva.index.tolist()
+    crs = [cr_entero(v) for v in df_conva["CR"].tolist()]
+    ciclos = [ciclo_numero(v) for v in df_conva["CICLO"].tolist()]
 
-    best = max(sums) if sums else 0
-    return dp.get(best, []), best
+    posiciones, suma = seleccionar_por_ciclos(crs, ciclos, crd, tolerancia=tolerancia, motor=motor)
+    return [etiquetas[p] for p in posiciones], suma
 
 
-def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2):
+def seleccionar_convalidacion_df(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2, motor: str = None):
+    """Versión DataFrame original (referencia para el benchmark y la equivalencia)."""
     if df_conva.empty:
         return [], 0
 
@@ -100,7 +120,7 @@ def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: in
         df_ciclo = df[df["CICLO_NUM"] == ciclo].copy()
         df_ciclo = df_ciclo.sort_values(by="CR", ascending=False)
 
-        sel_c, suma_c = _subset_best_between(df=df_ciclo, min_needed=min_restante, max_allowed=max_restante)
+        sel_c, suma_c = _subset_best_between(df=df_ciclo, min_needed=min_restante, max_allowed=max_restante, motor=motor)
 
         if suma_c <= 0:
             continue
@@ -114,6 +134,31 @@ def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: in
     return seleccion_total, suma_total
 
 
+CACHE_SELECCION = CacheSeleccion(os.path.join(BASE_DIR, DATASET_FILE))
+TABLA_CRD = TablaCRD(os.path.join(BASE_DIR, DATASET_FILE), tolerancia=2)
+CACHE_HOJAS = CacheHojas(os.path.join(BASE_DIR, DATASET_FILE))
+
+
+def seleccionar_convalidacion_cache(
+    df_conva: pd.DataFrame, carrera: str, unidad: str, crd: float, tolerancia: int = 2, tabla: TablaCRD = None, version: str = ""
+):
+    """
+    1) Tabla CRD precalculada (O(1)).
+    2) LRU por (carrera, unidad, CRD, tolerancia, versión del dataset).
+    3) Cálculo completo.
+    tabla/version: las del dataset con el que se armó df_conva (recarga en caliente).
+    """
+    tabla = tabla or TABLA_CRD
+    precalculada = tabla.seleccion(TablaCRD.clave(carrera, unidad), crd, tolerancia, n_filas=len(df_conva))
+    if precalculada is not None:
+        etiquetas = df_conva.index.tolist()
+        posiciones, suma = precalculada
+        return [etiquetas[p] for p in posiciones], suma
+
+    clave = CacheSeleccion.clave(carrera, unidad, "", crd, tolerancia, version)
+    return CACHE_SELECCION.obtener(clave, lambda: seleccionar_convalidacion(df_conva, crd, tolerancia=tolerancia))
+
+
 # =========================================================
 # FUNCIÓN: CARGAR DATASET
 # =========================================================
@@ -122,6 +167,12 @@ def cargar_dataset():
     if not os.path.exists(ruta):
         raise FileNotFoundError(f"No se encontró el archivo: {ruta}")
 
+    # Hoja ya normalizada desde la caché binaria; el Excel solo se parsea si cambió.
+    # CARRERA / UNID. NEGOCIO quedan categóricas (ver IndiceDataset).
+    return categorizar_claves(CACHE_HOJAS.leer("main", lambda: _leer_dataset_excel(ruta)))
+
+
+def _leer_dataset_excel(ruta: str):
     df = pd.read_excel(ruta, header=0)
     df.columns = df.columns.str.strip().str.upper()
 
@@ -161,163 +212,20 @@ def formatear_apellidos_nombres(apellidos: str, nombres: str) -> str:
 # BLOQUE 2 / 4
 # LÓGICA ACADÉMICA + PDF HELPERS
 # ============================
-def calcular_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame):
-    if "REQUISITOS" not in df_resultado.columns:
-        df_resultado["PUEDE_MATRICULAR"] = False
-        return df_resultado, df_resultado[df_resultado["PUEDE_MATRICULAR"]]
-
-    cursos_ok = set(df_convalidados["CURSO"].astype(str).str.upper().str.strip().tolist())
-
-    def cumple_req(req):
-        if req is None:
-            return True
-        req = str(req).strip()
-        if req == "" or req.lower() == "nan":
-            return True
-
-        partes = [p.strip().upper() for p in re.split(r"[;,/]", req) if p.strip()]
-        return any(r in cursos_ok for r in partes)
-
-    puede = []
-    for _, row in df_resultado.iterrows():
-        if row.get("ESTADO_CONVALIDACION") == "CONVALIDADO":
-            puede.append(False)
-        else:
-            puede.append(cumple_req(row.get("REQUISITOS")))
-
-    df_resultado["PUEDE_MATRICULAR"] = puede
-    df_matriculables = df_resultado[df_resultado["PUEDE_MATRICULAR"]].copy()
-    return df_resultado, df_matriculables
-
-
-# =========================================================
-# PDF HELPERS (UPN)
-# =========================================================
-def _encabezado_pdf(c, titulo_principal, alumno, codigo, carrera_upn, campus, logo_path):
-    width, height = A4
-
-    if os.path.exists(logo_path):
-        logo_w, logo_h = 45 * mm, 18 * mm
-        c.drawImage(
-            logo_path,
-            (width - logo_w) / 2,
-            height - 60,
-            logo_w,
-            logo_h,
-            preserveAspectRatio=True,
-            mask="auto",
-        )
-        titulo_y = height - 85
-    else:
-        titulo_y = height - 60
-
-    c.setFont("Helvetica-Bold", 13)
-    c.drawCentredString(width / 2, titulo_y, str(titulo_principal))
-
-    c.setLineWidth(0.7)
-    c.line(40, titulo_y - 6, width - 40, titulo_y - 6)
-
-    c.setFont("Helvetica", 10)
-    y = titulo_y - 22
-
-    c.drawString(40, y, f"Apellidos y Nombres: {str(alumno).upper()}")
-    c.drawRightString(width - 40, y, f"Código: {str(codigo).upper()}")
-
-    c.drawString(40, y - 14, f"Carrera en UPN: {str(carrera_upn).upper()}")
-    c.drawString(40, y - 28, f"Campus: {str(campus).upper()}")
-
-    return y - 45
-
-
-def _dibujar_tabla_fija_27(c, y: float, df: pd.DataFrame, titulo_columna_curso: str, total_cr: int):
-    estilo = ParagraphStyle(name="TablaUPN", fontName="Helvetica", fontSize=8, leading=11)
-
-    data = [["Ciclo", titulo_columna_curso, "Materia", "Cód. Curso", "CR"]]
-    MAX_FILAS = 27
-
-    for _, row in df.iterrows():
-        if len(data) - 1 >= MAX_FILAS:
-            break
-        data.append(
-            [
-                Paragraph(str(row.get("CICLO", "")), estilo),
-                Paragraph(str(row.get("CURSO", "")).upper(), estilo),
-                Paragraph(str(row.get("MATERIA", "")).upper(), estilo),
-                Paragraph(str(row.get("CÓD. CURSO", "")).upper(), estilo),
-                Paragraph(str(row.get("CR", "")), estilo),
-            ]
-        )
-
-    filas_actuales = len(data) - 1
-    for _ in range(MAX_FILAS - filas_actuales):
-        data.append(["", "", "", "", ""])
-
-    data.append(["", "", "", "Total", str(total_cr)])
-
-    row_heights = [14] + [16] * MAX_FILAS + [16]
-
-    table = Table(data, colWidths=[15 * mm, 95 * mm, 30 * mm, 25 * mm, 15 * mm], rowHeights=row_heights, repeatRows=1)
-
-    table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (0, 0), (0, -1), "CENTER"),
-                ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONT", (0, -1), (-1, -1), "Helvetica-Bold"),
-            ]
-        )
-    )
-
-    _, table_height = table.wrap(0, 0)
-    table.drawOn(c, 40, y - table_height)
-    return y - table_height
-
-
-def _dibujar_firmas(c, elaborado_nombre: str, elaborado_cargo: str, resp_nombre: str, resp_cargo: str):
-    c.setFont("Helvetica", 9)
-    c.drawString(40, 120, f"Nombre Elaborado por: {str(elaborado_nombre).upper()}")
-    c.drawString(40, 108, f"Cargo: {str(elaborado_cargo).upper()}")
-    c.drawString(40, 85, f"Nombre Resp. Acad.: {str(resp_nombre).upper()}")
-    c.drawString(40, 73, f"Cargo: {str(resp_cargo).upper()}")
-
-
-def _footer_pdf(c, plan_estudios: str, y_referencia: float):
-    width, _ = A4
-    now = datetime.now()
-    fecha = f"{now.day:02d}/{now.month:02d}/{now.year}"
-
-    c.setFont("Helvetica", 9)
-    c.drawString(40, y_referencia, f"Plan de Estudios: {plan_estudios}")
-    c.drawRightString(width - 40, y_referencia, f"Fecha: {fecha}")
-
-    texto_legal = (
-        "Este documento es meramente referencial y emitido por el área académica "
-        "para que sirva de guía en el registro de cursos del estudiante. "
-        "Es potestad del estudiante elegir y matricularse en los cursos que decida."
-    )
-
-    estilo_legal = ParagraphStyle(name="LegalFooter", fontName="Helvetica", fontSize=9, leading=11)
-
-    p = Paragraph(texto_legal, estilo_legal)
-    _, h = p.wrap(width - 80, 100)
-    p.drawOn(c, 40, y_referencia - h - 10)
-
-    y_linea = 40
-    c.setLineWidth(0.7)
-    c.line(40, y_linea, width - 40, y_linea)
-
-    c.setFont("Helvetica", 8)
-    c.drawString(40, 25, "UNIVERSIDAD PRIVADA DEL NORTE S.A.C.")
-    c.drawRightString(width - 40, 25, f"Versión Conva2025G : {APP_VERSION}")  # ✅ version única
+def calcular_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame, requisitos=None):
+    """PUEDE_MATRICULAR con los REQUISITOS compilados del dataset (ver marcar_matriculables)."""
+    return marcar_matriculables(df_resultado, df_convalidados, requisitos)
 
 
 # ============================
 # BLOQUE 3 / 4
 # GENERACIÓN DE PDFs
 # ============================
+# Rótulos bajo "Carrera en UPN", alto del encabezado y versión del pie (capa fija y
+# helpers de página en pdf_convalidacion.py)
+ENCABEZADO_PDF = (("Campus: ",), 45, f"Versión Conva2025G : {APP_VERSION}")  # ✅ version única
+
+
 def generar_pdf_convalidados(
     ruta_pdf: str,
     alumno: str,
@@ -336,16 +244,10 @@ def generar_pdf_convalidados(
 
     total_cr = int(pd.to_numeric(df_convalidados.get("CR", 0), errors="coerce").fillna(0).sum())
 
-    y = _encabezado_pdf(c, "RESULTADO DE CONVALIDACIÓN", alumno, codigo, carrera_upn, campus, logo_path)
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y - 10, "Relación de cursos convalidados:")
-    y -= 15
-
-    _dibujar_tabla_fija_27(c=c, y=y, df=df_convalidados, titulo_columna_curso="Cursos Convalidados", total_cr=total_cr)
-
-    _dibujar_firmas(c, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
-    _footer_pdf(c, plan_estudios, 195)
+    geo = pagina_pdf(c, ENCABEZADO_PDF, logo_path, "RESULTADO DE CONVALIDACIÓN", 195, "Relación de cursos convalidados:", "Cursos Convalidados")
+    textos_pdf(c, geo, alumno, codigo, carrera_upn, (campus,), plan_estudios)
+    celdas_tabla_27(c, geo["tabla"], df_convalidados, total_cr)
+    textos_firmas(c, geo, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
 
     c.showPage()
     c.save()
@@ -364,23 +266,33 @@ def generar_pdf_proyeccion(
     resp_cargo: str,
     df_matriculables: pd.DataFrame,
     logo_path: str,
+    df_hoja_ruta: pd.DataFrame = None,
 ):
     c = canvas.Canvas(ruta_pdf, pagesize=A4)
 
     total_cr = int(pd.to_numeric(df_matriculables.get("CR", 0), errors="coerce").fillna(0).sum())
 
-    y = _encabezado_pdf(c, "CURSOS RECOMENDADOS PARA EL REGISTRO DE CURSO", alumno, codigo, carrera_upn, campus, logo_path)
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y - 10, "Relación de cursos recomendados para el registro de curso:")
-    y -= 15
+    geo = pagina_pdf(
+        c, ENCABEZADO_PDF, logo_path, "CURSOS RECOMENDADOS PARA EL REGISTRO DE CURSO", 195,
+        "Relación de cursos recomendados para el registro de curso:", "Cursos recomendados",
+    )
+    textos_pdf(c, geo, alumno, codigo, carrera_upn, (campus,), plan_estudios)
+    celdas_tabla_27(c, geo["tabla"], df_matriculables, total_cr)
+    textos_firmas(c, geo, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
 
-    _dibujar_tabla_fija_27(c=c, y=y, df=df_matriculables, titulo_columna_curso="Cursos recomendados", total_cr=total_cr)
+    c.showPage()
 
-    _dibujar_firmas(c, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
-    _footer_pdf(c, plan_estudios, 195)
+    # Hoja de ruta hasta el egreso (ver hoja_de_ruta): una o más páginas adicionales
+    if df_hoja_ruta is not None and not df_hoja_ruta.empty:
+        periodos = int(df_hoja_ruta["PERIODO"].max())
+        for filas in paginas_hoja_ruta(df_hoja_ruta):
+            geo = pagina_pdf(c, ENCABEZADO_PDF, logo_path, "PROYECCIÓN DE CURSOS POR PERIODO HASTA EL EGRESO", 110)
+            textos_pdf(c, geo, alumno, codigo, carrera_upn, (campus,), plan_estudios)
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(40, geo["y"] - 10, f"Periodos estimados: {periodos} | Tope: {CREDITOS_POR_PERIODO} CR por periodo")
+            dibujar_tabla_hoja_ruta(c, geo["y"] - 15, filas)
+            c.showPage()
 
-    c.showPage()
     c.save()
 
 
@@ -402,14 +314,12 @@ def main(page: ft.Page):
     CARGO_ELAB_DEFAULT = "ASISTENTE"
     CARGO_RESP_DEFAULT = "COORDINADOR"
 
-    # Dataset
-    try:
-        df_base = cargar_dataset()
-    except Exception as e:
-        page.add(ft.Text(f"Error cargando dataset: {e}", color="red", size=16, weight=ft.FontWeight.BOLD))
-        return
-
-    carreras = sorted(df_base["CARRERA"].dropna().unique().tolist())
+    # Dataset: se carga en segundo plano (ver cargar_en_segundo_plano); el formulario
+    # se muestra de inmediato y Carrera/Procesar se habilitan cuando está listo.
+    # dataset["actual"] = {df, índice (carrera, unidad), tabla CRD, versión}: se reemplaza
+    # entero en cada recarga en caliente, y cada acción lo lee una sola vez al empezar.
+    t_inicio = time.perf_counter()
+    dataset = {"actual": {"df": pd.DataFrame(), "indice": IndiceDataset(pd.DataFrame()), "tabla": TABLA_CRD, "version": ""}}
 
     # ✅ AppBar profesional con versión (AppBar control) :contentReference[oaicite:2]{index=2}
     page.appbar = ft.AppBar(
@@ -483,10 +393,13 @@ def main(page: ft.Page):
 
     crd_field = ft.TextField(label="CRD (créditos a convalidar)", width=250, keyboard_type=ft.KeyboardType.NUMBER)
 
-    carrera_dd = ft.Dropdown(label="Carrera", options=[ft.dropdown.Option(c) for c in carreras], width=520)
+    carrera_dd = ft.Dropdown(label="Carrera", options=[], width=520, disabled=True, hint_text="Cargando dataset...")
     unidad_dd = ft.Dropdown(label="Unidad de Negocio", options=[], width=520, disabled=True)
 
     resumen_text = ft.Text("", size=14)
+    carga_text = ft.Text("⏳ Cargando dataset...", size=12, color="#555555")
+    carga_bar = ft.ProgressBar(width=940)
+    version_dataset_text = ft.Text("Dataset: -", size=11, color="#555555")
     convalidados_table = ft.Column()
     matriculables_table = ft.Column()
 
@@ -494,12 +407,14 @@ def main(page: ft.Page):
         "df_conva": pd.DataFrame(),
         "df_convalidados": pd.DataFrame(),
         "df_matriculables": pd.DataFrame(),
+        "df_hoja_ruta": pd.DataFrame(),
         "df_resultado": pd.DataFrame(),
         "carrera": None,
         "unidad": None,
         "suma_final": 0,
         "crd_int": 0,
         "limite_total": 0,
+        "version_dataset": "",
     }
 
     def btn_style(bg: str):
@@ -528,7 +443,8 @@ def main(page: ft.Page):
             rows.append(ft.DataRow(cells=[ft.DataCell(ft.Text(str(row.get(col, "")))) for _, col in columnas]))
         return ft.DataTable(columns=cols, rows=rows, column_spacing=20, horizontal_margin=10)
 
-    def cargar_unidades_por_carrera():
+    def cargar_unidades_por_carrera(conservar=False):
+        unidad_prev = unidad_dd.value
         unidad_dd.value = None
         unidad_dd.options = []
         unidad_dd.disabled = True
@@ -538,9 +454,9 @@ def main(page: ft.Page):
             return
 
         carrera_sel = str(carrera_dd.value).strip().upper()
-        df_tmp = df_base[df_base["CARRERA"] == carrera_sel].copy()
-
-        unidades = sorted([u for u in df_tmp["UNID. NEGOCIO"].dropna().unique().tolist() if str(u).strip() != ""])
+        unidades = [u for u in dataset["actual"]["indice"].unidades(carrera_sel) if str(u).strip() != ""]
+        if conservar and unidad_prev in unidades:
+            unidad_dd.value = unidad_prev
 
         if not unidades:
             page.snack_bar = ft.SnackBar(
@@ -590,12 +506,14 @@ def main(page: ft.Page):
                 "df_conva": pd.DataFrame(),
                 "df_convalidados": pd.DataFrame(),
                 "df_matriculables": pd.DataFrame(),
+                "df_hoja_ruta": pd.DataFrame(),
                 "df_resultado": pd.DataFrame(),
                 "carrera": None,
                 "unidad": None,
                 "suma_final": 0,
                 "crd_int": 0,
                 "limite_total": 0,
+                "version_dataset": "",
             }
         )
 
@@ -637,16 +555,20 @@ def main(page: ft.Page):
         carrera_sel = str(carrera_dd.value).strip().upper()
         unidad_sel = str(unidad_dd.value).strip().upper()
 
-        df_conva = df_base[(df_base["CARRERA"] == carrera_sel) & (df_base["UNID. NEGOCIO"] == unidad_sel)].copy()
+        activo = dataset["actual"]
+        df_conva = activo["indice"].filas(carrera_sel, unidad_sel)
 
-        seleccion, _ = seleccionar_convalidacion(df_conva, crd, tolerancia=2)
+        seleccion, _ = seleccionar_convalidacion_cache(
+            df_conva, carrera_sel, unidad_sel, crd, tolerancia=2, tabla=activo["tabla"], version=activo["version"]
+        )
         df_convalidados = df_conva.loc[seleccion].copy()
 
         df_resultado = df_conva.copy()
         df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
         df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
 
-        df_resultado, df_matriculables = calcular_matriculables(df_resultado, df_convalidados)
+        df_resultado, df_matriculables = calcular_matriculables(df_resultado, df_convalidados, activo["indice"].requisitos)
+        df_hoja_ruta = hoja_de_ruta(df_conva, df_convalidados, activo["indice"].proyeccion(carrera_sel, unidad_sel))
 
         crd_int = int(float(crd))
         limite_total = crd_int + 2
@@ -657,12 +579,14 @@ def main(page: ft.Page):
                 "df_conva": df_conva,
                 "df_convalidados": df_convalidados,
                 "df_matriculables": df_matriculables,
+                "df_hoja_ruta": df_hoja_ruta,
                 "df_resultado": df_resultado,
                 "carrera": carrera_sel,
                 "unidad": unidad_sel,
                 "suma_final": suma_real,
                 "crd_int": crd_int,
                 "limite_total": limite_total,
+                "version_dataset": activo["version"],
             }
         )
 
@@ -699,6 +623,7 @@ def main(page: ft.Page):
             {
                 "Campo": [
                     "Versión App",
+                    "Versión Dataset",
                     "Fecha/Hora",
                     "Apellidos y Nombres",
                     "Código de estudiante",
@@ -716,6 +641,7 @@ def main(page: ft.Page):
                 ],
                 "Valor": [
                     APP_VERSION,
+                    state["version_dataset"],
                     ahora,
                     alumno_fmt,
                     codigo_field.value,
@@ -771,6 +697,7 @@ def main(page: ft.Page):
             CARGO_RESP_DEFAULT,
             state["df_matriculables"],
             logo_path,
+            df_hoja_ruta=state["df_hoja_ruta"],
         )
 
         page.snack_bar = ft.SnackBar(ft.Text("Excel y PDFs generados correctamente"), bgcolor=ft.Colors.GREEN)
@@ -791,7 +718,7 @@ def main(page: ft.Page):
         page.snack_bar.open = True
         page.update()
 
-    procesar_btn = ft.ElevatedButton("Procesar", icon=ft.Icons.CALCULATE, on_click=procesar_click, height=56, width=240, style=btn_style("#2563EB"))
+    procesar_btn = ft.ElevatedButton("Procesar", icon=ft.Icons.CALCULATE, on_click=procesar_click, height=56, width=240, style=btn_style("#2563EB"), disabled=True)
     generar_btn = ft.ElevatedButton("Generar Excel/PDF", icon=ft.Icons.PICTURE_AS_PDF, on_click=generar_reportes_click, height=56, width=300, style=btn_style("#16A34A"))
     copiar_btn = ft.ElevatedButton("Copiar Matriculables", icon=ft.Icons.COPY, on_click=copiar_tabla_click, height=56, width=300, style=btn_style("#0F766E"))
     limpiar_btn = ft.ElevatedButton("Nueva Convalidación", icon=ft.Icons.DELETE_SWEEP, on_click=limpiar_click, height=56, width=300, style=btn_style("#DC2626"))
@@ -804,6 +731,8 @@ def main(page: ft.Page):
             content=ft.Column(
                 spacing=12,
                 controls=[
+                    carga_bar,
+                    carga_text,
                     ft.Card(
                         elevation=2,
                         content=ft.Container(
@@ -836,6 +765,8 @@ def main(page: ft.Page):
                         [
                             ft.Text(f"Versión: v{APP_VERSION}", size=11, color="#555555"),
                             ft.Text(" | ", size=11, color="#555555"),
+                            version_dataset_text,
+                            ft.Text(" | ", size=11, color="#555555"),
                             ft.Text("Elaborado por: Ing. Jesús Apolaya", size=11, italic=True, color="#555555"),
                         ],
                         alignment=ft.MainAxisAlignment.END,
@@ -845,6 +776,116 @@ def main(page: ft.Page):
         )
     )
 
+    t_formulario = time.perf_counter() - t_inicio
+
+    # =========================
+    # CARGA EN SEGUNDO PLANO
+    # =========================
+    q_ui = queue.Queue()
+    ruta_dataset = os.path.join(BASE_DIR, DATASET_FILE)
+
+    def cargar_en_segundo_plano():
+        try:
+            df = cargar_dataset()
+            indice = IndiceDataset(df)
+            version = version_dataset(ruta_dataset)
+        except Exception as e:
+            q_ui.put(lambda e=e: (
+                setattr(carga_text, "value", f"Error cargando dataset: {e}"),
+                setattr(carga_text, "color", "red"),
+                setattr(carga_bar, "visible", False),
+            ))
+            return
+
+        t_dataset = time.perf_counter() - t_inicio
+        carreras = indice.carreras
+
+        def habilitar():
+            dataset["actual"] = {"df": df, "indice": indice, "tabla": TABLA_CRD, "version": version}
+            carrera_dd.options = [ft.dropdown.Option(c) for c in carreras]
+            carrera_dd.disabled = False
+            carrera_dd.hint_text = None
+            procesar_btn.disabled = False
+            carga_text.value = f"Dataset listo en {t_dataset:.2f} s ({len(df)} filas)"
+            carga_bar.visible = False
+            version_dataset_text.value = f"Dataset: {version}"
+
+        q_ui.put(habilitar)
+
+        # Tabla CRD -> selección: se lee del disco o se reconstruye si cambió el dataset
+        try:
+            preparar_tabla_crd(TABLA_CRD, df)
+        except Exception:
+            pass  # sin tabla se usa el cálculo normal
+
+        registrar_tiempos_carga(OUTPUT_DIR, "main", {
+            "formulario": t_formulario,
+            "dataset": t_dataset,
+            "tabla_crd": time.perf_counter() - t_inicio - t_dataset,
+        })
+
+        if RECARGA_DATASET:
+            VigilanteDataset(ruta_dataset, reconstruir_dataset, publicar_dataset, al_fallar=avisar_fallo_recarga).iniciar()
+
+    # =========================
+    # RECARGA EN CALIENTE (dataset.xlsx modificado con la app abierta)
+    # =========================
+    def reconstruir_dataset():
+        # Corre en el hilo del vigilante: lo vigente sigue atendiendo mientras tanto.
+        df = cargar_dataset()
+        tabla = TablaCRD(ruta_dataset, tolerancia=2)
+        try:
+            preparar_tabla_crd(tabla, df)
+        except Exception:
+            pass
+        return {"df": df, "indice": IndiceDataset(df), "tabla": tabla}
+
+    def publicar_dataset(nuevo, version):
+        nuevo["version"] = version
+        carreras = nuevo["indice"].carreras
+
+        def aplicar():
+            dataset["actual"] = nuevo
+            carrera_prev = carrera_dd.value
+            carrera_dd.options = [ft.dropdown.Option(c) for c in carreras]
+            carrera_dd.value = carrera_prev if carrera_prev in carreras else None
+            cargar_unidades_por_carrera(conservar=True)
+            carga_text.value = f"Dataset actualizado: {version} ({len(nuevo['df'])} filas)"
+            carga_text.color = "#555555"
+            version_dataset_text.value = f"Dataset: {version}"
+
+        q_ui.put(aplicar)
+
+    def avisar_fallo_recarga(e):
+        q_ui.put(lambda e=e: (
+            setattr(carga_text, "value", f"No se pudo recargar dataset.xlsx (se mantiene la versión anterior): {e}"),
+            setattr(carga_text, "color", "red"),
+        ))
+
+    async def ui_pump():
+        # Aplica en el hilo de la UI los cambios que dejan los hilos de carga y de recarga.
+        while True:
+            dirty = False
+            while True:
+                try:
+                    fn = q_ui.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    fn()
+                except Exception as e:
+                    # Un callback que falla no puede matar la bomba: se avisa y se sigue
+                    carga_text.value = f"Error al actualizar la pantalla: {e}"
+                    carga_text.color = "red"
+                dirty = True
+            if dirty:
+                page.update()
+            await asyncio.sleep(0.05)
+
+    page.run_task(ui_pump)
+    threading.Thread(target=cargar_en_segundo_plano, daemon=True).start()
+
 
 if __name__ == "__main__":
+    configurar_reportlab()
     ft.app(target=main)
\ No newline at end of file
@@ -4,18 +4,41 @@
 # ============================
 import flet as ft
 import pandas as pd
-import re
 import os
 import sys
+import asyncio
+import queue
+import threading
+import time
 from datetime import datetime
 
 # ---- PDF / ReportLab ----
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import mm
-from reportlab.platypus import Table, TableStyle, Paragraph
-from reportlab.lib.styles import ParagraphStyle
+
+# ---- Motor de convalidación ----
+from motor_convalidacion import CREDITOS_POR_PERIODO, CacheSeleccion, TablaCRD, obtener_motor
+from datos_convalidacion import (
+    RECARGA_DATASET,
+    CacheHojas,
+    IndiceDataset,
+    VigilanteDataset,
+    categorizar_claves,
+    hoja_de_ruta,
+    marcar_matriculables,
+    preparar_tabla_crd,
+    registrar_tiempos_carga,
+    version_dataset,
+)
+from pdf_convalidacion import (
+    celdas_tabla_27,
+    configurar_reportlab,
+    dibujar_tabla_hoja_ruta,
+    pagina_pdf,
+    paginas_hoja_ruta,
+    textos_firmas,
+    textos_pdf,
+)
 
 
 # =========================================================
@@ -33,7 +56,7 @@ OUTPUT_DIR = BASE_DIR
 # =========================================================
 # ⭐ ALGORITMO CORREGIDO (SIEMPRE A FAVOR, PERO SIN PASARSE)
 # =========================================================
-def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int):
+def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int, motor: str = None):
     """
     Devuelve (indices, suma) de una combinación que:
     - suma <= max_allowed
@@ -43,42 +66,21 @@ def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int):
     if df.empty or max_allowed <= 0:
         return [], 0
 
-    df2 = df.copy()
-    df2["CR"] = pd.to_numeric(df2["CR"], errors="coerce").fillna(0).astype(int)
-
-    items = []
-    for idx, row in df2.iterrows():
-        cr = int(row.get("CR", 0))
-        if cr > 0:
-            items.append((idx, cr))
-
-    dp = {0: []}  # suma -> indices
-
-    for idx, cr in items:
-        for s in sorted(list(dp.keys()), reverse=True):
-            ns = s + cr
-            if ns <= max_allowed and ns not in dp:
-                dp[ns] = dp[s] + [idx]
-
-    sums = sorted(dp.keys())
-
-    # 1) menor suma que cumpla el mínimo
-    for s in sums:
-        if s >= max(0, min_needed) and s <= max_allowed:
-            return dp[s], s
+    etiquetas = df.index.tolist()
+    crs = pd.to_numeric(df["CR"], errors="coerce").fillna(0).astype(int).tolist()
 
-    # 2) si no se puede, tomar la mayor posible por debajo
-    best = max(sums) if sums else 0
-    return dp.get(best, []), best
+    posiciones, suma = obtener_motor(motor)(crs, min_needed, max_allowed)
+    return [etiquetas[p] for p in posiciones], suma
 
 
-def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2):
+def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2, motor: str = None):
     """
     Selección SECUENCIAL por ciclo:
     - Primero ciclo 1, luego ciclo 2, luego 3, luego 4...
     - Solo pasas al siguiente ciclo si NO alcanzas CRD con lo acumulado.
     - Límite máximo total: CRD + tolerancia (ej. +2).
     - Dentro de cada ciclo: CR orden desc.
+    - motor: "bitset" | "numpy" | "dict" (None = MOTOR_SELECCION / CONVA_MOTOR).
     """
     if df_conva.empty:
         return [], 0
@@ -112,7 +114,8 @@ def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: in
         sel_c, suma_c = _subset_best_between(
             df=df_ciclo,
             min_needed=min_restante,
-            max_allowed=max_restante
+            max_allowed=max_restante,
+            motor=motor,
         )
 
         if suma_c <= 0:
@@ -127,6 +130,31 @@ def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: in
     return seleccion_total, suma_total
 
 
+CACHE_SELECCION = CacheSeleccion(os.path.join(BASE_DIR, DATASET_FILE))
+TABLA_CRD = TablaCRD(os.path.join(BASE_DIR, DATASET_FILE), tolerancia=2)
+CACHE_HOJAS = CacheHojas(os.path.join(BASE_DIR, DATASET_FILE))
+
+
+def seleccionar_convalidacion_cache(
+    df_conva: pd.DataFrame, carrera: str, unidad: str, crd: float, tolerancia: int = 2, tabla: TablaCRD = None, version: str = ""
+):
+    """
+    1) Tabla CRD precalculada (O(1)).
+    2) LRU por (carrera, unidad, CRD, tolerancia, versión del dataset).
+    3) Cálculo completo.
+    tabla/version: las del dataset con el que se armó df_conva (recarga en caliente).
+    """
+    tabla = tabla or TABLA_CRD
+    precalculada = tabla.seleccion(TablaCRD.clave(carrera, unidad), crd, tolerancia, n_filas=len(df_conva))
+    if precalculada is not None:
+        etiquetas = df_conva.index.tolist()
+        posiciones, suma = precalculada
+        return [etiquetas[p] for p in posiciones], suma
+
+    clave = CacheSeleccion.clave(carrera, unidad, "", crd, tolerancia, version)
+    return CACHE_SELECCION.obtener(clave, lambda: seleccionar_convalidacion(df_conva, crd, tolerancia=tolerancia))
+
+
 # =========================================================
 # FUNCIÓN: CARGAR DATASET
 # =========================================================
@@ -135,6 +163,12 @@ def cargar_dataset():
     if not os.path.exists(ruta):
         raise FileNotFoundError(f"No se encontró el archivo: {ruta}")
 
+    # Hoja ya normalizada desde la caché binaria; el Excel solo se parsea si cambió.
+    # CARRERA / UNID. NEGOCIO quedan categóricas (ver IndiceDataset).
+    return categorizar_claves(CACHE_HOJAS.leer("mainPaquetes", lambda: _leer_dataset_excel(ruta)))
+
+
+def _leer_dataset_excel(ruta: str):
     df = pd.read_excel(ruta, header=0)
     df.columns = df.columns.str.strip().str.upper()
 
@@ -168,166 +202,20 @@ def formatear_apellidos_nombres(apellidos: str, nombres: str) -> str:
 # BLOQUE 2 / 4
 # LÓGICA ACADÉMICA + PDF HELPERS
 # ============================
-def calcular_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame):
-    if "REQUISITOS" not in df_resultado.columns:
-        df_resultado["PUEDE_MATRICULAR"] = False
-        return df_resultado, df_resultado[df_resultado["PUEDE_MATRICULAR"]]
-
-    cursos_ok = set(df_convalidados["CURSO"].astype(str).str.upper().str.strip().tolist())
-
-    def cumple_req(req):
-        if req is None:
-            return True
-        req = str(req).strip()
-        if req == "" or req.lower() == "nan":
-            return True
-        partes = [p.strip().upper() for p in re.split(r"[;,/]", req) if p.strip()]
-        return any(r in cursos_ok for r in partes)
-
-    puede = []
-    for _, row in df_resultado.iterrows():
-        if row.get("ESTADO_CONVALIDACION") == "CONVALIDADO":
-            puede.append(False)
-        else:
-            puede.append(cumple_req(row.get("REQUISITOS")))
-
-    df_resultado["PUEDE_MATRICULAR"] = puede
-    df_matriculables = df_resultado[df_resultado["PUEDE_MATRICULAR"]].copy()
-    return df_resultado, df_matriculables
-
-
-# =========================================================
-# PDF HELPERS (UPN)
-# =========================================================
-def _encabezado_pdf(c, titulo_principal, alumno, codigo, carrera_upn, campus, tipo_paquete, logo_path):
-    width, height = A4
-
-    if os.path.exists(logo_path):
-        logo_w, logo_h = 45 * mm, 18 * mm
-        c.drawImage(
-            logo_path,
-            (width - logo_w) / 2,
-            height - 60,
-            logo_w,
-            logo_h,
-            preserveAspectRatio=True,
-            mask="auto",
-        )
-        titulo_y = height - 85
-    else:
-        titulo_y = height - 60
-
-    c.setFont("Helvetica-Bold", 13)
-    c.drawCentredString(width / 2, titulo_y, str(titulo_principal))
-
-    c.setLineWidth(0.7)
-    c.line(40, titulo_y - 6, width - 40, titulo_y - 6)
-
-    c.setFont("Helvetica", 10)
-    y = titulo_y - 22
-
-    c.drawString(40, y, f"Apellidos y Nombres: {str(alumno).upper()}")
-    c.drawRightString(width - 40, y, f"Código: {str(codigo).upper()}")
-
-    c.drawString(40, y - 14, f"Carrera en UPN: {str(carrera_upn).upper()}")
-    c.drawString(40, y - 28, f"Campus: {str(campus).upper()}")
-    c.drawString(40, y - 42, f"Tipo de Paquete: {str(tipo_paquete).upper()}")
-
-    return y - 60
-
-
-def _dibujar_tabla_fija_27(c, y: float, df: pd.DataFrame, titulo_columna_curso: str, total_cr: int):
-    estilo = ParagraphStyle(name="TablaUPN", fontName="Helvetica", fontSize=8, leading=11)
-
-    data = [["Ciclo", titulo_columna_curso, "Materia", "Cód. Curso", "CR"]]
-    MAX_FILAS = 27
-
-    for _, row in df.iterrows():
-        if len(data) - 1 >= MAX_FILAS:
-            break
-        data.append(
-            [
-                Paragraph(str(row.get("CICLO", "")), estilo),
-                Paragraph(str(row.get("CURSO", "")).upper(), estilo),
-                Paragraph(str(row.get("MATERIA", "")).upper(), estilo),
-                Paragraph(str(row.get("CÓD. CURSO", "")).upper(), estilo),
-                Paragraph(str(row.get("CR", "")), estilo),
-            ]
-        )
-
-    filas_actuales = len(data) - 1
-    for _ in range(MAX_FILAS - filas_actuales):
-        data.append(["", "", "", "", ""])
-
-    data.append(["", "", "", "Total", str(total_cr)])
-
-    row_heights = [14] + [16] * MAX_FILAS + [16]
-
-    table = Table(
-        data,
-        colWidths=[15 * mm, 95 * mm, 30 * mm, 25 * mm, 15 * mm],
-        rowHeights=row_heights,
-        repeatRows=1,
-    )
-
-    table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (0, 0), (0, -1), "CENTER"),
-                ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONT", (0, -1), (-1, -1), "Helvetica-Bold"),
-            ]
-        )
-    )
-
-    _, table_height = table.wrap(0, 0)
-    table.drawOn(c, 40, y - table_height)
-    return y - table_height
-
-
-def _dibujar_firmas(c, elaborado_nombre: str, elaborado_cargo: str, resp_nombre: str, resp_cargo: str):
-    c.setFont("Helvetica", 9)
-    c.drawString(40, 120, f"Nombre Elaborado por: {str(elaborado_nombre).upper()}")
-    c.drawString(40, 108, f"Cargo: {str(elaborado_cargo).upper()}")
-    c.drawString(40, 85, f"Nombre Resp. Acad.: {str(resp_nombre).upper()}")
-    c.drawString(40, 73, f"Cargo: {str(resp_cargo).upper()}")
-
-
-def _footer_pdf(c, plan_estudios: str, y_referencia: float):
-    width, _ = A4
-    now = datetime.now()
-    fecha = f"{now.day:02d}/{now.month:02d}/{now.year}"
-
-    c.setFont("Helvetica", 9)
-    c.drawString(40, y_referencia, f"Plan de Estudios: {plan_estudios}")
-    c.drawRightString(width - 40, y_referencia, f"Fecha: {fecha}")
-
-    texto_legal = (
-        "Este documento es meramente referencial y emitido por el área académica "
-        "para que sirva de guía en el registro de cursos del estudiante. "
-        "Es potestad del estudiante elegir y matricularse en los cursos que decida."
-    )
-
-    estilo_legal = ParagraphStyle(name="LegalFooter", fontName="Helvetica", fontSize=9, leading=11)
+def calcular_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame, requisitos=None):
+    """PUEDE_MATRICULAR con los REQUISITOS compilados del dataset (ver marcar_matriculables)."""
+    return marcar_matriculables(df_resultado, df_convalidados, requisitos)
 
-    p = Paragraph(texto_legal, estilo_legal)
-    _, h = p.wrap(width - 80, 100)
-    p.drawOn(c, 40, y_referencia - h - 10)
 
-    y_linea = 40
-    c.setLineWidth(0.7)
-    c.line(40, y_linea, width - 40, y_linea)
-
-    c.setFont("Helvetica", 8)
-    c.drawString(40, 25, "UNIVERSIDAD PRIVADA DEL NORTE S.A.C.")
-    c.drawRightString(width - 40, 25, "Versión Conva2025G : 7.63")
 # ============================
 # BLOQUE 3 / 4
 # GENERACIÓN DE PDFs
 # ============================
+# Rótulos bajo "Carrera en UPN", alto del encabezado y versión del pie (capa fija y
+# helpers de página en pdf_convalidacion.py)
+ENCABEZADO_PDF = (("Campus: ", "Tipo de Paquete: "), 60, "Versión Conva2025G : 7.63")
+
+
 def generar_pdf_convalidados(
     ruta_pdf: str,
     alumno: str,
@@ -347,31 +235,10 @@ def generar_pdf_convalidados(
 
     total_cr = int(pd.to_numeric(df_convalidados.get("CR", 0), errors="coerce").fillna(0).sum())
 
-    y = _encabezado_pdf(
-        c,
-        "RESULTADO DE CONVALIDACIÓN",
-        alumno,
-        codigo,
-        carrera_upn,
-        campus,
-        tipo_paquete,
-        logo_path,
-    )
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y - 10, "Relación de cursos convalidados:")
-    y -= 15
-
-    _dibujar_tabla_fija_27(
-        c=c,
-        y=y,
-        df=df_convalidados,
-        titulo_columna_curso="Cursos Convalidados",
-        total_cr=total_cr,
-    )
-
-    _dibujar_firmas(c, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
-    _footer_pdf(c, plan_estudios, 175)
+    geo = pagina_pdf(c, ENCABEZADO_PDF, logo_path, "RESULTADO DE CONVALIDACIÓN", 175, "Relación de cursos convalidados:", "Cursos Convalidados")
+    textos_pdf(c, geo, alumno, codigo, carrera_upn, (campus, tipo_paquete), plan_estudios)
+    celdas_tabla_27(c, geo["tabla"], df_convalidados, total_cr)
+    textos_firmas(c, geo, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
 
     c.showPage()
     c.save()
@@ -391,38 +258,33 @@ def generar_pdf_proyeccion(
     resp_cargo: str,
     df_matriculables: pd.DataFrame,
     logo_path: str,
+    df_hoja_ruta: pd.DataFrame = None,
 ):
     c = canvas.Canvas(ruta_pdf, pagesize=A4)
 
     total_cr = int(pd.to_numeric(df_matriculables.get("CR", 0), errors="coerce").fillna(0).sum())
 
-    y = _encabezado_pdf(
-        c,
-        "CURSOS RECOMENDADOS PARA EL REGISTRO DE CURSO",
-        alumno,
-        codigo,
-        carrera_upn,
-        campus,
-        tipo_paquete,
-        logo_path,
+    geo = pagina_pdf(
+        c, ENCABEZADO_PDF, logo_path, "CURSOS RECOMENDADOS PARA EL REGISTRO DE CURSO", 175,
+        "Relación de cursos recomendados para el registro de curso:", "Cursos recomendados",
     )
+    textos_pdf(c, geo, alumno, codigo, carrera_upn, (campus, tipo_paquete), plan_estudios)
+    celdas_tabla_27(c, geo["tabla"], df_matriculables, total_cr)
+    textos_firmas(c, geo, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
 
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y - 10, "Relación de cursos recomendados para el registro de curso:")
-    y -= 15
-
-    _dibujar_tabla_fija_27(
-        c=c,
-        y=y,
-        df=df_matriculables,
-        titulo_columna_curso="Cursos recomendados",
-        total_cr=total_cr,
-    )
+    c.showPage()
 
-    _dibujar_firmas(c, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
-    _footer_pdf(c, plan_estudios, 175)
+    # Hoja de ruta hasta el egreso (ver hoja_de_ruta): una o más páginas adicionales
+    if df_hoja_ruta is not None and not df_hoja_ruta.empty:
+        periodos = int(df_hoja_ruta["PERIODO"].max())
+        for filas in paginas_hoja_ruta(df_hoja_ruta):
+            geo = pagina_pdf(c, ENCABEZADO_PDF, logo_path, "PROYECCIÓN DE CURSOS POR PERIODO HASTA EL EGRESO", 110)
+            textos_pdf(c, geo, alumno, codigo, carrera_upn, (campus, tipo_paquete), plan_estudios)
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(40, geo["y"] - 10, f"Periodos estimados: {periodos} | Tope: {CREDITOS_POR_PERIODO} CR por periodo")
+            dibujar_tabla_hoja_ruta(c, geo["y"] - 15, filas)
+            c.showPage()
 
-    c.showPage()
     c.save()
 # ============================
 # BLOQUE 4 / 4
@@ -433,14 +295,12 @@ def main(page: ft.Page):
     page.horizontal_alignment = "center"
     page.scroll = "auto"
 
-    # Dataset
-    try:
-        df_base = cargar_dataset()
-    except Exception as e:
-        page.add(ft.Text(f"Error cargando dataset: {e}", color="red", size=16, weight=ft.FontWeight.BOLD))
-        return
-
-    carreras = sorted(df_base["CARRERA"].dropna().unique().tolist())
+    # Dataset: se carga en segundo plano (ver cargar_en_segundo_plano); el formulario
+    # se muestra de inmediato y Carrera/Procesar se habilitan cuando está listo.
+    t_inicio = time.perf_counter()
+    # dataset["actual"] = {df, índice (carrera, unidad), tabla CRD, versión}: se reemplaza
+    # entero en cada recarga en caliente, y cada acción lo lee una sola vez al empezar.
+    dataset = {"actual": {"df": pd.DataFrame(), "indice": IndiceDataset(pd.DataFrame()), "tabla": TABLA_CRD, "version": ""}}
 
     # ✅ Bandera anti-reentrancia (evita congelado al limpiar)
     is_resetting = False
@@ -481,9 +341,11 @@ def main(page: ft.Page):
 
     carrera_dd = ft.Dropdown(
         label="Carrera",
-        options=[ft.dropdown.Option("", "-- Seleccione --")] + [ft.dropdown.Option(c) for c in carreras],
+        options=[ft.dropdown.Option("", "-- Seleccione --")],
         value="",
-        width=400
+        width=400,
+        disabled=True,
+        hint_text="Cargando dataset...",
     )
 
     unidad_dd = ft.Dropdown(
@@ -494,6 +356,9 @@ def main(page: ft.Page):
     )
 
     resumen_text = ft.Text("", size=14)
+    carga_text = ft.Text("⏳ Cargando dataset...", size=12, color="#555555")
+    carga_bar = ft.ProgressBar(width=910)
+    version_dataset_text = ft.Text("Dataset: -", size=11, color="#555555")
     convalidados_table = ft.Column()
     matriculables_table = ft.Column()
 
@@ -501,12 +366,14 @@ def main(page: ft.Page):
         "df_conva": pd.DataFrame(),
         "df_convalidados": pd.DataFrame(),
         "df_matriculables": pd.DataFrame(),
+        "df_hoja_ruta": pd.DataFrame(),
         "df_resultado": pd.DataFrame(),
         "carrera": None,
         "unidad": None,
         "suma_final": 0,
         "crd_int": 0,
         "limite_total": 0,
+        "version_dataset": "",
     }
 
     def btn_style(bg: str):
@@ -544,8 +411,7 @@ def main(page: ft.Page):
         unidad_dd.value = ""
 
         if carrera_dd.value and carrera_dd.value != "":
-            df_tmp = df_base[df_base["CARRERA"] == carrera_dd.value]
-            unidades = sorted(df_tmp["UNID. NEGOCIO"].dropna().unique())
+            unidades = dataset["actual"]["indice"].unidades(carrera_dd.value)
             unidad_dd.options = [ft.dropdown.Option("", "-- Seleccione --")] + [ft.dropdown.Option(u) for u in unidades]
 
         page.update()
@@ -581,12 +447,14 @@ def main(page: ft.Page):
                     "df_conva": pd.DataFrame(),
                     "df_convalidados": pd.DataFrame(),
                     "df_matriculables": pd.DataFrame(),
+                    "df_hoja_ruta": pd.DataFrame(),
                     "df_resultado": pd.DataFrame(),
                     "carrera": None,
                     "unidad": None,
                     "suma_final": 0,
                     "crd_int": 0,
                     "limite_total": 0,
+                    "version_dataset": "",
                 }
             )
 
@@ -634,19 +502,20 @@ def main(page: ft.Page):
             page.update()
             return
 
-        df_conva = df_base[
-            (df_base["CARRERA"] == carrera_dd.value)
-            & (df_base["UNID. NEGOCIO"] == unidad_dd.value)
-        ].copy()
+        activo = dataset["actual"]
+        df_conva = activo["indice"].filas(carrera_dd.value, unidad_dd.value)
 
-        seleccion, _ = seleccionar_convalidacion(df_conva, crd, tolerancia=2)
+        seleccion, _ = seleccionar_convalidacion_cache(
+            df_conva, carrera_dd.value, unidad_dd.value, crd, tolerancia=2, tabla=activo["tabla"], version=activo["version"]
+        )
         df_convalidados = df_conva.loc[seleccion].copy()
 
         df_resultado = df_conva.copy()
         df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
         df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
 
-        df_resultado, df_matriculables = calcular_matriculables(df_resultado, df_convalidados)
+        df_resultado, df_matriculables = calcular_matriculables(df_resultado, df_convalidados, activo["indice"].requisitos)
+        df_hoja_ruta = hoja_de_ruta(df_conva, df_convalidados, activo["indice"].proyeccion(carrera_dd.value, unidad_dd.value))
 
         crd_int = int(float(crd))
         limite_total = crd_int + 2
@@ -657,12 +526,14 @@ def main(page: ft.Page):
                 "df_conva": df_conva,
                 "df_convalidados": df_convalidados,
                 "df_matriculables": df_matriculables,
+                "df_hoja_ruta": df_hoja_ruta,
                 "df_resultado": df_resultado,
                 "carrera": carrera_dd.value,
                 "unidad": unidad_dd.value,
                 "suma_final": suma_real,
                 "crd_int": crd_int,
                 "limite_total": limite_total,
+                "version_dataset": activo["version"],
             }
         )
 
@@ -703,6 +574,7 @@ def main(page: ft.Page):
         df_form = pd.DataFrame(
             {
                 "Campo": [
+                    "Versión Dataset",
                     "Fecha/Hora",
                     "Apellidos y Nombres",
                     "Código de estudiante",
@@ -720,6 +592,7 @@ def main(page: ft.Page):
                     "Cargo Resp. Académico",
                 ],
                 "Valor": [
+                    state["version_dataset"],
                     ahora,
                     alumno_fmt,
                     codigo_field.value,
@@ -778,6 +651,7 @@ def main(page: ft.Page):
             resp_cargo_field.value,
             state["df_matriculables"],
             logo_path,
+            df_hoja_ruta=state["df_hoja_ruta"],
         )
 
         page.snack_bar = ft.SnackBar(ft.Text("Excel y PDFs generados correctamente"), bgcolor=ft.Colors.GREEN)
@@ -805,6 +679,7 @@ def main(page: ft.Page):
         height=56,
         width=240,
         style=btn_style("#2563EB"),
+        disabled=True,
     )
 
     generar_btn = ft.ElevatedButton(
@@ -840,6 +715,8 @@ def main(page: ft.Page):
                 [
                     ft.Text("Proyección Malla Curricular UPN", size=20, weight=ft.FontWeight.BOLD),
                     ft.Text("⚠️ Todos los campos del formulario deben ser llenados antes de procesar.", size=12, color="#FF0000"),
+                    carga_bar,
+                    carga_text,
 
                     ft.Row([nombres_field, apellidos_field, codigo_field]),
                     ft.Row([campus_dd, paquete_dd, plan_field]),
@@ -865,6 +742,8 @@ def main(page: ft.Page):
 
                     ft.Row(
                         [
+                            version_dataset_text,
+                            ft.Text(" | ", size=11, color="#555555"),
                             ft.Icon(ft.Icons.CONTACT_PAGE, size=18, color="#555555"),
                             ft.Text("Elaborado por: Ing. Jesús Apolaya", size=11, italic=True, color="#555555"),
                         ],
@@ -879,6 +758,121 @@ def main(page: ft.Page):
         )
     )
 
+    t_formulario = time.perf_counter() - t_inicio
+
+    # =========================
+    # CARGA EN SEGUNDO PLANO
+    # =========================
+    q_ui = queue.Queue()
+    ruta_dataset = os.path.join(BASE_DIR, DATASET_FILE)
+
+    def cargar_en_segundo_plano():
+        try:
+            df = cargar_dataset()
+            indice = IndiceDataset(df)
+            version = version_dataset(ruta_dataset)
+        except Exception as e:
+            q_ui.put(lambda e=e: (
+                setattr(carga_text, "value", f"Error cargando dataset: {e}"),
+                setattr(carga_text, "color", "red"),
+                setattr(carga_bar, "visible", False),
+            ))
+            return
+
+        t_dataset = time.perf_counter() - t_inicio
+        carreras = indice.carreras
+
+        def habilitar():
+            dataset["actual"] = {"df": df, "indice": indice, "tabla": TABLA_CRD, "version": version}
+            carrera_dd.options = [ft.dropdown.Option("", "-- Seleccione --")] + [ft.dropdown.Option(c) for c in carreras]
+            carrera_dd.disabled = False
+            carrera_dd.hint_text = None
+            procesar_btn.disabled = False
+            carga_text.value = f"Dataset listo en {t_dataset:.2f} s ({len(df)} filas)"
+            carga_bar.visible = False
+            version_dataset_text.value = f"Dataset: {version}"
+
+        q_ui.put(habilitar)
+
+        # Tabla CRD -> selección: se lee del disco o se reconstruye si cambió el dataset
+        try:
+            preparar_tabla_crd(TABLA_CRD, df)
+        except Exception:
+            pass  # sin tabla se usa el cálculo normal
+
+        registrar_tiempos_carga(OUTPUT_DIR, "mainPaquetes", {
+            "formulario": t_formulario,
+            "dataset": t_dataset,
+            "tabla_crd": time.perf_counter() - t_inicio - t_dataset,
+        })
+
+        if RECARGA_DATASET:
+            VigilanteDataset(ruta_dataset, reconstruir_dataset, publicar_dataset, al_fallar=avisar_fallo_recarga).iniciar()
+
+    # =========================
+    # RECARGA EN CALIENTE (dataset.xlsx modificado con la app abierta)
+    # =========================
+    def reconstruir_dataset():
+        # Corre en el hilo del vigilante: lo vigente sigue atendiendo mientras tanto.
+        df = cargar_dataset()
+        tabla = TablaCRD(ruta_dataset, tolerancia=2)
+        try:
+            preparar_tabla_crd(tabla, df)
+        except Exception:
+            pass
+        return {"df": df, "indice": IndiceDataset(df), "tabla": tabla}
+
+    def publicar_dataset(nuevo, version):
+        nuevo["version"] = version
+        df = nuevo["df"]
+        indice = nuevo["indice"]
+        carreras = indice.carreras
+
+        def aplicar():
+            dataset["actual"] = nuevo
+            carrera_dd.options = [ft.dropdown.Option("", "-- Seleccione --")] + [ft.dropdown.Option(c) for c in carreras]
+            if carrera_dd.value not in carreras:
+                carrera_dd.value = ""
+            unidades = indice.unidades(carrera_dd.value) if carrera_dd.value else []
+            unidad_dd.options = [ft.dropdown.Option("", "-- Seleccione --")] + [ft.dropdown.Option(u) for u in unidades]
+            if unidad_dd.value not in unidades:
+                unidad_dd.value = ""
+            carga_text.value = f"Dataset actualizado: {version} ({len(df)} filas)"
+            carga_text.color = "#555555"
+            version_dataset_text.value = f"Dataset: {version}"
+
+        q_ui.put(aplicar)
+
+    def avisar_fallo_recarga(e):
+        q_ui.put(lambda e=e: (
+            setattr(carga_text, "value", f"No se pudo recargar dataset.xlsx (se mantiene la versión anterior): {e}"),
+            setattr(carga_text, "color", "red"),
+        ))
+
+    async def ui_pump():
+        # Aplica en el hilo de la UI los cambios que dejan los hilos de carga y de recarga.
+        while True:
+            dirty = False
+            while True:
+                try:
+                    fn = q_ui.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    fn()
+                except Exception as e:
+                    # Un callback que falla no puede matar la bomba: se avisa y se sigue
+                    carga_text.value = f"Error al actualizar la pantalla: {e}"
+                    carga_text.color = "red"
+                dirty = True
+            if dirty:
+                page.update()
+            await asyncio.sleep(0.05)
+
+    page.run_task(ui_pump)
+    threading.Thread(target=cargar_en_segundo_plano, daemon=True).start()
+
 
 if __name__ == "__main__":
+    configurar_reportlab()
     ft.app(target=main)
@@ -8,16 +8,36 @@ from datetime import datetime
 import threading
 import queue
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import tkinter as tk
 from tkinter import filedialog
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import mm
-from reportlab.platypus import Table, TableStyle, Paragraph
-from reportlab.lib.styles import ParagraphStyle
+
+from motor_convalidacion import CREDITOS_POR_PERIODO, CacheSeleccion, TablaCRD, obtener_motor
+from datos_convalidacion import (
+    RECARGA_DATASET,
+    CacheHojas,
+    IndiceDataset,
+    VigilanteDataset,
+    categorizar_claves,
+    hoja_de_ruta,
+    marcar_matriculables,
+    preparar_tabla_crd,
+    version_dataset,
+)
+from pdf_convalidacion import (
+    celdas_tabla_27,
+    configurar_reportlab,
+    dibujar_tabla_hoja_ruta,
+    pagina_pdf,
+    paginas_hoja_ruta,
+    textos_firmas,
+    textos_pdf,
+)
 
 
 if getattr(sys, "frozen", False):
@@ -29,37 +49,18 @@ DATASET_FILE = "dataset.xlsx"
 LOGO_FILE = "logo.jpg"
 
 
-def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int):
+def _subset_best_between(df: pd.DataFrame, min_needed: int, max_allowed: int, motor: str = None):
     if df.empty or max_allowed <= 0:
         return [], 0
 
-    df2 = df.copy()
-    df2["CR"] = pd.to_numeric(df2["CR"], errors="coerce").fillna(0).astype(int)
-
-    items = []
-    for idx, row in df2.iterrows():
-        cr = int(row.get("CR", 0))
-        if cr > 0:
-            items.append((idx, cr))
-
-    dp = {0: []}
-
-    for idx, cr in items:
-        for s in sorted(list(dp.keys()), reverse=True):
-            ns = s + cr
-            if ns <= max_allowed and ns not in dp:
-                dp[ns] = dp[s] + [idx]
+    etiquetas = df.index.tolist()
+    crs = pd.to_numeric(df["CR"], errors="coerce").fillna(0).astype(int).tolist()
 
-    sums = sorted(dp.keys())
-    for s in sums:
-        if s >= max(0, min_needed) and s <= max_allowed:
-            return dp[s], s
+    posiciones, suma = obtener_motor(motor)(crs, min_needed, max_allowed)
+    return [etiquetas[p] for p in posiciones], suma
 
-    best = max(sums) if sums else 0
-    return dp.get(best, []), best
 
-
-def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2):
+def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: int = 2, motor: str = None):
     if df_conva.empty:
         return [], 0
 
@@ -87,7 +88,7 @@ def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: in
 
         df_ciclo = df[df["CICLO_NUM"] == ciclo].copy().sort_values(by="CR", ascending=False)
 
-        sel_c, suma_c = _subset_best_between(df=df_ciclo, min_needed=min_restante, max_allowed=max_restante)
+        sel_c, suma_c = _subset_best_between(df=df_ciclo, min_needed=min_restante, max_allowed=max_restante, motor=motor)
 
         if suma_c <= 0:
             continue
@@ -101,11 +102,42 @@ def seleccionar_convalidacion(df_conva: pd.DataFrame, crd: float, tolerancia: in
     return seleccion_total, suma_total
 
 
+CACHE_SELECCION = CacheSeleccion(os.path.join(BASE_DIR, DATASET_FILE))
+TABLA_CRD = TablaCRD(os.path.join(BASE_DIR, DATASET_FILE), tolerancia=2)
+CACHE_HOJAS = CacheHojas(os.path.join(BASE_DIR, DATASET_FILE))
+
+
+def seleccionar_convalidacion_cache(
+    df_conva: pd.DataFrame, carrera: str, unidad: str, crd: float, tolerancia: int = 2, tabla: TablaCRD = None, version: str = ""
+):
+    """
+    1) Tabla CRD precalculada (O(1)).
+    2) LRU por (carrera, unidad, CRD, tolerancia, versión del dataset).
+    3) Cálculo completo.
+    tabla/version: las del dataset con el que se armó df_conva (recarga en caliente).
+    """
+    tabla = tabla or TABLA_CRD
+    precalculada = tabla.seleccion(TablaCRD.clave(carrera, unidad), crd, tolerancia, n_filas=len(df_conva))
+    if precalculada is not None:
+        etiquetas = df_conva.index.tolist()
+        posiciones, suma = precalculada
+        return [etiquetas[p] for p in posiciones], suma
+
+    clave = CacheSeleccion.clave(carrera, unidad, "", crd, tolerancia, version)
+    return CACHE_SELECCION.obtener(clave, lambda: seleccionar_convalidacion(df_conva, crd, tolerancia=tolerancia))
+
+
 def cargar_dataset():
     ruta = os.path.join(BASE_DIR, DATASET_FILE)
     if not os.path.exists(ruta):
         raise FileNotFoundError(f"No se encontró el archivo: {ruta}")
 
+    # Hoja ya normalizada desde la caché binaria; el Excel solo se parsea si cambió.
+    # CARRERA / UNID. NEGOCIO quedan categóricas (ver IndiceDataset).
+    return categorizar_claves(CACHE_HOJAS.leer("mainRPA", lambda: _leer_dataset_excel(ruta)))
+
+
+def _leer_dataset_excel(ruta: str):
     df = pd.read_excel(ruta, header=0)
     df.columns = df.columns.str.strip().str.upper()
 
@@ -215,158 +247,61 @@ def get_cell(row, col, default=""):
     return str(val).strip()
 
 
-def calcular_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame):
-    if "REQUISITOS" not in df_resultado.columns:
-        df_resultado["PUEDE_MATRICULAR"] = False
-        return df_resultado, df_resultado[df_resultado["PUEDE_MATRICULAR"]]
-
-    cursos_ok = set(df_convalidados["CURSO"].astype(str).str.upper().str.strip().tolist())
-
-    def cumple_req(req):
-        if req is None:
-            return True
-        req = str(req).strip()
-        if req == "" or req.lower() == "nan":
-            return True
-        partes = [p.strip().upper() for p in re.split(r"[;,/]", req) if p.strip()]
-        return any(r in cursos_ok for r in partes)
-
-    puede = []
-    for _, row in df_resultado.iterrows():
-        if row.get("ESTADO_CONVALIDACION") == "CONVALIDADO":
-            puede.append(False)
-        else:
-            puede.append(cumple_req(row.get("REQUISITOS")))
-
-    df_resultado["PUEDE_MATRICULAR"] = puede
-    df_matriculables = df_resultado[df_resultado["PUEDE_MATRICULAR"]].copy()
-    return df_resultado, df_matriculables
-
-
-def _encabezado_pdf(c, titulo_principal, alumno, codigo, carrera_upn, campus, logo_path):
-    width, height = A4
-
-    if os.path.exists(logo_path):
-        logo_w, logo_h = 45 * mm, 18 * mm
-        c.drawImage(
-            logo_path,
-            (width - logo_w) / 2,
-            height - 60,
-            logo_w,
-            logo_h,
-            preserveAspectRatio=True,
-            mask="auto",
-        )
-        titulo_y = height - 85
-    else:
-        titulo_y = height - 60
-
-    c.setFont("Helvetica-Bold", 13)
-    c.drawCentredString(width / 2, titulo_y, str(titulo_principal))
-
-    c.setLineWidth(0.7)
-    c.line(40, titulo_y - 6, width - 40, titulo_y - 6)
-
-    c.setFont("Helvetica", 10)
-    y = titulo_y - 22
-
-    c.drawString(40, y, f"Apellidos y Nombres: {str(alumno).upper()}")
-    c.drawRightString(width - 40, y, f"Código: {str(codigo).upper()}")
-
-    c.drawString(40, y - 14, f"Carrera en UPN: {str(carrera_upn).upper()}")
-    c.drawString(40, y - 28, f"Sede: {str(campus).upper()}")
-
-    return y - 45
-
-
-def _dibujar_tabla_fija_27(c, y: float, df: pd.DataFrame, titulo_columna_curso: str, total_cr: int):
-    estilo = ParagraphStyle(name="TablaUPN", fontName="Helvetica", fontSize=8, leading=11)
-
-    data = [["Ciclo", titulo_columna_curso, "Materia", "Cód. Curso", "CR"]]
-    MAX_FILAS = 27
-
-    for _, row in df.iterrows():
-        if len(data) - 1 >= MAX_FILAS:
-            break
-        data.append(
-            [
-                Paragraph(str(row.get("CICLO", "")), estilo),
-                Paragraph(str(row.get("CURSO", "")).upper(), estilo),
-                Paragraph(str(row.get("MATERIA", "")).upper(), estilo),
-                Paragraph(str(row.get("CÓD. CURSO", "")).upper(), estilo),
-                Paragraph(str(row.get("CR", "")), estilo),
-            ]
-        )
-
-    filas_actuales = len(data) - 1
-    for _ in range(MAX_FILAS - filas_actuales):
-        data.append(["", "", "", "", ""])
-
-    data.append(["", "", "", "Total", str(total_cr)])
-
-    row_heights = [14] + [16] * MAX_FILAS + [16]
-
-    table = Table(
-        data,
-        colWidths=[15 * mm, 95 * mm, 30 * mm, 25 * mm, 15 * mm],
-        rowHeights=row_heights,
-        repeatRows=1,
-    )
+def calcular_matriculables(df_resultado: pd.DataFrame, df_convalidados: pd.DataFrame, requisitos=None):
+    """PUEDE_MATRICULAR con los REQUISITOS compilados del dataset (ver marcar_matriculables)."""
+    return marcar_matriculables(df_resultado, df_convalidados, requisitos)
 
-    table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (0, 0), (0, -1), "CENTER"),
-                ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONT", (0, -1), (-1, -1), "Helvetica-Bold"),
-            ]
-        )
-    )
 
-    _, table_height = table.wrap(0, 0)
-    table.drawOn(c, 40, y - table_height)
-    return y - table_height
+# =========================================================
+# PLAN DEL LOTE: UN CÁLCULO POR (CARRERA, UNIDAD, CRD)
+# =========================================================
+def clave_plan(row):
+    """(carrera, unidad, crd) de una fila del Excel de entrada; None si el CRD no es numérico."""
+    try:
+        crd = float(get_cell(row, "CRD"))
+    except ValueError:
+        return None
+    return get_cell(row, "CARRERA"), get_cell(row, "UNIDAD DE NEGOCIO"), crd
 
 
-def _dibujar_firmas(c, elaborado_nombre: str, elaborado_cargo: str, resp_nombre: str, resp_cargo: str):
-    c.setFont("Helvetica", 9)
-    c.drawString(40, 120, f"Nombre Elaborado por: {str(elaborado_nombre).upper()}")
-    c.drawString(40, 108, f"Cargo: {str(elaborado_cargo).upper()}")
-    c.drawString(40, 85, f"Nombre Resp. Acad.: {str(resp_nombre).upper()}")
-    c.drawString(40, 73, f"Cargo: {str(resp_cargo).upper()}")
+def crear_resolvedor_lote(indice: IndiceDataset, tabla: TablaCRD = None, version: str = ""):
+    """
+    Devuelve (resolver, resultados).
+    resolver(carrera, unidad, crd) -> (df_conva, df_convalidados, df_matriculables, df_hoja_ruta), calculado
+    una sola vez por clave y compartido por todos los alumnos del grupo.
+    indice/tabla/version: los del dataset del lote; una recarga en caliente no cambia un lote en curso.
+    """
+    resultados = {}
 
+    def resolver(carrera: str, unidad: str, crd: float):
+        clave = (carrera, unidad, crd)
+        if clave in resultados:
+            return resultados[clave]
 
-def _footer_pdf(c, plan_estudios: str, y_referencia: float):
-    width, _ = A4
-    now = datetime.now()
-    fecha = f"{now.day:02d}/{now.month:02d}/{now.year}"
+        if indice.posiciones(carrera, unidad) is None:
+            raise ValueError(f"No hay registros en dataset para Carrera='{carrera}' y Unidad='{unidad}'")
 
-    c.setFont("Helvetica", 9)
-    c.drawString(40, y_referencia, f"Plan de Estudios: {plan_estudios}")
-    c.drawRightString(width - 40, y_referencia, f"Fecha: {fecha}")
+        df_conva = indice.filas(carrera, unidad)
+        seleccion, _ = seleccionar_convalidacion_cache(df_conva, carrera, unidad, crd, tolerancia=2, tabla=tabla, version=version)
+        df_convalidados = df_conva.loc[seleccion].copy()
 
-    texto_legal = (
-        "Este documento es meramente referencial y emitido por el área académica "
-        "para que sirva de guía en el registro de cursos del estudiante. "
-        "Es potestad del estudiante elegir y matricularse en los cursos que decida."
-    )
+        df_resultado = df_conva.copy()
+        df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
+        df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
+        _, df_matriculables = calcular_matriculables(df_resultado, df_convalidados, indice.requisitos)
+        df_hoja_ruta = hoja_de_ruta(df_conva, df_convalidados, indice.proyeccion(carrera, unidad))
 
-    estilo_legal = ParagraphStyle(name="LegalFooter", fontName="Helvetica", fontSize=9, leading=11)
+        resultados[clave] = (df_conva, df_convalidados, df_matriculables, df_hoja_ruta)
+        return resultados[clave]
 
-    p = Paragraph(texto_legal, estilo_legal)
-    _, h = p.wrap(width - 80, 100)
-    p.drawOn(c, 40, y_referencia - h - 10)
+    return resolver, resultados
 
-    y_linea = 40
-    c.setLineWidth(0.7)
-    c.line(40, y_linea, width - 40, y_linea)
 
-    c.setFont("Helvetica", 8)
-    c.drawString(40, 25, "UNIVERSIDAD PRIVADA DEL NORTE S.A.C.")
-    c.drawRightString(width - 40, 25, "Versión Conva2025G : 7.64.1")
+# =========================
+# PDF: capa fija y helpers compartidos en pdf_convalidacion.py
+# =========================
+# Rótulos bajo "Carrera en UPN", alto del encabezado y versión del pie
+ENCABEZADO_PDF = (("Sede: ",), 45, "Versión Conva2025G : 7.64.1")
 
 
 def generar_pdf_convalidados(
@@ -386,15 +321,10 @@ def generar_pdf_convalidados(
     c = canvas.Canvas(ruta_pdf, pagesize=A4)
     total_cr = int(pd.to_numeric(df_convalidados.get("CR", 0), errors="coerce").fillna(0).sum())
 
-    y = _encabezado_pdf(c, "RESULTADO DE CONVALIDACIÓN", alumno, codigo, carrera_upn, sede, logo_path)
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y - 10, "Relación de cursos convalidados:")
-    y -= 15
-
-    _dibujar_tabla_fija_27(c=c, y=y, df=df_convalidados, titulo_columna_curso="Cursos Convalidados", total_cr=total_cr)
-    _dibujar_firmas(c, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
-    _footer_pdf(c, plan_estudios, 195)
+    geo = pagina_pdf(c, ENCABEZADO_PDF, logo_path, "RESULTADO DE CONVALIDACIÓN", 195, "Relación de cursos convalidados:", "Cursos Convalidados")
+    textos_pdf(c, geo, alumno, codigo, carrera_upn, (sede,), plan_estudios)
+    celdas_tabla_27(c, geo["tabla"], df_convalidados, total_cr)
+    textos_firmas(c, geo, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
 
     c.showPage()
     c.save()
@@ -413,21 +343,32 @@ def generar_pdf_proyeccion(
     resp_cargo: str,
     df_matriculables: pd.DataFrame,
     logo_path: str,
+    df_hoja_ruta: pd.DataFrame = None,
 ):
     c = canvas.Canvas(ruta_pdf, pagesize=A4)
     total_cr = int(pd.to_numeric(df_matriculables.get("CR", 0), errors="coerce").fillna(0).sum())
 
-    y = _encabezado_pdf(c, "CURSOS RECOMENDADOS PARA EL REGISTRO DE CURSO", alumno, codigo, carrera_upn, sede, logo_path)
+    geo = pagina_pdf(
+        c, ENCABEZADO_PDF, logo_path, "CURSOS RECOMENDADOS PARA EL REGISTRO DE CURSO", 195,
+        "Relación de cursos recomendados para el registro de curso:", "Cursos recomendados",
+    )
+    textos_pdf(c, geo, alumno, codigo, carrera_upn, (sede,), plan_estudios)
+    celdas_tabla_27(c, geo["tabla"], df_matriculables, total_cr)
+    textos_firmas(c, geo, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
 
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y - 10, "Relación de cursos recomendados para el registro de curso:")
-    y -= 15
+    c.showPage()
 
-    _dibujar_tabla_fija_27(c=c, y=y, df=df_matriculables, titulo_columna_curso="Cursos recomendados", total_cr=total_cr)
-    _dibujar_firmas(c, elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)
-    _footer_pdf(c, plan_estudios, 195)
+    # Hoja de ruta hasta el egreso (ver hoja_de_ruta): una o más páginas adicionales
+    if df_hoja_ruta is not None and not df_hoja_ruta.empty:
+        periodos = int(df_hoja_ruta["PERIODO"].max())
+        for filas in paginas_hoja_ruta(df_hoja_ruta):
+            geo = pagina_pdf(c, ENCABEZADO_PDF, logo_path, "PROYECCIÓN DE CURSOS POR PERIODO HASTA EL EGRESO", 110)
+            textos_pdf(c, geo, alumno, codigo, carrera_upn, (sede,), plan_estudios)
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(40, geo["y"] - 10, f"Periodos estimados: {periodos} | Tope: {CREDITOS_POR_PERIODO} CR por periodo")
+            dibujar_tabla_hoja_ruta(c, geo["y"] - 15, filas)
+            c.showPage()
 
-    c.showPage()
     c.save()
 
 
@@ -474,24 +415,201 @@ def exportar_resumen_excel(out_root: str, rows_conva: list, rows_reco: list):
     return xlsx_path
 
 
+# =========================================================
+# LOTE: PREPARACIÓN POR ALUMNO + PDFs EN SERIE O EN UN POOL DE PROCESOS
+# =========================================================
+# 0 = un proceso por núcleo, 1 = en serie en el hilo del lote
+PROCESOS_PDF = int(os.environ.get("CONVA_PROCESOS_PDF", "0"))
+# Por debajo de esto no compensa arrancar los procesos
+MIN_ALUMNOS_PARALELO = 40
+# Lo único que leen los PDF de cada cálculo (lo que viaja a los procesos)
+COLUMNAS_PDF = ["CICLO", "CURSO", "MATERIA", "CÓD. CURSO", "CR", "PERIODO"]
+
+
+def preparar_alumno(row, idx: int, out_root: str, resolver_lote, version: str, logo_path: str) -> dict:
+    """
+    Todo lo de un alumno del Excel salvo los PDF: validación, carpetas, cálculo (por
+    plan, ver crear_resolvedor_lote) y filas del Excel resumen. Lanza si la fila no es válida.
+    "trabajo" es el descriptor de sus PDF: (idx, clave del plan, rutas, textos, logo).
+    """
+    nombre = get_cell(row, "NOMBRE")
+    apellido = get_cell(row, "APELLIDO")
+    codigo = get_cell(row, "COD ESTUDIANTE", default="").strip()
+    sede = get_cell(row, "SEDE")
+    plan = get_cell(row, "PLAN DE ESTUDIOS")
+    carrera = get_cell(row, "CARRERA")
+    unidad = get_cell(row, "UNIDAD DE NEGOCIO")
+    crd = float(get_cell(row, "CRD"))
+
+    cargo_elab = get_cell(row, "CARGO ELABORADO POR")
+    cargo_resp = get_cell(row, "CARGO RESP ACADEMICO")
+
+    nombre_elab = get_cell(row, "NOMBRE ELABORADO POR", default="")
+    nombre_resp = get_cell(row, "NOMBRE RESP ACADEMICO", default="")
+
+    grupo_raw = get_cell(row, "GRUPO", default="SIN_GRUPO")
+    grupo = safe_filename(grupo_raw) if grupo_raw else "SIN_GRUPO"
+    if not grupo:
+        grupo = "SIN_GRUPO"
+
+    if not codigo:
+        raise ValueError("COD ESTUDIANTE vacío")
+
+    alumno_fmt = formatear_apellidos_nombres(apellido, nombre)
+
+    out_group = os.path.join(out_root, grupo)
+    os.makedirs(out_group, exist_ok=True)
+
+    folder_name = safe_filename(f"{codigo}_{apellido}_{nombre}")
+    out_student = os.path.join(out_group, folder_name)
+    os.makedirs(out_student, exist_ok=True)
+
+    _, df_convalidados, df_matriculables, _ = resolver_lote(carrera, unidad, crd)
+
+    carrera_upn = f"{carrera} - {unidad}"
+
+    pdf_conva = os.path.join(out_student, f"Resultado_Convalidacion_{codigo}.pdf")
+    pdf_proy = os.path.join(out_student, f"Proyeccion_Malla_{codigo}.pdf")
+    textos = (alumno_fmt, codigo, carrera_upn, sede, plan, nombre_elab, cargo_elab, nombre_resp, cargo_resp)
+
+    alumno_base = {
+        "GRUPO": grupo,
+        "COD ESTUDIANTE": codigo,
+        "APELLIDO": apellido,
+        "NOMBRE": nombre,
+        "ALUMNO_FMT": alumno_fmt,
+        "SEDE": sede,
+        "PLAN DE ESTUDIOS": plan,
+        "CARRERA": carrera,
+        "UNIDAD DE NEGOCIO": unidad,
+        "CRD": crd,
+        "NOMBRE ELABORADO POR": nombre_elab,
+        "CARGO ELABORADO POR": cargo_elab,
+        "NOMBRE RESP ACADEMICO": nombre_resp,
+        "CARGO RESP ACADEMICO": cargo_resp,
+        "CARRERA_UPN": carrera_upn,
+        "VERSION_DATASET": version,
+    }
+
+    def filas_resumen(df):
+        return [
+            {
+                **alumno_base,
+                "CICLO": r.get("CICLO", ""),
+                "CURSO": r.get("CURSO", ""),
+                "MATERIA": r.get("MATERIA", ""),
+                "CÓD. CURSO": r.get("CÓD. CURSO", ""),
+                "CR": r.get("CR", ""),
+                "REQUISITOS": r.get("REQUISITOS", ""),
+            }
+            for _, r in df.iterrows()
+        ]
+
+    return {
+        "codigo": codigo,
+        "alumno_fmt": alumno_fmt,
+        "grupo": grupo,
+        "trabajo": (idx, (carrera, unidad, crd), pdf_conva, pdf_proy, textos, logo_path),
+        "resumen_conva": filas_resumen(df_convalidados),
+        "resumen_reco": filas_resumen(df_matriculables),
+    }
+
+
+def planes_para_pdf(calculos_lote: dict) -> dict:
+    """{clave del plan: (convalidados, matriculables, hoja de ruta)} con solo las columnas de los PDF."""
+    def recortar(df):
+        return df.loc[:, [c for c in COLUMNAS_PDF if c in df.columns]]
+
+    return {clave: tuple(recortar(df) for df in calculo[1:]) for clave, calculo in calculos_lote.items()}
+
+
+_PLANES_PROCESO = {}
+
+
+def _iniciar_proceso_pdf(planes: dict):
+    # Nivel de módulo para poder ejecutarse en ProcessPoolExecutor: los cálculos del
+    # lote llegan una vez a cada proceso y los trabajos solo llevan la clave del plan.
+    # Con spawn el proceso no pasa por __main__: ReportLab se configura aquí.
+    configurar_reportlab()
+    _PLANES_PROCESO.update(planes)
+
+
+def _trabajo_pdf(trabajo: tuple, planes: dict = None):
+    """Los dos PDF de un alumno. Devuelve (idx, None) o (idx, mensaje de error)."""
+    idx, clave, pdf_conva, pdf_proy, textos, logo_path = trabajo
+    try:
+        df_convalidados, df_matriculables, df_hoja_ruta = (planes or _PLANES_PROCESO)[clave]
+        generar_pdf_convalidados(pdf_conva, *textos, df_convalidados, logo_path)
+        generar_pdf_proyeccion(pdf_proy, *textos, df_matriculables, logo_path, df_hoja_ruta)
+        return idx, None
+    except Exception as ex:
+        return idx, str(ex)
+
+
+def procesos_pdf(total: int) -> int:
+    """Procesos para los PDF de un lote de `total` alumnos (1 = en serie)."""
+    procesos = PROCESOS_PDF or os.cpu_count() or 1
+    if total < MIN_ALUMNOS_PARALELO:
+        return 1
+    return max(1, min(procesos, total))
+
+
+def renderizar_lote(trabajos: list, planes: dict, procesos: int, al_caer_pool=None):
+    """
+    Genera (idx, error) por alumno a medida que terminan sus PDF. Con procesos > 1 usa
+    un ProcessPoolExecutor; si el pool se cae, lo pendiente se termina aquí en serie.
+    """
+    pendientes = {trabajo[0]: trabajo for trabajo in trabajos}
+    if procesos > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso_pdf, initargs=(planes,)) as pool:
+                for futuro in as_completed([pool.submit(_trabajo_pdf, t) for t in trabajos]):
+                    idx, error = futuro.result()
+                    del pendientes[idx]
+                    yield idx, error
+        except Exception as ex:  # _trabajo_pdf no lanza: esto es el pool (proceso caído, pickling...)
+            if al_caer_pool:
+                al_caer_pool(ex, len(pendientes))
+
+    for trabajo in list(pendientes.values()):
+        yield _trabajo_pdf(trabajo, planes)
+
+
 def main(page: ft.Page):
     page.title = "UPN - Proyección Malla (Proceso Masivo desde Excel) - PDF + Excel Resumen"
     page.horizontal_alignment = "center"
     page.scroll = "auto"
 
+    ruta_dataset = os.path.join(BASE_DIR, DATASET_FILE)
+
+    def preparar_base(tabla: TablaCRD):
+        df_base_norm = cargar_dataset().copy()
+        df_base_norm["CARRERA"] = df_base_norm["CARRERA"].astype(str).str.strip()
+        df_base_norm["UNID. NEGOCIO"] = df_base_norm["UNID. NEGOCIO"].astype(str).str.strip()
+
+        indice = IndiceDataset(df_base_norm)
+
+        try:
+            preparar_tabla_crd(tabla, df_base_norm)
+        except Exception:
+            pass  # sin tabla se usa el cálculo normal
+        return {"df": df_base_norm, "indice": indice, "tabla": tabla}
+
     try:
-        df_base = cargar_dataset()
+        activo = preparar_base(TABLA_CRD)
+        activo["version"] = version_dataset(ruta_dataset)
     except Exception as e:
         page.add(ft.Text(f"Error cargando dataset: {e}", color="red", size=16, weight=ft.FontWeight.BOLD))
         return
 
-    df_base_norm = df_base.copy()
-    df_base_norm["CARRERA"] = df_base_norm["CARRERA"].astype(str).str.strip()
-    df_base_norm["UNID. NEGOCIO"] = df_base_norm["UNID. NEGOCIO"].astype(str).str.strip()
+    # {df normalizado, tabla CRD, versión}: la recarga en caliente lo reemplaza entero y
+    # cada lote toma el vigente al empezar.
+    dataset = {"actual": activo}
 
     status_text = ft.Text("Carga un Excel y el sistema generará PDFs y un Excel resumen automáticamente.", size=13)
     progress = ft.ProgressBar(width=700, value=0)
     log_box = ft.TextField(label="Log", multiline=True, min_lines=10, max_lines=14, read_only=True, width=980)
+    version_dataset_text = ft.Text(f"Dataset: {activo['version']}", size=11, color="#555555")
 
     q_ui = queue.Queue()
 
@@ -521,6 +639,25 @@ def main(page: ft.Page):
 
     page.run_task(ui_pump)
 
+    # =========================
+    # RECARGA EN CALIENTE (dataset.xlsx modificado con la app abierta)
+    # =========================
+    def publicar_dataset(nuevo, version):
+        nuevo["version"] = version
+        dataset["actual"] = nuevo
+        q_ui.put(lambda: (
+            setattr(version_dataset_text, "value", f"Dataset: {version}"),
+            log(f"Dataset actualizado: {version} ({len(nuevo['df'])} filas). Se usa desde el próximo lote."),
+        ))
+
+    if RECARGA_DATASET:
+        VigilanteDataset(
+            ruta_dataset,
+            lambda: preparar_base(TablaCRD(ruta_dataset, tolerancia=2)),
+            publicar_dataset,
+            al_fallar=lambda e: q_ui.put(lambda e=e: log(f"⚠️ No se pudo recargar dataset.xlsx (se mantiene la versión anterior): {e}")),
+        ).iniciar()
+
     def btn_style(bg: str):
         return ft.ButtonStyle(
             shape=ft.RoundedRectangleBorder(radius=14),
@@ -537,6 +674,9 @@ def main(page: ft.Page):
                 q_ui.put(lambda: (setattr(log_box, "value", ""), setattr(progress, "value", 0), setattr(status_text, "value", "Iniciando...")))
                 q_ui.put(lambda: log(f"Archivo cargado: {ruta_excel_in}"))
 
+                activo = dataset["actual"]
+                q_ui.put(lambda version=activo["version"]: log(f"Dataset: {version}"))
+
                 stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 out_root = os.path.join(BASE_DIR, f"PROCESADOS_{stamp}")
                 os.makedirs(out_root, exist_ok=True)
@@ -560,124 +700,69 @@ def main(page: ft.Page):
                     q_ui.put(lambda: setattr(status_text, "value", "Sin filas para procesar."))
                     return
 
+                claves_plan = {clave_plan(r) for _, r in df_in.iterrows()}
+                claves_plan.discard(None)
+                resolver_lote, calculos_lote = crear_resolvedor_lote(activo["indice"], activo["tabla"], activo["version"])
+                q_ui.put(lambda n=len(claves_plan): log(f"Plan: {total} alumnos -> {n} combinaciones únicas (Carrera, Unidad, CRD)"))
+
                 ok_count = 0
-                err_count = 0
-                failed_codes = []
-                failed_details = []
-                resumen_conva_rows = []
-                resumen_reco_rows = []
+                fallidos = {}  # idx -> (código, error); FALLIDOS.txt sale en el orden del Excel
+                preparados = {}
+                trabajos = []
+
+                def registrar_error(idx, cod_err, ex):
+                    fallidos[idx] = (cod_err, str(ex))
+                    q_ui.put(lambda idx=idx, total=total, cod_err=cod_err, ex=ex: log(f"❌ {idx}/{total} ERROR - {cod_err} -> {ex}"))
 
+                q_ui.put(lambda: setattr(status_text, "value", f"Preparando {total} alumnos..."))
                 for i, row in df_in.iterrows():
                     idx = i + 1
-                    q_ui.put(lambda idx=idx, total=total: (setattr(progress, "value", idx / total), setattr(status_text, "value", f"Procesando {idx}/{total}...")))
-
                     codigo_pre = get_cell(row, "COD ESTUDIANTE", default="").strip()
-
                     try:
-                        nombre = get_cell(row, "NOMBRE")
-                        apellido = get_cell(row, "APELLIDO")
-                        codigo = codigo_pre
-                        sede = get_cell(row, "SEDE")
-                        plan = get_cell(row, "PLAN DE ESTUDIOS")
-                        carrera = get_cell(row, "CARRERA")
-                        unidad = get_cell(row, "UNIDAD DE NEGOCIO")
-                        crd = float(get_cell(row, "CRD"))
-
-                        cargo_elab = get_cell(row, "CARGO ELABORADO POR")
-                        cargo_resp = get_cell(row, "CARGO RESP ACADEMICO")
-
-                        nombre_elab = get_cell(row, "NOMBRE ELABORADO POR", default="")
-                        nombre_resp = get_cell(row, "NOMBRE RESP ACADEMICO", default="")
-
-                        grupo_raw = get_cell(row, "GRUPO", default="SIN_GRUPO")
-                        grupo = safe_filename(grupo_raw) if grupo_raw else "SIN_GRUPO"
-                        if not grupo:
-                            grupo = "SIN_GRUPO"
-
-                        if not codigo:
-                            raise ValueError("COD ESTUDIANTE vacío")
-
-                        alumno_fmt = formatear_apellidos_nombres(apellido, nombre)
-
-                        out_group = os.path.join(out_root, grupo)
-                        os.makedirs(out_group, exist_ok=True)
-
-                        folder_name = safe_filename(f"{codigo}_{apellido}_{nombre}")
-                        out_student = os.path.join(out_group, folder_name)
-                        os.makedirs(out_student, exist_ok=True)
-
-                        df_conva = df_base_norm[(df_base_norm["CARRERA"] == carrera) & (df_base_norm["UNID. NEGOCIO"] == unidad)].copy()
-                        if df_conva.empty:
-                            raise ValueError(f"No hay registros en dataset para Carrera='{carrera}' y Unidad='{unidad}'")
-
-                        seleccion, _ = seleccionar_convalidacion(df_conva, crd, tolerancia=2)
-                        df_convalidados = df_conva.loc[seleccion].copy()
-
-                        df_resultado = df_conva.copy()
-                        df_resultado["ESTADO_CONVALIDACION"] = "NO CONVALIDADO"
-                        df_resultado.loc[df_convalidados.index, "ESTADO_CONVALIDACION"] = "CONVALIDADO"
-                        df_resultado, df_matriculables = calcular_matriculables(df_resultado, df_convalidados)
-
-                        carrera_upn = f"{carrera} - {unidad}"
-
-                        pdf_conva = os.path.join(out_student, f"Resultado_Convalidacion_{codigo}.pdf")
-                        pdf_proy = os.path.join(out_student, f"Proyeccion_Malla_{codigo}.pdf")
-
-                        generar_pdf_convalidados(pdf_conva, alumno_fmt, codigo, carrera_upn, sede, plan, nombre_elab, cargo_elab, nombre_resp, cargo_resp, df_convalidados, logo_path)
-                        generar_pdf_proyeccion(pdf_proy, alumno_fmt, codigo, carrera_upn, sede, plan, nombre_elab, cargo_elab, nombre_resp, cargo_resp, df_matriculables, logo_path)
-
-                        alumno_base = {
-                            "GRUPO": grupo,
-                            "COD ESTUDIANTE": codigo,
-                            "APELLIDO": apellido,
-                            "NOMBRE": nombre,
-                            "ALUMNO_FMT": alumno_fmt,
-                            "SEDE": sede,
-                            "PLAN DE ESTUDIOS": plan,
-                            "CARRERA": carrera,
-                            "UNIDAD DE NEGOCIO": unidad,
-                            "CRD": crd,
-                            "NOMBRE ELABORADO POR": nombre_elab,
-                            "CARGO ELABORADO POR": cargo_elab,
-                            "NOMBRE RESP ACADEMICO": nombre_resp,
-                            "CARGO RESP ACADEMICO": cargo_resp,
-                            "CARRERA_UPN": carrera_upn,
-                        }
-
-                        for _, r in df_convalidados.iterrows():
-                            resumen_conva_rows.append({
-                                **alumno_base,
-                                "CICLO": r.get("CICLO", ""),
-                                "CURSO": r.get("CURSO", ""),
-                                "MATERIA": r.get("MATERIA", ""),
-                                "CÓD. CURSO": r.get("CÓD. CURSO", ""),
-                                "CR": r.get("CR", ""),
-                                "REQUISITOS": r.get("REQUISITOS", ""),
-                            })
-
-                        for _, r in df_matriculables.iterrows():
-                            resumen_reco_rows.append({
-                                **alumno_base,
-                                "CICLO": r.get("CICLO", ""),
-                                "CURSO": r.get("CURSO", ""),
-                                "MATERIA": r.get("MATERIA", ""),
-                                "CÓD. CURSO": r.get("CÓD. CURSO", ""),
-                                "CR": r.get("CR", ""),
-                                "REQUISITOS": r.get("REQUISITOS", ""),
-                            })
-
+                        preparados[idx] = preparar_alumno(row, idx, out_root, resolver_lote, activo["version"], logo_path)
+                        trabajos.append(preparados[idx]["trabajo"])
+                    except Exception as ex:
+                        registrar_error(idx, codigo_pre or "(SIN_CODIGO)", ex)
+
+                procesos = procesos_pdf(len(trabajos))
+                q_ui.put(lambda n=len(trabajos), procesos=procesos: log(
+                    f"PDFs de {n} alumnos en {procesos} procesos" if procesos > 1 else f"PDFs de {n} alumnos en serie"
+                ))
+
+                hechos = len(fallidos)
+                resumen_ok = set()
+                for idx, error in renderizar_lote(
+                    trabajos,
+                    planes_para_pdf(calculos_lote),
+                    procesos,
+                    al_caer_pool=lambda ex, n: q_ui.put(lambda ex=ex, n=n: log(f"⚠️ Se cayó el pool de procesos ({ex}); {n} alumnos se terminan en serie.")),
+                ):
+                    hechos += 1
+                    q_ui.put(lambda hechos=hechos, total=total: (setattr(progress, "value", hechos / total), setattr(status_text, "value", f"Procesando {hechos}/{total}...")))
+
+                    alumno = preparados[idx]
+                    if error is None:
                         ok_count += 1
-                        q_ui.put(lambda idx=idx, total=total, codigo=codigo, alumno_fmt=alumno_fmt, grupo=grupo: log(f"✅ {idx}/{total} OK - {codigo} - {alumno_fmt} | Grupo={grupo}"))
+                        resumen_ok.add(idx)
+                        q_ui.put(lambda idx=idx, total=total, alumno=alumno: log(f"✅ {idx}/{total} OK - {alumno['codigo']} - {alumno['alumno_fmt']} | Grupo={alumno['grupo']}"))
+                    else:
+                        registrar_error(idx, alumno["codigo"], error)
 
-                    except Exception as ex:
-                        err_count += 1
-                        cod_err = codigo_pre or "(SIN_CODIGO)"
-                        failed_codes.append(cod_err)
-                        failed_details.append((cod_err, str(ex)))
-                        q_ui.put(lambda idx=idx, total=total, cod_err=cod_err, ex=ex: log(f"❌ {idx}/{total} ERROR - {cod_err} -> {ex}"))
+                err_count = len(fallidos)
+                failed_codes = [fallidos[idx][0] for idx in sorted(fallidos)]
+                failed_details = [fallidos[idx] for idx in sorted(fallidos)]
+                resumen_conva_rows = [fila for idx in sorted(resumen_ok) for fila in preparados[idx]["resumen_conva"]]
+                resumen_reco_rows = [fila for idx in sorted(resumen_ok) for fila in preparados[idx]["resumen_reco"]]
 
                 q_ui.put(lambda: setattr(progress, "value", 1))
 
+                q_ui.put(lambda n=len(calculos_lote), total=total: log(f"Cálculos únicos de convalidación: {n} para {total} alumnos"))
+
+                cache_stats = CACHE_SELECCION.stats()
+                q_ui.put(lambda cache_stats=cache_stats: log(
+                    f"Caché selección: hits={cache_stats['hits']} | misses={cache_stats['misses']} | entradas={cache_stats['entradas']}"
+                ))
+
                 try:
                     xlsx_path = exportar_resumen_excel(out_root, resumen_conva_rows, resumen_reco_rows)
                     q_ui.put(lambda xlsx_path=xlsx_path: (log("────────────────────────────────────────────"), log(f"📘 Excel resumen generado: {xlsx_path}")))
@@ -774,6 +859,8 @@ def main(page: ft.Page):
                     log_box,
                     ft.Row(
                         [
+                            version_dataset_text,
+                            ft.Text(" | ", size=11, color="#555555"),
                             ft.Icon(ft.Icons.CONTACT_PAGE, size=18, color="#555555"),
                             ft.Text("Elaborado por: Ing. Jesús Apolaya", size=11, italic=True, color="#555555"),
                         ],
@@ -789,4 +876,6 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # ejecutable congelado: los procesos del pool no abren la app
+    configurar_reportlab()
     ft.run(main)
\ No newline at end of file
@@ -0,0 +1,771 @@
+# =========================================================
+# MOTOR DE CONVALIDACIÓN (compartido por main.py, mainPaquetes.py y mainRPA.py)
+# Trabaja solo con enteros: no depende de pandas ni de flet.
+# =========================================================
+
+import hashlib
+import json
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # numpy llega con pandas; sin él solo quedan los motores puros
+    np = None
+
+
+# Motor por defecto para seleccionar_convalidacion: "bitset", "numpy" o "dict" (original).
+# Se puede cambiar sin tocar código con la variable de entorno CONVA_MOTOR.
+MOTOR_SELECCION = os.environ.get("CONVA_MOTOR", "bitset").strip().lower()
+
+# Tope de créditos que el DP acepta por ciclo (después de acotar por el total real).
+# Evita que un CRD o CR mal digitado (ej. 999 -> 9999) dispare memoria y tiempo.
+MAX_CREDITOS_DP = 5000
+
+
+def _items_acotados(crs, max_allowed: int):
+    """
+    Filtra y acota la entrada común a todos los motores.
+    Devuelve (items, limite) con items = [(posicion, cr)].
+    """
+    max_allowed = int(max_allowed)
+    if not crs or max_allowed <= 0:
+        return [], 0
+
+    # Cursos con CR > max_allowed nunca entran: se descartan sin cambiar el resultado.
+    items = [(pos, int(cr)) for pos, cr in enumerate(crs) if 0 < int(cr) <= max_allowed]
+    if not items:
+        return [], 0
+
+    # Ninguna suma supera el total del ciclo: acotar así no altera la respuesta.
+    limite = min(max_allowed, sum(cr for _, cr in items))
+    if limite > MAX_CREDITOS_DP:
+        raise ValueError(
+            f"Créditos fuera de rango para el cálculo ({limite} > {MAX_CREDITOS_DP}). Revisa CRD y CR del dataset."
+        )
+    return items, limite
+
+
+def subset_bitset(crs, min_needed: int, max_allowed: int):
+    """
+    Subset-sum con bitset (int de Python) y punteros al padre.
+
+    Devuelve (posiciones, suma) sobre la lista `crs`:
+    - suma <= max_allowed
+    - si existe suma >= min_needed: elige la MENOR suma (mínimo exceso)
+    - si no existe: elige la MAYOR suma < min_needed (lo más cercano por debajo)
+
+    Las posiciones salen en el mismo orden y con la misma combinación que el DP
+    original de dict (suma -> lista): cada suma guarda solo el curso que la alcanzó
+    primero y se reconstruye caminando hacia atrás.
+    """
+    items, limite = _items_acotados(crs, max_allowed)
+    if not items:
+        return [], 0
+
+    mascara = (1 << (limite + 1)) - 1
+    alcanzables = 1  # bit s encendido = suma s alcanzable
+    padre = array("i", [-1]) * (limite + 1)  # suma -> item que la alcanzó primero
+
+    for k, (_, cr) in enumerate(items):
+        nuevos = (alcanzables << cr) & mascara & ~alcanzables
+        if not nuevos:
+            continue
+        alcanzables |= nuevos
+        while nuevos:
+            bajo = nuevos & -nuevos
+            padre[bajo.bit_length() - 1] = k
+            nuevos ^= bajo
+
+    piso = max(0, int(min_needed))
+    desde_piso = (alcanzables >> piso) << piso
+    if desde_piso:
+        suma = (desde_piso & -desde_piso).bit_length() - 1
+    else:
+        suma = alcanzables.bit_length() - 1
+
+    posiciones = []
+    s = suma
+    while s > 0:
+        pos, cr = items[padre[s]]
+        posiciones.append(pos)
+        s -= cr
+    posiciones.reverse()
+    return posiciones, suma
+
+
+def subset_numpy(crs, min_needed: int, max_allowed: int):
+    """
+    Misma regla y misma combinación que subset_bitset, con tabla booleana
+    (n_cursos + 1) x (limite + 1): cada fila es la anterior OR la anterior desplazada CR.
+    Se reconstruye de abajo hacia arriba: el curso i entra cuando la suma no era
+    alcanzable sin él.
+    """
+    if np is None:
+        raise ValueError("El motor 'numpy' requiere numpy instalado.")
+
+    items, limite = _items_acotados(crs, max_allowed)
+    if not items:
+        return [], 0
+
+    tabla = np.zeros((len(items) + 1, limite + 1), dtype=bool)
+    tabla[0, 0] = True
+    for i, (_, cr) in enumerate(items, start=1):
+        previa = tabla[i - 1]
+        fila = tabla[i]
+        fila[:] = previa
+        fila[cr:] |= previa[: limite + 1 - cr]
+
+    final = tabla[-1]
+    piso = max(0, int(min_needed))
+    desde_piso = np.flatnonzero(final[piso:]) if piso <= limite else np.empty(0, dtype=int)
+    suma = int(piso + desde_piso[0]) if desde_piso.size else int(np.flatnonzero(final)[-1])
+
+    posiciones = []
+    s = suma
+    for i in range(len(items), 0, -1):
+        if s == 0:
+            break
+        if not tabla[i - 1, s]:
+            pos, cr = items[i - 1]
+            posiciones.append(pos)
+            s -= cr
+    posiciones.reverse()
+    return posiciones, suma
+
+
+def subset_dict(crs, min_needed: int, max_allowed: int):
+    """DP original (suma -> lista de posiciones). Se mantiene como referencia para comparar motores."""
+    if not crs or max_allowed <= 0:
+        return [], 0
+
+    dp = {0: []}
+    for pos, cr in enumerate(crs):
+        cr = int(cr)
+        if cr <= 0:
+            continue
+        for s in sorted(list(dp.keys()), reverse=True):
+            ns = s + cr
+            if ns <= max_allowed and ns not in dp:
+                dp[ns] = dp[s] + [pos]
+
+    sums = sorted(dp.keys())
+    for s in sums:
+        if s >= max(0, min_needed) and s <= max_allowed:
+            return dp[s], s
+
+    best = max(sums) if sums else 0
+    return dp.get(best, []), best
+
+
+MOTORES = {
+    "bitset": subset_bitset,
+    "numpy": subset_numpy,
+    "dict": subset_dict,
+}
+
+
+def obtener_motor(nombre: str = None):
+    """Devuelve la función subset-sum del motor pedido (por defecto MOTOR_SELECCION)."""
+    clave = (nombre or MOTOR_SELECCION or "bitset").strip().lower()
+    if clave not in MOTORES:
+        raise ValueError(f"Motor de selección desconocido: {clave}. Opciones: {', '.join(MOTORES)}")
+    return MOTORES[clave]
+
+
+# =========================================================
+# CACHÉ LRU DE SELECCIÓN (CARRERA, UNIDAD, MALLA, CRD, TOLERANCIA)
+# =========================================================
+def firma_archivo(ruta: str):
+    """(tamaño, mtime_ns) del archivo; None si no existe. Cambia cuando se guarda el Excel."""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class CacheSeleccion:
+    """
+    LRU acotado delante de seleccionar_convalidacion.
+    El resultado solo depende de (carrera, unidad, malla, CRD entero, tolerancia),
+    así que alumnos de la misma cohorte comparten el cálculo. Si la firma de
+    dataset.xlsx cambia, se vacía solo; la clave lleva además la versión del dataset
+    con la que se calculó, para que un cálculo en curso sobre el dataset anterior no
+    responda por el nuevo tras una recarga en caliente.
+    """
+
+    def __init__(self, ruta_dataset: str, maxsize: int = 512):
+        self.ruta_dataset = ruta_dataset
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+        self._datos = OrderedDict()
+        self._firma = firma_archivo(ruta_dataset)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(carrera, unidad, malla, crd, tolerancia, version=""):
+        return (
+            str(carrera or "").strip(),
+            str(unidad or "").strip(),
+            str(malla or "").strip(),
+            int(float(crd)),
+            int(tolerancia),
+            str(version or ""),
+        )
+
+    def _validar_firma(self):
+        firma = firma_archivo(self.ruta_dataset)
+        if firma != self._firma:
+            self._datos.clear()
+            self._firma = firma
+            self.invalidaciones += 1
+
+    def obtener(self, clave, calcular):
+        """Devuelve (seleccion, suma) desde caché o ejecutando calcular()."""
+        with self._lock:
+            self._validar_firma()
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                seleccion, suma = self._datos[clave]
+                return list(seleccion), suma
+            self.misses += 1
+
+        seleccion, suma = calcular()
+
+        with self._lock:
+            self._datos[clave] = (tuple(seleccion), suma)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+        return list(seleccion), suma
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entradas": len(self._datos),
+            "invalidaciones": self.invalidaciones,
+            "ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+# =========================================================
+# SELECCIÓN SECUENCIAL POR CICLO SOBRE ENTEROS
+# =========================================================
+def cr_entero(valor) -> int:
+    """Equivalente a pd.to_numeric(errors="coerce").fillna(0).astype(int) para un valor."""
+    try:
+        num = float(valor)
+    except (TypeError, ValueError):
+        return 0
+    if num != num or num in (float("inf"), float("-inf")):
+        return 0
+    return int(num)
+
+
+def ciclo_numero(valor) -> int:
+    """Primer número dentro de CICLO ("Ciclo 3" -> 3); 0 si no hay."""
+    m = re.search(r"(\d+)", str(valor))
+    return int(m.group(1)) if m else 0
+
+
+def orden_cr_desc(crs):
+    """
+    Posiciones ordenadas por CR desc con el mismo desempate que
+    DataFrame.sort_values(by="CR", ascending=False) (quicksort de numpy, vía nargsort).
+    Así la selección elige los mismos cursos que la versión pandas cuando hay CR empatados.
+    """
+    if np is None:
+        return sorted(range(len(crs)), key=lambda p: -crs[p])
+    valores = np.asarray(crs, dtype=int)[::-1]
+    indices = np.arange(len(crs))[::-1]
+    return indices[valores.argsort(kind="quicksort")][::-1].tolist()
+
+
+def seleccionar_por_ciclos(crs, ciclos, crd: float, tolerancia: int = 2, motor: str = None):
+    """
+    Misma regla que seleccionar_convalidacion, sobre listas paralelas de enteros:
+    - Ciclo 1, luego 2, 3... solo se avanza si no se alcanza el CRD.
+    - Límite total: CRD + tolerancia.
+    - Dentro de cada ciclo: CR desc.
+    Devuelve (posiciones, suma) con posiciones sobre las listas de entrada.
+    """
+    crd_int = int(float(crd))
+    limite_total = crd_int + int(tolerancia)
+    subset = obtener_motor(motor)
+
+    por_ciclo = {}
+    for pos, ciclo in enumerate(ciclos):
+        if ciclo > 0:
+            por_ciclo.setdefault(ciclo, []).append(pos)
+
+    seleccion_total = []
+    suma_total = 0
+
+    for ciclo in sorted(por_ciclo):
+        if suma_total >= crd_int:
+            break
+
+        max_restante = limite_total - suma_total
+        if max_restante <= 0:
+            break
+
+        min_restante = crd_int - suma_total
+
+        en_ciclo = por_ciclo[ciclo]
+        posiciones = [en_ciclo[i] for i in orden_cr_desc([crs[p] for p in en_ciclo])]
+        sel_c, suma_c = subset([crs[p] for p in posiciones], min_restante, max_restante)
+
+        if suma_c <= 0:
+            continue
+
+        seleccion_total.extend(posiciones[i] for i in sel_c)
+        suma_total += suma_c
+
+        if suma_total >= crd_int:
+            break
+
+    return seleccion_total, suma_total
+
+
+# =========================================================
+# TABLA PRECALCULADA CRD -> SELECCIÓN (persistida junto a dataset.xlsx)
+# =========================================================
+def hash_archivo(ruta: str) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class TablaCRD:
+    """
+    Para cada slice (carrera, unidad, malla) guarda la selección de TODOS los CRD
+    posibles (0 .. total de créditos del slice). Cada CRD apunta a un id dentro
+    de la lista de selecciones distintas, así que la consulta es O(1).
+
+    Se persiste en <dataset>.tabla_crd.json y solo se reconstruye cuando cambia
+    el hash de dataset.xlsx, la tolerancia o VERSION.
+    """
+
+    VERSION = 1
+
+    def __init__(self, ruta_dataset: str, tolerancia: int = 2):
+        self.ruta_dataset = ruta_dataset
+        self.ruta_tabla = f"{ruta_dataset}.tabla_crd.json"
+        self.tolerancia = int(tolerancia)
+        self.hits = 0
+        self.misses = 0
+        self._slices = {}
+
+    @staticmethod
+    def clave(carrera, unidad, malla=""):
+        return (
+            str(carrera or "").strip().upper(),
+            str(unidad or "").strip().upper(),
+            str(malla or "").strip().upper(),
+        )
+
+    def cargar(self, firma: str = None) -> bool:
+        """Carga la tabla del disco si corresponde al dataset actual."""
+        try:
+            with open(self.ruta_tabla, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        firma = firma or hash_archivo(self.ruta_dataset)
+        if (
+            data.get("version") != self.VERSION
+            or data.get("firma") != firma
+            or data.get("tolerancia") != self.tolerancia
+        ):
+            return False
+
+        self._slices = {
+            tuple(s["clave"]): (s["n"], s["crs"], array("H", s["indice"]), [tuple(x) for x in s["selecciones"]])
+            for s in data.get("slices", [])
+        }
+        return True
+
+    def construir(self, slices, motor: str = None):
+        """slices: iterable de (clave, crs, ciclos) en el orden de filas del slice."""
+        tabla = {}
+        for clave, crs, ciclos in slices:
+            total = sum(cr for cr, ciclo in zip(crs, ciclos) if cr > 0 and ciclo > 0)
+            ids = {}
+            selecciones = []
+            indice = array("H")
+            for crd in range(total + 1):
+                posiciones, _ = seleccionar_por_ciclos(crs, ciclos, crd, self.tolerancia, motor)
+                llave = tuple(posiciones)
+                if llave not in ids:
+                    ids[llave] = len(selecciones)
+                    selecciones.append(llave)
+                indice.append(ids[llave])
+            tabla[tuple(clave)] = (len(crs), list(crs), indice, selecciones)
+        self._slices = tabla
+
+    def guardar(self, firma: str = None):
+        data = {
+            "version": self.VERSION,
+            "firma": firma or hash_archivo(self.ruta_dataset),
+            "tolerancia": self.tolerancia,
+            "slices": [
+                {"clave": list(k), "n": n, "crs": crs, "indice": indice.tolist(), "selecciones": [list(x) for x in sel]}
+                for k, (n, crs, indice, sel) in self._slices.items()
+            ],
+        }
+        tmp = f"{self.ruta_tabla}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.ruta_tabla)
+
+    def preparar(self, obtener_slices, motor: str = None) -> bool:
+        """
+        Carga desde disco o reconstruye y guarda. obtener_slices solo se llama si hay
+        que reconstruir. Devuelve True si se reconstruyó.
+        """
+        firma = hash_archivo(self.ruta_dataset)
+        if self.cargar(firma):
+            return False
+        self.construir(obtener_slices(), motor)
+        try:
+            self.guardar(firma)
+        except OSError:
+            pass  # carpeta de solo lectura: la tabla igual queda en memoria
+        return True
+
+    def seleccion(self, clave, crd: float, tolerancia: int = 2, n_filas: int = None):
+        """
+        (posiciones, suma) precalculadas o None si el slice/tolerancia no está en la tabla
+        (o si el slice recibido no tiene las mismas filas que al construir).
+        """
+        entrada = self._slices.get(clave)
+        if entrada is None or int(tolerancia) != self.tolerancia or (n_filas is not None and n_filas != entrada[0]):
+            self.misses += 1
+            return None
+
+        _, crs, indice, selecciones = entrada
+        crd_int = int(float(crd))
+        if crd_int <= 0:
+            self.hits += 1
+            return [], 0
+
+        # Desde el total del slice en adelante la respuesta es siempre "todo".
+        posiciones = selecciones[indice[min(crd_int, len(indice) - 1)]]
+        self.hits += 1
+        return list(posiciones), sum(crs[p] for p in posiciones)
+
+
+# =========================================================
+# REQUISITOS COMPILADOS (CURSO -> bit, REQUISITOS -> predicado)
+# =========================================================
+# Gramática de REQUISITOS: "+" y "&" = Y; ";", ",", "/" y "|" = O; paréntesis para
+# agrupar. Y liga más que O: "A + B / C" = (A y B) o C. " Y " no es operador: aparece
+# dentro de nombres de curso ("ESTRUCTURA Y FUNCIÓN HUMANA"). Un paréntesis pegado a un
+# nombre es anotación de códigos ("A + B (COD1 + COD2)") y se ignora.
+OPERADORES_Y = "+&"
+OPERADORES_O = ";,/|"
+TOKENS_REQUISITO = re.compile(r"([()+&;,/|])")
+
+
+def nombres_protegidos(cursos) -> tuple:
+    """Nombres de curso que contienen un operador ("LEY PENAL, TEORÍA ..."): se leen enteros."""
+    operadores = set(OPERADORES_Y + OPERADORES_O + "()")
+    nombres = {str(c).upper().strip() for c in cursos}
+    return tuple(sorted((n for n in nombres if operadores & set(n)), key=len, reverse=True))
+
+
+def expresion_requisito(req, protegidos=()):
+    """
+    Celda REQUISITOS en forma normal disyuntiva: lista de frozenset de nombres (en
+    mayúsculas); se cumple si algún conjunto está completo. None si la celda está vacía;
+    [] si no nombra ningún curso. Tolera operandos vacíos y paréntesis sin cerrar.
+    """
+    if req is None:
+        return None
+    texto = str(req).strip()
+    if texto == "" or texto.lower() == "nan":
+        return None
+    texto = texto.upper()
+    marcas = {}
+    for i, nombre in enumerate(protegidos):
+        if nombre in texto:
+            marca = f"\x00{i}\x00"
+            texto = texto.replace(nombre, marca)
+            marcas[marca] = nombre
+    tokens = [t.strip() for t in TOKENS_REQUISITO.split(texto) if t.strip()]
+    pos = 0
+
+    def disyuncion():
+        nonlocal pos
+        terminos = None
+        while True:
+            t = conjuncion()
+            if t is not None:
+                terminos = (terminos or []) + t
+            if pos < len(tokens) and tokens[pos] in OPERADORES_O:
+                pos += 1
+                continue
+            return terminos
+
+    def conjuncion():
+        nonlocal pos
+        terminos = None
+        while True:
+            f = factor()
+            if f is not None:
+                terminos = f if terminos is None else [a | b for a in terminos for b in f]
+            if pos < len(tokens) and tokens[pos] in OPERADORES_Y:
+                pos += 1
+                continue
+            return terminos
+
+    def factor():
+        nonlocal pos
+        if pos >= len(tokens):
+            return None
+        token = tokens[pos]
+        if token == "(":
+            pos += 1
+            dentro = disyuncion()
+            if pos < len(tokens) and tokens[pos] == ")":
+                pos += 1
+            return dentro
+        if token in OPERADORES_Y or token in OPERADORES_O or token == ")":
+            return None
+        pos += 1
+        for marca, nombre in marcas.items():
+            token = token.replace(marca, nombre)
+        while pos < len(tokens) and tokens[pos] == "(":
+            saltar_anotacion()
+        return [frozenset((token.strip(),))]
+
+    def saltar_anotacion():
+        nonlocal pos
+        nivel = 0
+        while pos < len(tokens):
+            nivel += {"(": 1, ")": -1}.get(tokens[pos], 0)
+            pos += 1
+            if nivel == 0:
+                return
+
+    terminos = []
+    while pos < len(tokens):
+        t = disyuncion()
+        terminos += t or []
+        if pos < len(tokens):
+            pos += 1  # ")" sin abrir
+    return list(dict.fromkeys(terminos))
+
+
+def compilar_requisito(terminos, bit):
+    """
+    Predicado (cualquiera, conjuntos) de una expresión: cualquiera = OR de los bits de los
+    términos de un solo curso; conjuntos = máscaras de los términos con varios cursos.
+    None si la expresión es None (sin requisito).
+    """
+    if terminos is None:
+        return None
+    cualquiera, conjuntos = 0, []
+    for termino in terminos:
+        mascara = 0
+        for nombre in termino:
+            mascara |= bit(nombre)
+        if len(termino) == 1:
+            cualquiera |= mascara
+        else:
+            conjuntos.append(mascara)
+    return cualquiera, tuple(conjuntos)
+
+
+def cumple_requisito(predicado, aprobados: int) -> bool:
+    """Sin requisito, o algún curso suelto aprobado, o algún conjunto aprobado completo."""
+    if predicado is None:
+        return True
+    cualquiera, conjuntos = predicado
+    if cualquiera & aprobados:
+        return True
+    for mascara in conjuntos:
+        if mascara & aprobados == mascara:
+            return True
+    return False
+
+
+class IndiceRequisitos:
+    """
+    REQUISITOS compilados una vez por dataset. Cada nombre de curso recibe un bit; cada
+    fila (por etiqueta) guarda el bit de su CURSO y el predicado de sus requisitos (None
+    si no tiene). Una celda repetida se compila una sola vez.
+    Matriculable = no convalidado y cumple_requisito(predicado, convalidados): unas
+    pocas operaciones de enteros por fila.
+    """
+
+    def __init__(self, cursos, requisitos, etiquetas=None):
+        self.bits = {}
+        self.curso = {}
+        self.predicado = {}
+        self.protegidos = nombres_protegidos(cursos)
+        por_celda = {}
+        etiquetas = range(len(cursos)) if etiquetas is None else etiquetas
+        for etiqueta, curso, req in zip(etiquetas, cursos, requisitos):
+            self.curso[etiqueta] = self.bit(str(curso).upper().strip())
+            clave = (req.__class__, req)
+            if clave not in por_celda:
+                por_celda[clave] = compilar_requisito(expresion_requisito(req, self.protegidos), self.bit)
+            self.predicado[etiqueta] = por_celda[clave]
+
+    def bit(self, nombre: str) -> int:
+        return 1 << self.bits.setdefault(nombre, len(self.bits))
+
+    def cubre(self, etiquetas) -> bool:
+        return all(e in self.predicado for e in etiquetas)
+
+    def puede_matricular(self, etiquetas, estados, etiquetas_convalidadas):
+        """Lista de bool alineada con etiquetas; estados = ESTADO_CONVALIDACION de cada fila."""
+        ok = 0
+        for e in etiquetas_convalidadas:
+            ok |= self.curso[e]
+        predicado = self.predicado
+        return [
+            estado != "CONVALIDADO" and cumple_requisito(predicado[e], ok)
+            for e, estado in zip(etiquetas, estados)
+        ]
+
+
+# =========================================================
+# PROYECCIÓN POR PERIODOS (DAG DE REQUISITOS)
+# =========================================================
+CREDITOS_POR_PERIODO = int(os.environ.get("CONVA_CREDITOS_PERIODO", "22"))
+
+
+class ProyeccionMalla:
+    """
+    DAG de requisitos de una malla (un slice carrera/unidad), armado una vez:
+    - requisito[i]: predicado compilado del requisito de i (ver compilar_requisito),
+      sobre los bits de nombre de curso bit_curso[j].
+    - previos[i]: posiciones que aparecen en el requisito de i (aristas del DAG).
+    - ancestros[i] / descendientes[i]: clausura transitiva en bits de posición.
+    - altura[i]: largo de la cadena más larga que depende de i.
+    proyectar() simula periodo a periodo con un tope de créditos: entra lo habilitado
+    por lo aprobado en periodos anteriores, priorizando ciclo, cadena más larga y más
+    cursos que destraba. Mismas reglas que calcular_matriculables.
+    """
+
+    def __init__(self, cursos, requisitos, crs, ciclos):
+        self.n = len(cursos)
+        self.crs = [cr_entero(x) for x in crs]
+        self.ciclos = [ciclo_numero(x) for x in ciclos]
+        self.todos = (1 << self.n) - 1
+
+        bits = {}
+
+        def bit(nombre: str) -> int:
+            return 1 << bits.setdefault(nombre, len(bits))
+
+        self.bit_curso = [bit(str(curso).upper().strip()) for curso in cursos]
+        protegidos = nombres_protegidos(cursos)
+        self.requisito = [compilar_requisito(expresion_requisito(req, protegidos), bit) for req in requisitos]
+
+        self.previos = []
+        for predicado in self.requisito:
+            nombres = 0
+            if predicado is not None:
+                nombres = predicado[0]
+                for mascara in predicado[1]:
+                    nombres |= mascara
+            self.previos.append(sum(1 << j for j in range(self.n) if self.bit_curso[j] & nombres))
+
+        sucesores = [[] for _ in range(self.n)]
+        pendientes = [0] * self.n
+        for i, mascara in enumerate(self.previos):
+            for j in self.posiciones(mascara):
+                sucesores[j].append(i)
+                pendientes[i] += 1
+
+        # Orden topológico (Kahn); un ciclo de requisitos queda fuera y sin clausura.
+        orden = [i for i in range(self.n) if pendientes[i] == 0]
+        for i in orden:
+            for s in sucesores[i]:
+                pendientes[s] -= 1
+                if pendientes[s] == 0:
+                    orden.append(s)
+        self.ciclicos = self.n - len(orden)
+
+        self.ancestros = [0] * self.n
+        for i in orden:
+            mascara = self.previos[i]
+            for j in self.posiciones(mascara):
+                mascara |= self.ancestros[j]
+            self.ancestros[i] = mascara
+
+        self.descendientes = [0] * self.n
+        self.altura = [0] * self.n
+        for i in reversed(orden):
+            for s in sucesores[i]:
+                self.descendientes[i] |= (1 << s) | self.descendientes[s]
+                self.altura[i] = max(self.altura[i], self.altura[s] + 1)
+
+        self.prioridad = sorted(
+            range(self.n),
+            key=lambda i: (self.ciclos[i], -self.altura[i], -bin(self.descendientes[i]).count("1"), i),
+        )
+
+    @staticmethod
+    def posiciones(mascara: int):
+        while mascara:
+            bajo = mascara & -mascara
+            yield bajo.bit_length() - 1
+            mascara ^= bajo
+
+    def nombres(self, posiciones: int) -> int:
+        """Bits de nombre de curso de una máscara de posiciones."""
+        out = 0
+        for j in self.posiciones(posiciones):
+            out |= self.bit_curso[j]
+        return out
+
+    def habilitado(self, i: int, aprobados: int) -> bool:
+        """aprobados: máscara de posiciones."""
+        return cumple_requisito(self.requisito[i], self.nombres(aprobados))
+
+    def proyectar(self, aprobados: int = 0, tope: int = CREDITOS_POR_PERIODO):
+        """
+        (periodos, bloqueados): periodos = listas de posiciones por periodo hasta cubrir la
+        malla; bloqueados = posiciones que nunca se habilitan. Un curso con más CR que el
+        tope entra solo en su periodo.
+        """
+        periodos = []
+        faltan = self.todos & ~aprobados
+        nombres = self.nombres(aprobados)
+        while faltan:
+            periodo, creditos = [], 0
+            for i in self.prioridad:
+                if not (faltan >> i) & 1 or not cumple_requisito(self.requisito[i], nombres):
+                    continue
+                if creditos + self.crs[i] <= tope or not periodo:
+                    periodo.append(i)
+                    creditos += self.crs[i]
+            if not periodo:
+                break
+            periodos.append(periodo)
+            for i in periodo:
+                nombres |= self.bit_curso[i]
+                faltan &= ~(1 << i)
+        return periodos, list(self.posiciones(faltan))
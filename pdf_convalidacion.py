@@ -0,0 +1,424 @@
+# =========================================================
+# RECURSOS PDF (compartido por main.py, mainPaquetes.py y mainRPA.py)
+# Lo que no cambia entre documentos se prepara una vez por proceso; la capa fija y los
+# textos de cada página UPN se dibujan con los helpers de abajo.
+# =========================================================
+
+import io
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+import reportlab
+from PIL import Image
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+from motor_convalidacion import firma_archivo
+
+USAR_CACHE_LOGO = os.environ.get("CONVA_CACHE_LOGO", "1") != "0"
+# PlantillasPDF replica bytes con internos del canvas: solo en versiones de reportlab
+# verificadas con benchmarks/bench_plantillas.py; en otra se dibuja cada página directo.
+VERSIONES_PLANTILLAS = ("5.0.1",)
+USAR_PLANTILLAS = os.environ.get("CONVA_PLANTILLAS_PDF", "1") != "0" and reportlab.Version in VERSIONES_PLANTILLAS
+LOGO_ANCHO, LOGO_ALTO = 45 * mm, 18 * mm
+LOGO_DPI = 300
+
+
+def configurar_reportlab():
+    """
+    Streams binarios en los PDF del proceso. ASCII85 solo sirve para transportar el PDF
+    como texto de 7 bits, agranda los streams un 25 % y sin rl_accel se codifica en
+    Python puro en cada documento (el logo incluido), que es lo que más cuesta por PDF.
+    Es configuración global de ReportLab: la llama cada punto de entrada, no el import.
+    """
+    rl_config.useA85 = 0
+
+
+class _LogoJPEG(ImageReader):
+    """
+    ImageReader sobre bytes JPEG ya escalados. jpeg_fh() es el gancho de pdfdoc para
+    incrustar el JPEG tal cual (sin decodificar ni recomprimir en cada documento).
+    """
+
+    def __init__(self, datos: bytes):
+        super().__init__(io.BytesIO(datos))
+        self._jpeg = datos
+        self.getRGBData()  # una vez: drawImage lo usa como firma del XObject
+
+    def jpeg_fh(self):
+        return io.BytesIO(self._jpeg)
+
+
+def escalar_logo(ruta: str, ancho: float = LOGO_ANCHO, alto: float = LOGO_ALTO, dpi: int = LOGO_DPI) -> ImageReader:
+    """
+    Logo reducido al tamaño con que se dibuja dentro de la caja ancho x alto (pt,
+    manteniendo proporción) a `dpi`. Nunca se agranda. JPEG si no tiene transparencia.
+    """
+    with Image.open(ruta) as im:
+        im.load()
+        escala = min(ancho / im.width, alto / im.height) * dpi / 72
+        if escala < 1:
+            im = im.resize((max(1, round(im.width * escala)), max(1, round(im.height * escala))), Image.LANCZOS)
+        transparente = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        if transparente:
+            return ImageReader(im.copy())
+        buffer = io.BytesIO()
+        im.convert("RGB" if im.mode not in ("RGB", "L") else im.mode).save(buffer, "JPEG", quality=90, optimize=True)
+        return _LogoJPEG(buffer.getvalue())
+
+
+class CacheLogo:
+    """
+    Logo de los encabezados, decodificado y escalado una vez por proceso y compartido
+    por todos los documentos. Se revalida con la firma (tamaño, mtime) del archivo:
+    reemplazar logo.jpg se toma en el siguiente PDF.
+    """
+
+    def __init__(self, activa: bool = USAR_CACHE_LOGO):
+        self.activa = activa
+        self._logos = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, ruta: str):
+        """ImageReader listo para drawImage, o None si el archivo no existe."""
+        firma = firma_archivo(ruta)
+        if firma is None:
+            return None
+        with self._lock:
+            actual = self._logos.get(ruta)
+            if actual is None or actual[0] != firma:
+                actual = self._logos[ruta] = (firma, escalar_logo(ruta))
+            return actual[1]
+
+    def dibujar(self, c, ruta: str, x: float, y: float, ancho: float = LOGO_ANCHO, alto: float = LOGO_ALTO) -> bool:
+        """Dibuja el logo en la caja (x, y, ancho, alto). False si no hay logo."""
+        if not self.activa:
+            if not os.path.exists(ruta):
+                return False
+            imagen = ruta
+        else:
+            imagen = self.obtener(ruta)
+            if imagen is None:
+                return False
+        c.drawImage(imagen, x, y, ancho, alto, preserveAspectRatio=True, mask="auto")
+        return True
+
+
+CACHE_LOGO = CacheLogo()
+
+
+# =========================================================
+# PLANTILLAS: capa fija de cada tipo de página como form XObject
+# =========================================================
+class PlantillasPDF:
+    """
+    Capas fijas de página (títulos, rótulos, grilla vacía, pie legal) como form XObject.
+    Los operadores PDF de cada capa se generan una vez por proceso; en cada documento
+    solo se registra el form con esos bytes y la página dibuja encima lo del alumno.
+    Desactivada, la capa se dibuja directamente en cada página (sin form).
+    La réplica usa internos del canvas (_code, _formsinuse, fontMapping): por defecto
+    solo se activa en VERSIONES_PLANTILLAS; una versión nueva se agrega tras pasar
+    benchmarks/bench_plantillas.py.
+    """
+
+    def __init__(self, activa: bool = USAR_PLANTILLAS):
+        self.activa = activa
+        self._capas = {}
+        self._lock = threading.Lock()
+
+    def usar(self, c, clave, dibujar, recursos=None):
+        """
+        Pone en la página actual la capa `clave` y devuelve lo que retorna dibujar(c)
+        (la geometría de los textos variables). recursos(c) va dentro del form en cada
+        documento: lo que es del documento y no se puede reutilizar en bytes (el logo).
+        """
+        if not self.activa:
+            if recursos:
+                recursos(c)
+            return dibujar(c)
+
+        with self._lock:
+            capa = self._capas.get(clave)
+            if capa is None:
+                capa = self._capas[clave] = {
+                    "nombre": f"CapaFija{len(self._capas)}", "ops": None, "lock": threading.Lock(),
+                }
+        nombre = capa["nombre"]
+
+        if not c.hasForm(nombre):
+            c.beginForm(nombre)
+            if recursos:
+                recursos(c)
+            with capa["lock"]:
+                # Una sola vez por proceso: dibujar y publicar bytes, fuentes y geometría
+                # juntos, sin que otro hilo lea la capa a medio llenar
+                ops = capa["ops"]
+                if ops is None:
+                    inicio, usados = len(c._code), len(c._formsinuse)
+                    geometria = capa["geometria"] = dibujar(c)
+                    if len(c._formsinuse) == usados:
+                        capa["fuentes"] = list(c._doc.fontMapping.items())
+                        capa["ops"] = "\n".join(c._code[inicio:])
+                else:
+                    fuentes, geometria = capa["fuentes"], capa["geometria"]
+            if ops is not None:
+                # Los bytes usan los nombres internos de fuente (/F1, /F2...) del documento
+                # donde se generaron: solo se reutilizan si aquí coinciden
+                if _fuentes_compatibles(c._doc, fuentes):
+                    for f, _ in fuentes:
+                        c._doc.getInternalFontName(f)
+                    c._code.append(ops)
+                else:
+                    geometria = dibujar(c)
+            c.endForm()
+        else:
+            with capa["lock"]:
+                geometria = capa["geometria"]
+        c.doForm(nombre)
+        return geometria
+
+
+def _fuentes_compatibles(doc, fuentes) -> bool:
+    """
+    Sin registrar nada: las fuentes grabadas (en orden de registro) ya tienen aquí el mismo
+    nombre interno o, las que faltan, lo recibirían al registrarse (/F1, /F2... en orden).
+    """
+    mapa = doc.fontMapping
+    siguiente = len(mapa) + 1
+    for fuente, interno in fuentes:
+        actual = mapa.get(fuente)
+        if actual is None:
+            if interno != f"/F{siguiente}":
+                return False
+            siguiente += 1
+        elif actual != interno:
+            return False
+    return True
+
+
+PLANTILLAS_PDF = PlantillasPDF()
+
+
+# =========================================================
+# PÁGINAS UPN: capa fija por tipo de página (PLANTILLAS_PDF) + textos del alumno encima
+# encabezado = (rótulos bajo "Carrera en UPN", alto del encabezado, texto de versión del
+# pie): lo único que cambia entre main.py, mainPaquetes.py y mainRPA.py.
+# =========================================================
+COLUMNAS_TABLA_27 = [15 * mm, 95 * mm, 30 * mm, 25 * mm, 15 * mm]
+MAX_FILAS_TABLA = 27
+FILAS_HOJA_RUTA = 36
+ESTILO_CELDA = ParagraphStyle(name="TablaUPN", fontName="Helvetica", fontSize=8, leading=11)
+ESTILO_LEGAL = ParagraphStyle(name="LegalFooter", fontName="Helvetica", fontSize=9, leading=11)
+TEXTO_LEGAL = (
+    "Este documento es meramente referencial y emitido por el área académica "
+    "para que sirva de guía en el registro de cursos del estudiante. "
+    "Es potestad del estudiante elegir y matricularse en los cursos que decida."
+)
+
+
+def rotulo_pdf(c, x: float, y: float, rotulo: str, tamano: int = 10):
+    """Dibuja el rótulo fijo y devuelve el punto donde va su valor."""
+    c.setFont("Helvetica", tamano)
+    c.drawString(x, y, rotulo)
+    return (x + c.stringWidth(rotulo, "Helvetica", tamano), y)
+
+
+def grilla_tabla_27(c, y: float, titulo_columna_curso: str):
+    """Tabla de 27 filas vacía (encabezado y rótulo Total). Devuelve las coordenadas de sus celdas."""
+    data = [["Ciclo", titulo_columna_curso, "Materia", "Cód. Curso", "CR"]]
+    data += [["", "", "", "", ""] for _ in range(MAX_FILAS_TABLA)]
+    data.append(["", "", "", "Total", ""])
+
+    table = Table(data, colWidths=COLUMNAS_TABLA_27, rowHeights=[14] + [16] * MAX_FILAS_TABLA + [16], repeatRows=1)
+    table.setStyle(
+        TableStyle(
+            [
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("ALIGN", (0, 0), (0, -1), "CENTER"),
+                ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONT", (0, -1), (-1, -1), "Helvetica-Bold"),
+            ]
+        )
+    )
+    _, table_height = table.wrap(0, 0)
+    table.drawOn(c, 40, y - table_height)
+
+    # x de cada columna y base de cada fila de datos (la fila 28 es la del total)
+    xs = [40 + sum(COLUMNAS_TABLA_27[:j]) for j in range(len(COLUMNAS_TABLA_27))]
+    bases = [y - 14 - 16 * (i + 1) for i in range(MAX_FILAS_TABLA + 1)]
+    return {"x": xs, "filas": bases[:-1], "total": (xs[-1] + 6, bases[-1] + 4)}
+
+
+def capa_fija_pdf(
+    c, encabezado: tuple, titulo_principal: str, con_logo: bool, y_footer: float,
+    subtitulo: str = "", titulo_columna_curso: str = "",
+):
+    """
+    Lo que no depende del alumno: título, rótulos, grilla vacía (si hay titulo_columna_curso)
+    con los rótulos de firmas, y pie. Devuelve dónde van los textos variables.
+    """
+    rotulos, alto, version = encabezado
+    width, height = A4
+    titulo_y = height - 85 if con_logo else height - 60
+
+    c.setFont("Helvetica-Bold", 13)
+    c.drawCentredString(width / 2, titulo_y, str(titulo_principal))
+
+    c.setLineWidth(0.7)
+    c.line(40, titulo_y - 6, width - 40, titulo_y - 6)
+
+    y = titulo_y - 22
+    geo = {
+        "alumno": rotulo_pdf(c, 40, y, "Apellidos y Nombres: "),
+        "codigo": (width - 40, y),
+        "carrera": rotulo_pdf(c, 40, y - 14, "Carrera en UPN: "),
+        "rotulos": [rotulo_pdf(c, 40, y - 28 - 14 * i, rotulo) for i, rotulo in enumerate(rotulos)],
+        "y": y - alto,
+    }
+
+    if subtitulo:
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(40, geo["y"] - 10, subtitulo)
+
+    if titulo_columna_curso:
+        geo["tabla"] = grilla_tabla_27(c, geo["y"] - 15, titulo_columna_curso)
+        geo["firmas"] = [
+            rotulo_pdf(c, 40, y_firma, rotulo, 9)
+            for y_firma, rotulo in ((120, "Nombre Elaborado por: "), (108, "Cargo: "), (85, "Nombre Resp. Acad.: "), (73, "Cargo: "))
+        ]
+
+    geo["plan"] = rotulo_pdf(c, 40, y_footer, "Plan de Estudios: ", 9)
+    geo["fecha"] = (width - 40, y_footer)
+
+    p = Paragraph(TEXTO_LEGAL, ESTILO_LEGAL)
+    _, h = p.wrap(width - 80, 100)
+    p.drawOn(c, 40, y_footer - h - 10)
+
+    c.setLineWidth(0.7)
+    c.line(40, 40, width - 40, 40)
+
+    c.setFont("Helvetica", 8)
+    c.drawString(40, 25, "UNIVERSIDAD PRIVADA DEL NORTE S.A.C.")
+    c.drawRightString(width - 40, 25, version)
+    return geo
+
+
+def pagina_pdf(
+    c, encabezado: tuple, logo_path: str, titulo_principal: str, y_footer: float,
+    subtitulo: str = "", titulo_columna_curso: str = "",
+):
+    """Pone la capa fija de la página (form generado una vez por proceso) y devuelve su geometría."""
+    width, height = A4
+    con_logo = os.path.exists(logo_path)
+
+    def logo(c):
+        # Logo escalado y decodificado una sola vez por proceso (ver CacheLogo)
+        CACHE_LOGO.dibujar(c, logo_path, (width - LOGO_ANCHO) / 2, height - 60)
+
+    return PLANTILLAS_PDF.usar(
+        c,
+        (encabezado, titulo_principal, subtitulo, titulo_columna_curso, y_footer, con_logo),
+        lambda c: capa_fija_pdf(c, encabezado, titulo_principal, con_logo, y_footer, subtitulo, titulo_columna_curso),
+        logo if con_logo else None,
+    )
+
+
+def textos_pdf(c, geo: dict, alumno: str, codigo: str, carrera_upn: str, datos: tuple, plan_estudios: str):
+    """Datos del alumno del encabezado (datos: uno por rótulo del encabezado) y del pie."""
+    c.setFont("Helvetica", 10)
+    c.drawString(*geo["alumno"], str(alumno).upper())
+    c.drawRightString(*geo["codigo"], f"Código: {str(codigo).upper()}")
+    c.drawString(*geo["carrera"], str(carrera_upn).upper())
+    for punto, valor in zip(geo["rotulos"], datos):
+        c.drawString(*punto, str(valor).upper())
+
+    now = datetime.now()
+    c.setFont("Helvetica", 9)
+    c.drawString(*geo["plan"], str(plan_estudios))
+    c.drawRightString(*geo["fecha"], f"Fecha: {now.day:02d}/{now.month:02d}/{now.year}")
+
+
+def texto_celda(c, texto: str, x: float, base: float, ancho: float):
+    """Texto de una celda como lo pone la Table: un renglón con drawString, si no Paragraph."""
+    plano = " ".join(texto.split())
+    if not plano:
+        return
+    if "<" not in plano and "&" not in plano and c.stringWidth(plano, "Helvetica", 8) <= ancho - 12:
+        c.drawString(x + 6, base + 5.5, plano)
+    else:
+        p = Paragraph(texto, ESTILO_CELDA)
+        _, h = p.wrap(ancho - 12, 16)
+        p.drawOn(c, x + 6, base + (16 - h) / 2)
+
+
+def celdas_tabla_27(c, tabla: dict, df: pd.DataFrame, total_cr: int):
+    """Hasta 27 cursos y el total sobre la grilla fija."""
+    vacio = pd.Series("", index=df.index)
+    columnas = [
+        [str(v) for v in df.get("CICLO", vacio).tolist()],
+        [str(v).upper() for v in df.get("CURSO", vacio).tolist()],
+        [str(v).upper() for v in df.get("MATERIA", vacio).tolist()],
+        [str(v).upper() for v in df.get("CÓD. CURSO", vacio).tolist()],
+        [str(v) for v in df.get("CR", vacio).tolist()],
+    ]
+
+    c.setFont("Helvetica", 8)
+    for base, fila in zip(tabla["filas"], zip(*columnas)):
+        for x, ancho, texto in zip(tabla["x"], COLUMNAS_TABLA_27, fila):
+            texto_celda(c, texto, x, base, ancho)
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(*tabla["total"], str(total_cr))
+
+
+def paginas_hoja_ruta(df_hoja_ruta: pd.DataFrame):
+    """Filas [periodo, curso, ciclo, cr] de la hoja de ruta, en bloques de FILAS_HOJA_RUTA."""
+    filas = [
+        [str(p) if p else "Sin periodo", str(curso).upper(), str(ciclo), str(cr)]
+        for p, curso, ciclo, cr in zip(
+            df_hoja_ruta["PERIODO"].tolist(),
+            df_hoja_ruta.get("CURSO", pd.Series("", index=df_hoja_ruta.index)).tolist(),
+            df_hoja_ruta.get("CICLO", pd.Series("", index=df_hoja_ruta.index)).tolist(),
+            df_hoja_ruta.get("CR", pd.Series("", index=df_hoja_ruta.index)).tolist(),
+        )
+    ]
+    return [filas[i:i + FILAS_HOJA_RUTA] for i in range(0, len(filas), FILAS_HOJA_RUTA)]
+
+
+def dibujar_tabla_hoja_ruta(c, y: float, filas: list):
+    data = [["Periodo", "Curso", "Ciclo (malla)", "CR"]] + filas
+    table = Table(data, colWidths=[20 * mm, 117 * mm, 30 * mm, 15 * mm], rowHeights=14, repeatRows=1)
+
+    estilo = [
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ALIGN", (0, 0), (0, -1), "CENTER"),
+        ("ALIGN", (2, 0), (-1, -1), "CENTER"),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 1), (-1, -1), 8),
+    ]
+    # Línea gruesa al empezar cada periodo
+    for i in range(2, len(data)):
+        if data[i][0] != data[i - 1][0]:
+            estilo.append(("LINEABOVE", (0, i), (-1, i), 1.2, colors.black))
+    table.setStyle(TableStyle(estilo))
+
+    _, table_height = table.wrap(0, 0)
+    table.drawOn(c, 40, y - table_height)
+    return y - table_height
+
+
+def textos_firmas(c, geo: dict, elaborado_nombre: str, elaborado_cargo: str, resp_nombre: str, resp_cargo: str):
+    c.setFont("Helvetica", 9)
+    for punto, valor in zip(geo["firmas"], (elaborado_nombre, elaborado_cargo, resp_nombre, resp_cargo)):
+        c.drawString(*punto, str(valor).upper())